@@ -27,7 +27,8 @@ CREDS_PATH = "/Users/kevinnovanta/backend_for_ai_agency/Creds/google_sheets_key.
 SHEET_ID = "1xIxtFeaHNLteRKTsVJafbuswk1pOT12GW8TYCNUxW8U"  # ← Replace with your actual Google Sheet ID
 
 
-def sync_leads_to_sheet():
+def sync_leads_to_sheet(raise_errors=False):
+    # raise_errors: re-raise after logging, so a scheduler can record the run as failed
     try:
         # === AUTH ===
         scope = ["https://www.googleapis.com/auth/spreadsheets"]
@@ -125,15 +126,19 @@ def sync_leads_to_sheet():
         logging.exception("❌ Error syncing CSV to Google Sheet.")
         logging.error(f"❌ Error during sync: {str(e)}")
         print(f"❌ Sync failed: {e}")
+        if raise_errors:
+            raise
 
 # === AUTO-SYNC LOOP OR SINGLE RUN ===
-if "--loop" in sys.argv:
-    while True:
+# (guarded so the orchestrator can import sync_leads_to_sheet as a job)
+if __name__ == "__main__":
+    if "--loop" in sys.argv:
+        while True:
+            sync_leads_to_sheet()
+            logging.info("⏱️ Waiting 90 seconds for the next sync cycle...")
+            print("⏱️ Waiting 90 seconds for the next sync cycle...")
+            time.sleep(90)
+    else:
         sync_leads_to_sheet()
-        logging.info("⏱️ Waiting 90 seconds for the next sync cycle...")
-        print("⏱️ Waiting 90 seconds for the next sync cycle...")
-        time.sleep(90)
-else:
-    sync_leads_to_sheet()
 
-logging.shutdown()
\ No newline at end of file
+    logging.shutdown()
\ No newline at end of file
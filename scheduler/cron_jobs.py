@@ -0,0 +1,218 @@
+"""
+Recurring jobs hosted by the orchestrator (workflows/Orchestration/Orchestrator.py).
+
+Each job wraps an existing entry point; nothing here re-implements job logic:
+
+    gmail_watch          @every 30        gmail_watch adaptive step (PollScheduler decides which inboxes are due)
+    followups            15 9-17 * * Mon-Sat   follow-up engine, every client with leads in sequence
+    openers              0 10 * * Mon-Fri      opener batch for every client (sequence_runner.run_opener_batch)
+    crm_sheet_sync       @every 90        CRM CSV -> Google Sheet
+    registry_sheet_sync  @every 90        lead registry CSV -> Google Sheet
+    trim_logs            0 * * * *        workflows/Logging/trim_log_files.py
+
+Schedules can be overridden per job with ORCH_SCHEDULE_<JOB> (upper-case name), e.g.
+ORCH_SCHEDULE_FOLLOWUPS="0 10,14 * * Mon-Fri" or ORCH_SCHEDULE_CRM_SHEET_SYNC="@every 300".
+The openers job spreads its sends over the rest of the send window, so it runs once a day.
+Job modules are imported on first use, so a job whose dependencies are missing only
+fails its own runs.
+
+Path suggestion: scheduler/cron_jobs.py
+"""
+from __future__ import annotations
+
+import os
+import sys
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# The watcher redirects stdout/stderr to its own log when imported standalone; not in here
+os.environ.setdefault("GMAIL_WATCH_LOG_REDIRECT", "0")
+# Same for the opener runner's stdout tee to outreach.log
+os.environ.setdefault("OUTREACH_LOG_TEE", "0")
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from workflows.Orchestration.Orchestrator import Job, parse_trigger  # noqa: E402
+
+DEFAULT_SCHEDULES = {
+    "gmail_watch": "@every 30",
+    "followups": "15 9-17 * * Mon-Sat",
+    "openers": "0 10 * * Mon-Fri",
+    "crm_sheet_sync": "@every 90",
+    "registry_sheet_sync": "@every 90",
+    "trim_logs": "0 * * * *",
+}
+# Per-run timeouts (seconds); a timed-out run is reported but never overlapped
+TIMEOUTS = {
+    "gmail_watch": 600.0,
+    "followups": 3 * 3600.0,
+    "openers": 9 * 3600.0,
+    "crm_sheet_sync": 600.0,
+    "registry_sheet_sync": 600.0,
+    "trim_logs": 120.0,
+}
+# Comma-separated client names for the followups job (default: every client with leads in sequence)
+FOLLOWUP_CLIENTS = os.getenv("ORCH_FOLLOWUP_CLIENTS", "").strip()
+# Comma-separated client names for the openers job, or "all"
+OPENER_CLIENTS = os.getenv("ORCH_OPENER_CLIENTS", "all").strip() or "all"
+
+
+def _schedule(name: str):
+    return parse_trigger(os.getenv(f"ORCH_SCHEDULE_{name.upper()}", DEFAULT_SCHEDULES[name]))
+
+
+# --- gmail_watch ----------------------------------------------------------------
+
+# Keeps the watcher's PollScheduler, worker pool and in-flight map across runs
+class _GmailWatchJob:
+    """Poll the Gmail inboxes that are due for replies."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._state: Optional[Dict[str, Any]] = None
+
+    def _setup(self) -> Dict[str, Any]:
+        from concurrent.futures import ThreadPoolExecutor
+        from workflows.followup_engine.gmail_watch.main import _load_inboxes
+        from workflows.followup_engine.gmail_watch.runtime import runner
+        from workflows.followup_engine.gmail_watch.runtime.scheduler import PollScheduler
+
+        inboxes = _load_inboxes()
+        interval = max(1, runner.POLL_MINUTES) * 60
+        parallelism = max(1, min(runner.PARALLELISM, len(inboxes) or 1))
+        return {
+            "runner": runner,
+            "inboxes": inboxes,
+            "interval": interval,
+            "lookback": max(1, runner.POLL_MINUTES),
+            "scheduler": PollScheduler(inboxes, interval, jitter_sec=15),
+            "pool": ThreadPoolExecutor(max_workers=parallelism, thread_name_prefix="gmail-watch"),
+            "inflight": {},
+        }
+
+    def __call__(self) -> None:
+        with self._lock:
+            if self._state is None:
+                self._state = self._setup()
+        st = self._state
+        if not st["inboxes"]:
+            print("[cron_jobs] gmail_watch: no inboxes configured")
+            return
+        st["runner"].adaptive_step(st["scheduler"], st["pool"], st["inflight"], st["lookback"], st["interval"])
+
+
+gmail_watch = _GmailWatchJob()
+
+
+# --- follow-ups -----------------------------------------------------------------
+
+def followups() -> None:
+    """Send due follow-ups for every client with leads in sequence."""
+    from workflows.followup_engine import main as followup_main
+
+    clients = [c.strip() for c in FOLLOWUP_CLIENTS.split(",") if c.strip()] or followup_main.active_clients()
+    print(f"[cron_jobs] followups: {len(clients)} client(s): {clients}")
+    failed = []
+    for client in clients:
+        try:
+            followup_main.run_followups(client, dry_run=False)
+        except Exception as e:
+            failed.append(client)
+            print(f"[cron_jobs] followups: {client} failed: {e}")
+    if failed:
+        raise RuntimeError(f"follow-up run failed for: {', '.join(failed)}")
+
+
+# --- openers --------------------------------------------------------------------
+
+def openers() -> None:
+    """Send today's opener batch for the configured clients."""
+    from workflows.outreach_sender.sequence_runner import run_opener_batch
+
+    clients = "all" if OPENER_CLIENTS.lower() == "all" else [c.strip() for c in OPENER_CLIENTS.split(",") if c.strip()]
+    summary = run_opener_batch(clients)
+    print(f"[cron_jobs] openers: eligible leads per client: {summary}")
+
+
+# --- sheet syncs / housekeeping -------------------------------------------------
+
+_sheets_client = None
+_sheets_lock = threading.Lock()
+
+
+def crm_sheet_sync() -> None:
+    """Sync the CRM CSV to its Google Sheet."""
+    global _sheets_client
+    from api.Google_Sheets.CRM_Sheet_Sync import sync_crm_to_gsheet
+
+    with _sheets_lock:
+        if _sheets_client is None:
+            _sheets_client = sync_crm_to_gsheet.get_client()
+    sync_crm_to_gsheet.sync_once(_sheets_client)
+
+
+def registry_sheet_sync() -> None:
+    """Sync the lead registry CSV to its Google Sheet."""
+    from api.Google_Sheets.Lead_Registry_Sync.sync_to_google_sheet import sync_leads_to_sheet
+
+    sync_leads_to_sheet(raise_errors=True)
+
+
+def trim_logs() -> None:
+    """Trim the sync logs to their line limits."""
+    from workflows.Logging.trim_log_files import LOG_CONFIG, trim_log_file
+
+    for log_path, line_limit in LOG_CONFIG.items():
+        trim_log_file(log_path, line_limit)
+
+
+# --- registry -------------------------------------------------------------------
+
+_JOB_FUNCS = {
+    "gmail_watch": gmail_watch,
+    "followups": followups,
+    "openers": openers,
+    "crm_sheet_sync": crm_sheet_sync,
+    "registry_sheet_sync": registry_sheet_sync,
+    "trim_logs": trim_logs,
+}
+
+
+def build_jobs(only: Optional[List[str]] = None, skip: Optional[List[str]] = None) -> List[Job]:
+    names = [n for n in _JOB_FUNCS if (not only or n in only) and n not in (skip or [])]
+    unknown = set(only or []) | set(skip or [])
+    unknown -= set(_JOB_FUNCS)
+    if unknown:
+        raise ValueError(f"unknown job(s): {', '.join(sorted(unknown))} (known: {', '.join(_JOB_FUNCS)})")
+    return [Job(n, _JOB_FUNCS[n], _schedule(n), timeout=TIMEOUTS.get(n)) for n in names]
+
+
+def warm_caches() -> None:
+    """Load the shared caches once at startup so the first run of each job is not a cold start."""
+    try:
+        from workflows.followup_engine.gmail_watch.Steps.resolve_lead import get_crm_index
+        idx = get_crm_index()
+        print(f"[cron_jobs] CRM index warm ({len(idx.by_email)} leads)")
+    except Exception as e:
+        print(f"[cron_jobs] CRM index warm-up skipped: {e}")
+    try:
+        from workflows.followup_engine.gmail_watch.Adapters.gmail_client import gmail_service_for_user
+        from workflows.followup_engine.gmail_watch.main import _load_inboxes
+        inboxes = _load_inboxes()
+        for inbox in inboxes:
+            gmail_service_for_user(inbox)
+        print(f"[cron_jobs] Gmail services warm for {len(inboxes)} inbox(es)")
+    except Exception as e:
+        print(f"[cron_jobs] Gmail service warm-up skipped: {e}")
+    try:
+        from workflows.universal_outreach_utils.llm_gateway import get_gateway
+        get_gateway()
+        print("[cron_jobs] LLM gateway warm")
+    except Exception as e:
+        print(f"[cron_jobs] LLM gateway warm-up skipped: {e}")
+
+
+__all__ = ["build_jobs", "warm_caches", "DEFAULT_SCHEDULES"]
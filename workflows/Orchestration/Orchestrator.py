@@ -0,0 +1,478 @@
+"""
+Orchestrator
+------------
+One long-running asyncio process that hosts the recurring jobs of the Outreach
+system (Gmail watcher, follow-up engine, sheet syncs, log trimming), instead of a
+separate script / nohup loop / cron entry per job. Imports, the CRM index, Gmail
+services and the LLM client are loaded once and stay warm between runs.
+
+Pieces:
+- Triggers: ``Every(seconds)`` and ``Cron("m h dom mon dow")`` (5-field cron with
+  ``*``, lists, ranges, ``/step`` and day/month names; dom/dow OR'ed like Vixie cron).
+  ``parse_trigger`` accepts ``"@every 90"`` or a cron expression (used for env overrides).
+- ``Job``: a name, a callable (plain function or ``async def``) and a trigger, with an
+  optional timeout. Blocking callables run in a thread pool so one slow job never
+  stalls the others.
+- No overlapping runs: a job still running when its trigger fires again is skipped
+  (recorded as "skipped"). A per-job ``fcntl`` lock file extends this across
+  processes (e.g. ``cli.py run-once`` while the daemon is up); the OS drops it if the
+  process dies, so there are no stale locks.
+- Run history: every run is recorded (start, duration, status, error) in a SQLite
+  file (WAL) so ``cli.py history`` / ``cli.py stats`` can read it while the daemon
+  runs; the last runs per job are also kept in memory for ``Orchestrator.status()``.
+
+Jobs themselves are registered in ``scheduler/cron_jobs.py``; the command line is
+``workflows/Orchestration/cli.py``.
+"""
+from __future__ import annotations
+
+import asyncio
+import calendar
+import fcntl
+import functools
+import inspect
+import os
+import random
+import signal
+import sqlite3
+import threading
+import time
+import traceback
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Set
+
+DB_PATH = os.getenv("ORCHESTRATOR_DB_PATH", "/Users/kevinnovanta/backend_for_ai_agency/data/caches/orchestrator.sqlite3")
+LOCK_DIR = os.getenv("ORCHESTRATOR_LOCK_DIR", "/tmp/outreach_orchestrator_locks")
+# Runs kept in memory per job (the SQLite history keeps everything)
+HISTORY_KEEP = int(os.getenv("ORCHESTRATOR_HISTORY_KEEP", "50"))
+# How long shutdown waits for running jobs before exiting anyway
+SHUTDOWN_GRACE_SEC = float(os.getenv("ORCHESTRATOR_SHUTDOWN_GRACE_SEC", "60"))
+# Print the per-job status table this often (seconds; 0 = never)
+STATUS_EVERY_SEC = float(os.getenv("ORCHESTRATOR_STATUS_EVERY_SEC", "900"))
+
+
+# --- Triggers -----------------------------------------------------------------
+
+class Every:
+    """Run every `seconds` (+ up to `jitter` seconds), first run right at start unless `run_at_start=False`."""
+
+    def __init__(self, seconds: float, jitter: float = 0.0, run_at_start: bool = True) -> None:
+        if seconds <= 0:
+            raise ValueError("Every(seconds) needs a positive interval")
+        self.seconds = float(seconds)
+        self.jitter = max(0.0, float(jitter))
+        self.run_at_start = run_at_start
+
+    def first(self, now: datetime) -> datetime:
+        return now if self.run_at_start else self.next_after(now)
+
+    def next_after(self, t: datetime) -> datetime:
+        return t + timedelta(seconds=self.seconds + random.uniform(0, self.jitter))
+
+    def __repr__(self) -> str:
+        return f"@every {self.seconds:g}s" + (f" (+{self.jitter:g}s jitter)" if self.jitter else "")
+
+
+_DOW_NAMES = {name.lower(): i for i, name in enumerate(["Sun", "Mon", "Tue", "Wed", "Thu", "Fri", "Sat"])}
+_MON_NAMES = {calendar.month_abbr[i].lower(): i for i in range(1, 13)}
+
+
+def _cron_field(spec: str, lo: int, hi: int, names: Optional[Dict[str, int]] = None) -> Set[int]:
+    values: Set[int] = set()
+    for part in spec.split(","):
+        part = part.strip().lower()
+        step = 1
+        if "/" in part:
+            part, step_s = part.split("/", 1)
+            step = int(step_s)
+            if step <= 0:
+                raise ValueError(f"bad cron step in {spec!r}")
+
+        def _num(tok: str) -> int:
+            return names[tok] if names and tok in names else int(tok)
+
+        if part in ("*", ""):
+            start, end = lo, hi
+        elif "-" in part:
+            a, b = part.split("-", 1)
+            start, end = _num(a), _num(b)
+        else:
+            start = _num(part)
+            end = hi if step > 1 else start
+        if start < lo or end > hi or start > end:
+            raise ValueError(f"cron value out of range in {spec!r} ({lo}-{hi})")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class Cron:
+    """Standard 5-field cron expression, evaluated in local time."""
+
+    def __init__(self, expr: str) -> None:
+        fields = expr.split()
+        if len(fields) != 5:
+            raise ValueError(f"cron expression needs 5 fields (m h dom mon dow): {expr!r}")
+        self.expr = expr
+        self.minutes = _cron_field(fields[0], 0, 59)
+        self.hours = _cron_field(fields[1], 0, 23)
+        self.days = _cron_field(fields[2], 1, 31)
+        self.months = _cron_field(fields[3], 1, 12, _MON_NAMES)
+        dows = _cron_field(fields[4], 0, 7, _DOW_NAMES)
+        self.dows = {d % 7 for d in dows}  # 7 = Sunday too
+        self._dom_any = fields[2] == "*"
+        self._dow_any = fields[4] == "*"
+
+    def _day_ok(self, t: datetime) -> bool:
+        dom_ok = t.day in self.days
+        dow_ok = (t.isoweekday() % 7) in self.dows
+        if self._dom_any or self._dow_any:
+            return dom_ok and dow_ok
+        return dom_ok or dow_ok
+
+    def first(self, now: datetime) -> datetime:
+        return self.next_after(now)
+
+    def next_after(self, t: datetime) -> datetime:
+        t = t.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = t + timedelta(days=366 * 4)
+        while t < limit:
+            if t.month not in self.months:
+                t = (t.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+                continue
+            if not self._day_ok(t):
+                t = t.replace(hour=0, minute=0) + timedelta(days=1)
+                continue
+            if t.hour not in self.hours:
+                t = t.replace(minute=0) + timedelta(hours=1)
+                continue
+            if t.minute not in self.minutes:
+                t += timedelta(minutes=1)
+                continue
+            return t
+        raise ValueError(f"cron expression never fires: {self.expr!r}")
+
+    def __repr__(self) -> str:
+        return self.expr
+
+
+def parse_trigger(spec: str):
+    """'@every 90' / '@every 90+15' (seconds, optional jitter) or a 5-field cron expression."""
+    spec = (spec or "").strip()
+    if spec.startswith("@every"):
+        rest = spec[len("@every"):].strip().rstrip("s")
+        seconds, _, jitter = rest.partition("+")
+        return Every(float(seconds), float(jitter or 0))
+    return Cron(spec)
+
+
+# --- Run history ----------------------------------------------------------------
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id       INTEGER PRIMARY KEY AUTOINCREMENT,
+    job      TEXT NOT NULL,
+    started  REAL NOT NULL,
+    duration REAL NOT NULL,
+    status   TEXT NOT NULL,
+    reason   TEXT NOT NULL DEFAULT '',
+    error    TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS ix_runs_job_started ON runs(job, started);
+"""
+
+
+def _pct(sorted_vals: List[float], q: float) -> float:
+    if not sorted_vals:
+        return 0.0
+    return sorted_vals[min(len(sorted_vals) - 1, int(q * len(sorted_vals)))]
+
+
+class RunHistory:
+    """Per-job run records (SQLite, shared with the CLI)."""
+
+    def __init__(self, path: Path | str = DB_PATH) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def add(self, job: str, started: float, duration: float, status: str, reason: str = "", error: str = "") -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO runs(job, started, duration, status, reason, error) VALUES(?, ?, ?, ?, ?, ?)",
+                (job, started, duration, status, reason, (error or "")[-2000:]),
+            )
+
+    def recent(self, job: Optional[str] = None, limit: int = 20) -> List[Dict[str, Any]]:
+        sql = "SELECT job, started, duration, status, reason, error FROM runs"
+        args: List[Any] = []
+        if job:
+            sql += " WHERE job=?"
+            args.append(job)
+        sql += " ORDER BY started DESC LIMIT ?"
+        args.append(int(limit))
+        with self._lock:
+            rows = self._conn.execute(sql, args).fetchall()
+        keys = ("job", "started", "duration", "status", "reason", "error")
+        return [dict(zip(keys, r)) for r in rows]
+
+    def stats(self, job: Optional[str] = None, since: Optional[float] = None) -> Dict[str, Dict[str, Any]]:
+        """{job: {runs, ok, failed, timeout, skipped, p50, p95, max, mean, last_started, last_status}} (durations in s)."""
+        sql = "SELECT job, started, duration, status FROM runs WHERE 1=1"
+        args: List[Any] = []
+        if job:
+            sql += " AND job=?"
+            args.append(job)
+        if since:
+            sql += " AND started>=?"
+            args.append(since)
+        sql += " ORDER BY started"
+        with self._lock:
+            rows = self._conn.execute(sql, args).fetchall()
+        grouped: Dict[str, List[tuple]] = {}
+        for r in rows:
+            grouped.setdefault(r[0], []).append(r)
+        out: Dict[str, Dict[str, Any]] = {}
+        for name, runs in grouped.items():
+            durations = sorted(r[2] for r in runs if r[3] != "skipped")
+            counts = {s: sum(1 for r in runs if r[3] == s) for s in ("ok", "failed", "timeout", "skipped")}
+            out[name] = dict(
+                runs=len(runs),
+                **counts,
+                p50=round(_pct(durations, 0.5), 2),
+                p95=round(_pct(durations, 0.95), 2),
+                max=round(durations[-1], 2) if durations else 0.0,
+                mean=round(sum(durations) / len(durations), 2) if durations else 0.0,
+                last_started=runs[-1][1],
+                last_status=runs[-1][3],
+            )
+        return out
+
+
+# --- Jobs -----------------------------------------------------------------------
+
+class Job:
+    def __init__(
+        self,
+        name: str,
+        fn: Callable[[], Any],
+        trigger,
+        *,
+        timeout: Optional[float] = None,
+        description: str = "",
+    ) -> None:
+        self.name = name
+        self.fn = fn
+        self.trigger = trigger
+        self.timeout = timeout
+        doc = (fn.__doc__ or "").strip()
+        self.description = description or (doc.splitlines()[0] if doc else "")
+        # Runtime state (owned by the orchestrator's event loop)
+        self.running = False
+        self.next_run: Optional[datetime] = None
+        self.last: Optional[Dict[str, Any]] = None
+        self.recent: Deque[Dict[str, Any]] = deque(maxlen=HISTORY_KEEP)
+
+    def __repr__(self) -> str:
+        return f"Job({self.name}, {self.trigger!r})"
+
+
+class _JobLock:
+    """Non-blocking cross-process lock per job (flock on LOCK_DIR/<job>.lock)."""
+
+    def __init__(self, name: str) -> None:
+        os.makedirs(LOCK_DIR, exist_ok=True)
+        self.path = os.path.join(LOCK_DIR, f"{name}.lock")
+        self._fd: Optional[int] = None
+
+    def acquire(self) -> bool:
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        self._fd = fd
+        return True
+
+    def release(self) -> None:
+        if self._fd is not None:
+            try:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            finally:
+                os.close(self._fd)
+                self._fd = None
+
+
+class Orchestrator:
+    def __init__(
+        self,
+        jobs: Iterable[Job],
+        *,
+        max_workers: Optional[int] = None,
+        history: Optional[RunHistory] = None,
+    ) -> None:
+        self.jobs: Dict[str, Job] = {}
+        for job in jobs:
+            if job.name in self.jobs:
+                raise ValueError(f"duplicate job name: {job.name}")
+            self.jobs[job.name] = job
+        self.history = history or RunHistory()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers or max(4, len(self.jobs) + 2), thread_name_prefix="orch")
+        self._stop: Optional[asyncio.Event] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    # --- running one job ---
+
+    def _record(self, job: Job, started: float, duration: float, status: str, reason: str, error: str = "") -> Dict[str, Any]:
+        rec = {"job": job.name, "started": started, "duration": duration, "status": status, "reason": reason, "error": error}
+        job.recent.append(rec)
+        if status != "skipped":
+            job.last = rec
+        try:
+            self.history.add(job.name, started, duration, status, reason, error)
+        except Exception as e:
+            print(f"[orchestrator] Failed to record run of {job.name}: {e}")
+        return rec
+
+    async def run_job(self, job: Job, reason: str = "schedule") -> Dict[str, Any]:
+        """Run `job` once unless it is already running (here or in another process)."""
+        started = time.time()
+        if job.running:
+            print(f"[orchestrator] {job.name}: previous run still in progress; skipping this {reason} run")
+            return self._record(job, started, 0.0, "skipped", reason, "overlap")
+        lock = _JobLock(job.name)
+        if not lock.acquire():
+            print(f"[orchestrator] {job.name}: locked by another process ({lock.path}); skipping")
+            return self._record(job, started, 0.0, "skipped", reason, "locked")
+
+        job.running = True
+        t0 = time.monotonic()
+        print(f"[orchestrator] {job.name}: started ({reason})")
+
+        def _finish(status: str, error: str = "") -> Dict[str, Any]:
+            duration = time.monotonic() - t0
+            level = "finished" if status == "ok" else status.upper()
+            print(f"[orchestrator] {job.name}: {level} in {duration:.1f}s" + (f" — {error.splitlines()[-1]}" if error else ""))
+            return self._record(job, started, duration, status, reason, error)
+
+        def _release() -> None:
+            job.running = False
+            lock.release()
+
+        loop = asyncio.get_running_loop()
+        if inspect.iscoroutinefunction(job.fn):
+            fut: asyncio.Future = asyncio.ensure_future(job.fn())
+        else:
+            fut = loop.run_in_executor(self._executor, functools.partial(job.fn))
+        done, _ = await asyncio.wait({fut}, timeout=job.timeout)
+        if not done:
+            # A thread can't be killed: keep the job marked running (no overlap) until it returns
+            rec = _finish("timeout", f"exceeded {job.timeout:g}s; still running in background")
+
+            def _late(_f: Any) -> None:
+                print(f"[orchestrator] {job.name}: timed-out run finished after {time.monotonic() - t0:.1f}s")
+                _release()
+
+            fut.add_done_callback(_late)
+            return rec
+        _release()
+        exc = fut.exception()
+        if exc is not None:
+            return _finish("failed", "".join(traceback.format_exception(type(exc), exc, exc.__traceback__)))
+        return _finish("ok")
+
+    # --- scheduling loop ---
+
+    def _spawn(self, job: Job, reason: str) -> None:
+        task = asyncio.create_task(self.run_job(job, reason))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def status(self) -> List[Dict[str, Any]]:
+        rows = []
+        for job in self.jobs.values():
+            rows.append({
+                "job": job.name,
+                "trigger": repr(job.trigger),
+                "running": job.running,
+                "next_run": job.next_run.isoformat(timespec="seconds") if job.next_run else None,
+                "last_status": job.last["status"] if job.last else None,
+                "last_duration": round(job.last["duration"], 2) if job.last else None,
+                "recent_durations": [round(r["duration"], 2) for r in job.recent if r["status"] != "skipped"][-10:],
+            })
+        return rows
+
+    def log_status(self) -> None:
+        for row in self.status():
+            print(
+                f"[orchestrator] {row['job']:<20} next {row['next_run'] or '-':<19} last {row['last_status'] or '-':<8} "
+                f"{row['last_duration'] if row['last_duration'] is not None else '-'}s recent {row['recent_durations']}"
+            )
+
+    def stop(self) -> None:
+        if self._stop is not None:
+            self._stop.set()
+
+    async def run_forever(self, warmup: Optional[Callable[[], Any]] = None) -> None:
+        self._stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self.stop)
+            except (NotImplementedError, RuntimeError):
+                pass
+
+        if warmup is not None:
+            t0 = time.monotonic()
+            try:
+                await loop.run_in_executor(self._executor, warmup)
+                print(f"[orchestrator] Warm-up done in {time.monotonic() - t0:.1f}s")
+            except Exception:
+                print(f"[orchestrator] Warm-up failed (jobs will load lazily): {traceback.format_exc()}")
+
+        now = datetime.now()
+        for job in self.jobs.values():
+            job.next_run = job.trigger.first(now)
+        print(f"[orchestrator] Running {len(self.jobs)} job(s): " + ", ".join(f"{j.name} [{j.trigger!r}]" for j in self.jobs.values()))
+        last_status = time.monotonic()
+
+        while not self._stop.is_set():
+            now = datetime.now()
+            for job in self.jobs.values():
+                if job.next_run is not None and job.next_run <= now:
+                    self._spawn(job, "schedule")
+                    job.next_run = job.trigger.next_after(now)
+            if STATUS_EVERY_SEC and time.monotonic() - last_status >= STATUS_EVERY_SEC:
+                self.log_status()
+                last_status = time.monotonic()
+            wake = min((j.next_run for j in self.jobs.values() if j.next_run), default=now + timedelta(seconds=60))
+            timeout = min(60.0, max(0.05, (wake - datetime.now()).total_seconds()))
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+        print(f"[orchestrator] Stopping; waiting up to {SHUTDOWN_GRACE_SEC:.0f}s for {len(self._tasks)} running job(s)")
+        if self._tasks:
+            await asyncio.wait(set(self._tasks), timeout=SHUTDOWN_GRACE_SEC)
+        self._executor.shutdown(wait=False)
+        self.log_status()
+
+    async def run_once(self, names: Iterable[str]) -> List[Dict[str, Any]]:
+        """Run the named jobs once, concurrently (CLI run-once)."""
+        try:
+            return list(await asyncio.gather(*(self.run_job(self.jobs[n], "manual") for n in names)))
+        finally:
+            self._executor.shutdown(wait=False)
+
+
+__all__ = ["Every", "Cron", "parse_trigger", "Job", "RunHistory", "Orchestrator"]
@@ -0,0 +1,118 @@
+"""
+Command line for the orchestrator.
+
+    python3 -m workflows.Orchestration.cli run [--only gmail_watch,followups] [--skip trim_logs] [--no-warmup]
+    python3 -m workflows.Orchestration.cli list
+    python3 -m workflows.Orchestration.cli run-once followups [crm_sheet_sync ...]
+    python3 -m workflows.Orchestration.cli history [--job followups] [--limit 20]
+    python3 -m workflows.Orchestration.cli stats [--hours 24]
+
+`run` is the long-running service (run it under nohup/launchd/systemd instead of one
+process per job). `history` and `stats` read the run history the service records,
+so they work while it is running.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from scheduler.cron_jobs import build_jobs, warm_caches  # noqa: E402
+from workflows.Orchestration.Orchestrator import Orchestrator, RunHistory  # noqa: E402
+
+
+def _names(value: str | None) -> list[str] | None:
+    return [n.strip() for n in value.split(",") if n.strip()] if value else None
+
+
+def _fmt_ts(ts: float) -> str:
+    return datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def cmd_run(args) -> int:
+    jobs = build_jobs(_names(args.only), _names(args.skip))
+    orch = Orchestrator(jobs)
+    asyncio.run(orch.run_forever(warmup=None if args.no_warmup else warm_caches))
+    return 0
+
+
+def cmd_list(args) -> int:
+    now = datetime.now()
+    for job in build_jobs():
+        print(f"{job.name:<20} {job.trigger!r:<24} next {job.trigger.first(now).isoformat(timespec='minutes'):<17} {job.description}")
+    return 0
+
+
+def cmd_run_once(args) -> int:
+    jobs = build_jobs(args.jobs)
+    records = asyncio.run(Orchestrator(jobs).run_once(args.jobs))
+    return 0 if all(r["status"] == "ok" for r in records) else 1
+
+
+def cmd_history(args) -> int:
+    rows = RunHistory().recent(args.job, args.limit)
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return 0
+    for r in rows:
+        err = f"  {r['error'].strip().splitlines()[-1]}" if r["error"] else ""
+        print(f"{_fmt_ts(r['started'])}  {r['job']:<20} {r['status']:<8} {r['duration']:>9.2f}s  {r['reason']}{err}")
+    return 0
+
+
+def cmd_stats(args) -> int:
+    since = time.time() - args.hours * 3600 if args.hours else None
+    stats = RunHistory().stats(args.job, since)
+    if args.json:
+        print(json.dumps(stats, indent=2))
+        return 0
+    print(f"{'job':<20} {'runs':>5} {'ok':>4} {'fail':>4} {'t/o':>4} {'skip':>4} {'p50':>8} {'p95':>8} {'max':>8}  last")
+    for name, s in sorted(stats.items()):
+        print(
+            f"{name:<20} {s['runs']:>5} {s['ok']:>4} {s['failed']:>4} {s['timeout']:>4} {s['skipped']:>4} "
+            f"{s['p50']:>7.1f}s {s['p95']:>7.1f}s {s['max']:>7.1f}s  {_fmt_ts(s['last_started'])} {s['last_status']}"
+        )
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Outreach orchestrator")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("run", help="Run the scheduler service (foreground)")
+    p.add_argument("--only", help="Comma-separated jobs to run (default: all)")
+    p.add_argument("--skip", help="Comma-separated jobs to leave out")
+    p.add_argument("--no-warmup", action="store_true", help="Skip preloading the CRM index / Gmail services / LLM client")
+    p.set_defaults(func=cmd_run)
+
+    p = sub.add_parser("list", help="List jobs and their schedules")
+    p.set_defaults(func=cmd_list)
+
+    p = sub.add_parser("run-once", help="Run jobs once now (skipped if already running elsewhere)")
+    p.add_argument("jobs", nargs="+")
+    p.set_defaults(func=cmd_run_once)
+
+    for name, func, helptext in (("history", cmd_history, "Recent runs"), ("stats", cmd_stats, "Run-duration stats per job")):
+        p = sub.add_parser(name, help=helptext)
+        p.add_argument("--job", default=None)
+        p.add_argument("--json", action="store_true")
+        if name == "history":
+            p.add_argument("--limit", type=int, default=20)
+        else:
+            p.add_argument("--hours", type=float, default=24.0, help="Window in hours (0 = all time)")
+        p.set_defaults(func=func)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,10 @@
 # engine/subscripts/generation/generic_writer.py
 from __future__ import annotations
+import json
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+
+from engine.subscripts.utils.llm import LLMConfig
 
 PROMPTS_DIR = Path(__file__).resolve().parents[3] / "engine" / "prompts"
 
@@ -21,9 +24,38 @@ def _read_prompt(filename: str) -> str:
 def _safe(s: Any) -> str:
     return (str(s) if s is not None else "").strip()
 
+def _llm_draft(prompt: str, context: Dict[str, Any], *, followup_num: int) -> Optional[Dict[str, str]]:
+    """Ask the shared LLM gateway for {"subject","body"}; None if disabled or the call/parse fails."""
+    cfg = LLMConfig()
+    if not cfg.use_llm:
+        return None
+    try:
+        from workflows.universal_outreach_utils.llm_gateway import get_gateway
+        content = get_gateway().complete(
+            model=cfg.model,
+            messages=[
+                {"role": "system", "content": "You write brief, polite B2B follow-up emails. Return ONLY JSON: {\"subject\": \"...\", \"body\": \"...\"}"},
+                {"role": "user", "content": prompt},
+                {"role": "user", "content": "Thread context JSON:\n" + json.dumps(context, default=str)},
+            ],
+            temperature=cfg.temperature,
+            max_tokens=cfg.max_tokens,
+            label=f"followup.generic_f{followup_num}",
+        )
+        data = json.loads(content)
+        subject, body = _safe(data.get("subject")), _safe(data.get("body"))
+        if subject and body:
+            return {"subject": subject, "body": body}
+        print("[generic_writer] LLM draft missing subject/body; using template")
+    except Exception as e:
+        print(f"[generic_writer] LLM draft failed; using template: {e}")
+    return None
+
 def draft_generic(*, followup_num: int, context: Dict[str, Any]) -> Dict[str, str]:
     """
     Produce a base (generic) subject/body pair for follow-up N using a text prompt file.
+    With "use_llm" on in settings/llm.json the prompt is sent through the LLM gateway;
+    otherwise (or if that fails) the prompt is filled in as a template.
     Returns a dict: {"subject": "...", "body": "..."} which personalize() can refine.
     """
     prompt_name = f"generic_followup_f{followup_num}.txt"
@@ -36,7 +68,7 @@ def draft_generic(*, followup_num: int, context: Dict[str, Any]) -> Dict[str, st
     first = _safe(lead.get("first_name"))
     company = _safe(lead.get("company_name"))
 
-    # very light templating for the stub; you can swap to LLM later
+    # Light templating: the deterministic draft, and the rendered prompt for the LLM path
     draft_subject = f"Quick nudge — re: {subject_hint}" if subject_hint else f"Quick nudge ({company or 'following up'})"
     draft_body = tpl.format(
         followup_num=followup_num,
@@ -46,4 +78,4 @@ def draft_generic(*, followup_num: int, context: Dict[str, Any]) -> Dict[str, st
         company_name=company,
     )
 
-    return {"subject": draft_subject, "body": draft_body}
\ No newline at end of file
+    return _llm_draft(draft_body, context, followup_num=followup_num) or {"subject": draft_subject, "body": draft_body}
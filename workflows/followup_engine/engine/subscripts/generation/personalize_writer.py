@@ -1,19 +1,57 @@
 # engine/subscripts/generation/personalize_writer.py
 from __future__ import annotations
-from typing import Dict, Any
+import json
+from typing import Dict, Any, Optional
+
+from engine.subscripts.utils.llm import LLMConfig
+
+# CRM columns handed to the LLM for personalization (kept small)
+_LEAD_COLS = ["First Name", "Company Name", "Industry", "Overview", "Custom 1", "Custom 2", "Opener Subject Sent"]
 
 def _safe(s: Any) -> str:
     return (str(s) if s is not None else "").strip()
 
+def _llm_personalize(subject: str, body: str, row: Dict[str, Any], *, followup_num: int) -> Optional[tuple[str, str]]:
+    """Personalize via the shared LLM gateway; None if disabled or the call/parse fails."""
+    cfg = LLMConfig()
+    if not cfg.use_llm:
+        return None
+    lead = {k: _safe(row.get(k)) for k in _LEAD_COLS if _safe(row.get(k))}
+    try:
+        from workflows.universal_outreach_utils.llm_gateway import get_gateway
+        content = get_gateway().complete(
+            model=cfg.model,
+            messages=[
+                {"role": "system", "content": "You lightly personalize B2B follow-up emails without changing their intent. Return ONLY JSON: {\"subject\": \"...\", \"body\": \"...\"}"},
+                {"role": "user", "content": "Draft and lead JSON:\n" + json.dumps({"subject": subject, "body": body, "lead": lead})},
+            ],
+            temperature=cfg.temperature,
+            max_tokens=cfg.max_tokens,
+            label=f"followup.personalize_f{followup_num}",
+        )
+        data = json.loads(content)
+        new_subject, new_body = _safe(data.get("subject")), _safe(data.get("body"))
+        if new_subject and new_body:
+            return new_subject, new_body
+        print("[personalize_writer] LLM output missing subject/body; using rules")
+    except Exception as e:
+        print(f"[personalize_writer] LLM personalization failed; using rules: {e}")
+    return None
+
 def personalize(generic: Dict[str, str], row: Dict[str, Any], fields_map: Dict[str, Any], *, followup_num: int) -> tuple[str, str]:
     """
     Take the generic draft and personalize lightly using CRM row fields.
-    For now this is a deterministic stub (no API call); plug in your LLM later.
+    With "use_llm" on in settings/llm.json this goes through the LLM gateway;
+    otherwise (or if that fails) a deterministic rule-based pass is used.
     Returns (subject, body).
     """
     subject = _safe(generic.get("subject"))
     body = _safe(generic.get("body"))
 
+    llm_out = _llm_personalize(subject, body, row, followup_num=followup_num)
+    if llm_out:
+        return llm_out
+
     # Light personalization hooks
     first = _safe(row.get("First Name"))
     company = _safe(row.get("Company Name"))
@@ -1,6 +1,9 @@
 from __future__ import annotations
 from pathlib import Path
-import csv
+from typing import Optional
+
+from workflows.universal_outreach_utils.crm_journal import CRMJournal
+from workflows.universal_outreach_utils.crm_store import CRMStore
 
 ROOT = Path(__file__).resolve().parents[3]  # .../workflows/followup_engine
 DEFAULT_CANDIDATES = [
@@ -36,22 +39,23 @@ def _pick_csv_path() -> Path:
         + "\n—or put a CSV in the project root with 'crm' in the filename."
     )
 
-def load_crm() -> tuple[list[dict], list[str], Path]:
+def load_crm(client: Optional[str] = None) -> tuple[list[dict], list[str], Path]:
     """
-    Load the CRM CSV into memory.
+    Load the CRM into memory (read through the SQLite CRM store, which re-imports the CSV if it changed,
+    plus any pending write-behind journal patches).
     Returns: (rows, headers, csv_path)
-    - rows: list of dicts (header → value)
+    - rows: list of dicts (header → value); only that client's rows when `client` is given (indexed lookup)
     - headers: list of column names in original order
     - csv_path: Path to the file loaded
     """
     print("[load_crm] Starting to load CRM")
     csv_path = _pick_csv_path()
     print(f"[load_crm] Selected CSV path: {csv_path}")
-    print("[load_crm] Opened CSV file, reading headers and rows")
-    with csv_path.open("r", newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        headers = reader.fieldnames or []
-        rows = [dict(r) for r in reader]
+    store = CRMStore.for_csv(csv_path)
+    headers = store.headers()
+    rows = store.rows(client=client)
+    # Merge row patches saved this run but not yet compacted into the CSV
+    rows, headers = CRMJournal.for_csv(csv_path).apply(rows, headers, append_missing=client is None)
     print(f"[load_crm] Loaded {len(rows)} rows with {len(headers)} columns")
     print("[load_crm] Finished loading CRM")
-    return rows, headers, csv_path
\ No newline at end of file
+    return rows, headers, csv_path
@@ -1,56 +1,35 @@
 from __future__ import annotations
-from typing import List, Dict, Any, Tuple
-import csv
+from typing import List, Dict, Any
 from pathlib import Path
 
-__all__ = ["save_row"]
+from workflows.universal_outreach_utils.crm_journal import CRMJournal
+from workflows.universal_outreach_utils.crm_store import CRMStore
 
-def _read_csv(path: Path) -> Tuple[List[str], List[Dict[str, Any]]]:
-    with path.open("r", encoding="utf-8", newline="") as f:
-        rdr = csv.DictReader(f)
-        headers = rdr.fieldnames or []
-        rows = [dict(r) for r in rdr]
-    return headers, rows
-
-def _write_csv(path: Path, headers: List[str], rows: List[Dict[str, Any]]) -> None:
-    with path.open("w", encoding="utf-8", newline="") as f:
-        w = csv.DictWriter(f, fieldnames=headers, extrasaction="ignore")
-        w.writeheader()
-        for r in rows:
-            w.writerow(r)
+__all__ = ["save_row", "flush_crm"]
 
 def save_row(csv_path: Path, headers: List[str], row: Dict[str, Any], *, email_key: str = "Email") -> None:
     """
-    Update the CSV row that matches by Email (exact match).
-    Writes back only once per call (read → modify → write).
+    Record an update to the CRM row that matches by Email (case-insensitive).
+    Appends one patch (only the fields that changed; None values ignored) to the
+    write-behind journal next to the CSV — a single fsync'd append, no CSV rewrite.
+    Rows not yet in the CRM are appended when the journal is compacted (flush_crm).
     """
-    path = Path(csv_path)
-    hdrs, rows = _read_csv(path)
-
-    # Ensure we preserve any new columns used by the caller
-    all_headers = list(dict.fromkeys(hdrs + headers))
-    email_val = (row.get(email_key) or "").strip()
-
-    updated = False
-    out_rows: List[Dict[str, Any]] = []
-    for r in rows:
-        if (r.get(email_key) or "").strip() == email_val and email_val:
-            # Merge: prefer values from 'row' when present
-            merged = dict(r)
-            for h in all_headers:
-                if h in row and row[h] is not None:
-                    merged[h] = row[h]
-            out_rows.append(merged)
-            updated = True
-        else:
-            out_rows.append(r)
-
-    # If not found, append (optional; comment out if you never want to append)
-    if not updated and email_val:
-        # ensure all headers exist
-        for h in headers:
-            if h not in all_headers:
-                all_headers.append(h)
-        out_rows.append(row)
-
-    _write_csv(path, all_headers, out_rows)
\ No newline at end of file
+    email = (row.get(email_key) or "").strip()
+    if not email:
+        print(f"[save_crm] Row has no '{email_key}' value; nothing saved")
+        return
+
+    journal = CRMJournal.for_csv(csv_path)
+    base = CRMStore.for_csv(csv_path).get(email)
+    pending = journal.pending_for(email)
+    if base is None and not pending:
+        fields = dict(row)
+    else:
+        current = {**(base or {}), **pending}
+        fields = {k: v for k, v in row.items() if v is not None and current.get(k) != v}
+    if fields:
+        journal.append(email, fields)
+
+def flush_crm(csv_path: Path) -> int:
+    """Compact the journal into the CRM and export the CSV (atomic). Returns rows patched."""
+    return CRMJournal.for_csv(csv_path).compact()
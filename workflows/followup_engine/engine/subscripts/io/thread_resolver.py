@@ -3,7 +3,6 @@ import os, base64, re
 from datetime import datetime, timezone
 from typing import Optional, Dict, Any, Tuple, List
 
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
@@ -11,6 +10,7 @@ from google.oauth2.credentials import Credentials
 
 from engine.subscripts.utils.crm_helpers import get
 from engine.subscripts.io.thread_links import link_to_thread_id, thread_id_to_link  # if you have it; or inline
+from workflows.universal_outreach_utils.gmail_services import gmail_service, invalidate
 
 # Search needs read scope
 SCOPES = ["https://www.googleapis.com/auth/gmail.readonly"]
@@ -36,11 +36,14 @@ def _ensure_parent(path: str):
 def _token_path_for(inbox: str) -> str:
     return os.path.join(TOKENS_DIR, f"{inbox}.json")
 
+def _token_path_in_use(inbox: str) -> str:
+    return TOKEN_FILE if (TOKEN_FILE and os.path.exists(TOKEN_FILE)) else _token_path_for(inbox)
+
 def _load_creds(inbox: str) -> Credentials:
     if not os.path.exists(CREDENTIALS_PATH):
         raise RuntimeError(f"Missing Gmail credentials at {CREDENTIALS_PATH}")
 
-    token_path = TOKEN_FILE if (TOKEN_FILE and os.path.exists(TOKEN_FILE)) else _token_path_for(inbox)
+    token_path = _token_path_in_use(inbox)
     creds = None
     if os.path.exists(token_path):
         try:
@@ -66,8 +69,19 @@ def _load_creds(inbox: str) -> Credentials:
             f.write(creds.to_json())
     return creds
 
-def _svc(creds: Credentials):
-    return build("gmail", "v1", credentials=creds)
+def _save_refreshed_token(inbox: str, creds: Credentials) -> None:
+    token_path = _token_path_in_use(inbox)
+    _ensure_parent(token_path)
+    with open(token_path, "w", encoding="utf-8") as f:
+        f.write(creds.to_json())
+
+def _svc(inbox: str):
+    """Cached per-inbox read-only Gmail service (shared across lookups and worker threads)."""
+    return gmail_service(
+        f"readonly:{inbox}",
+        lambda: _load_creds(inbox),
+        on_refresh=lambda creds: _save_refreshed_token(inbox, creds),
+    )
 
 def _short_fingerprint(text: str, length: int = 40) -> Optional[str]:
     if not text:
@@ -135,8 +149,7 @@ def find_thread_by_signals(row: Dict[str, Any], fields: Dict[str, Any], inbox: s
         return None
 
     try:
-        creds = _load_creds(inbox)
-        service = _svc(creds)
+        service = _svc(inbox)
         q = _build_query(inbox, to_email, opener_subject, opener_date)
         print(f"[thread_resolver] Searching inbox={inbox} with q='{q}'")
         resp = service.users().messages().list(userId="me", q=q, maxResults=max_candidates).execute()
@@ -156,19 +169,21 @@ def find_thread_by_signals(row: Dict[str, Any], fields: Dict[str, Any], inbox: s
                 # not a strong match, but keep as fallback if nothing else matches
                 pass
             if tid:
-                link = thread_id_to_link(0, tid)
+                link = thread_id_to_link(tid)
                 print(f"[thread_resolver] Candidate matched: threadId={tid}")
                 return {"thread_id": tid, "thread_link": link}
 
         # Fallback: return most recent threadId even if snippet didn’t match
         tid = msgs[0].get("threadId") or service.users().messages().get(userId="me", id=msgs[0]["id"]).execute().get("threadId")
         if tid:
-            link = thread_id_to_link(0, tid)
+            link = thread_id_to_link(tid)
             print(f"[thread_resolver] Fallback selected recent threadId={tid}")
             return {"thread_id": tid, "thread_link": link}
 
     except HttpError as e:
         print(f"[thread_resolver] HttpError: {e}")
+        if getattr(getattr(e, "resp", None), "status", None) == 401:
+            invalidate(f"readonly:{inbox}")
     except Exception as e:
         print(f"[thread_resolver] Error: {e}")
 
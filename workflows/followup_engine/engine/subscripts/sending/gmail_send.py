@@ -12,15 +12,20 @@ from __future__ import annotations
 import os
 import base64
 from email.message import EmailMessage
+from email.utils import make_msgid
 from datetime import datetime, timezone
 from typing import Optional, Dict, Any
 
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 
+from workflows.universal_outreach_utils.gmail_services import gmail_service, invalidate
+from workflows.universal_outreach_utils.message_index import record_sent
+
+from .rate_limit import acquire_send_permit, release_send_permit
+
 # ==== User-specific defaults (can be overridden by env vars) ====
 CREDENTIALS_PATH_DEFAULT = \
     "/Users/kevinnovanta/backend_for_ai_agency/Creds/credentials.json"
@@ -37,6 +42,9 @@ TOKENS_DIR = os.environ.get("GMAIL_TOKENS_DIR", TOKENS_DIR_DEFAULT)
 
 SCOPES = ["https://www.googleapis.com/auth/gmail.send"]
 
+# Token file each inbox's credentials were loaded from (refreshed tokens are saved back there)
+_TOKEN_PATHS: Dict[str, str] = {}
+
 
 def _ensure_parent_dir(path: str) -> None:
     parent = os.path.dirname(path)
@@ -125,11 +133,28 @@ def _load_or_create_creds(inbox: str) -> Credentials:
             f.write(creds.to_json())
         print(f"[gmail_send] Saved new token to: {token_path}")
 
+    if token_path:
+        _TOKEN_PATHS[inbox] = token_path
     return creds
 
 
-def _gmail_service(creds: Credentials):
-    return build("gmail", "v1", credentials=creds)
+def _save_refreshed_token(inbox: str, creds: Credentials) -> None:
+    token_path = _TOKEN_PATHS.get(inbox)
+    if not token_path:
+        return
+    _ensure_parent_dir(token_path)
+    with open(token_path, "w", encoding="utf-8") as f:
+        f.write(creds.to_json())
+    print(f"[gmail_send] Token refreshed and saved: {token_path}")
+
+
+def _gmail_service(inbox: str):
+    """Cached per-inbox Gmail service (credentials loaded once, refreshed before expiry)."""
+    return gmail_service(
+        f"send:{inbox}",
+        lambda: _load_or_create_creds(inbox),
+        on_refresh=lambda creds: _save_refreshed_token(inbox, creds),
+    )
 
 
 def _rfc822(sender: str, to: str, subject: str, body: str) -> EmailMessage:
@@ -137,6 +162,8 @@ def _rfc822(sender: str, to: str, subject: str, body: str) -> EmailMessage:
     msg["To"] = to
     msg["From"] = sender
     msg["Subject"] = subject
+    # Stable Message-ID recorded in the message index for reply matching
+    msg["Message-ID"] = make_msgid(domain=(sender.split("@")[-1] or None))
     msg.set_content(body)
     return msg
 
@@ -163,13 +190,18 @@ def send_followup(*, inbox: str, to: str, subject: str, body: str, thread_link:
     """Send an email via Gmail API. If thread_link is present, reply in-thread.
 
     Returns a dict: {status, sent_at, thread_link, thread_id, bounce_status?, notes?}
+    Without a permit from the shared send limiter: {status: "error", reason: "rate_limited", retry_after}.
     """
     print(
         f"send_followup called with inbox={inbox}, to={to}, subject={subject}, thread_link={thread_link}"
     )
+    wait = acquire_send_permit(inbox)
+    if wait:
+        print(f"[gmail_send] No send permit for {inbox} for another {wait:.0f}s; skipping")
+        return {"status": "error", "reason": "rate_limited", "retry_after": wait}
+
     try:
-        creds = _load_or_create_creds(inbox)
-        service = _gmail_service(creds)
+        service = _gmail_service(inbox)
 
         msg = _rfc822(sender=inbox, to=to, subject=subject, body=body)
         raw = base64.urlsafe_b64encode(msg.as_bytes()).decode("utf-8")
@@ -185,6 +217,7 @@ def send_followup(*, inbox: str, to: str, subject: str, body: str, thread_link:
 
         final_tid = sent.get("threadId") or thread_id
         final_link = _thread_id_to_link(0, final_tid) if final_tid else None
+        record_sent(to, inbox, message_id=msg["Message-ID"], thread_id=final_tid)
 
         print(f"[gmail_send] Status=ok, sent_at={sent_at}, thread_id={final_tid}")
         return {
@@ -198,7 +231,13 @@ def send_followup(*, inbox: str, to: str, subject: str, body: str, thread_link:
 
     except HttpError as e:
         print(f"[gmail_send] HttpError: {e}")
+        release_send_permit(inbox)
+        if getattr(getattr(e, "resp", None), "status", None) == 401:
+            invalidate(f"send:{inbox}")
         return {"status": "error", "reason": "http_error", "detail": str(e)}
     except Exception as e:
         print(f"[gmail_send] Error: {e}")
+        release_send_permit(inbox)
+        if type(e).__name__ == "RefreshError":
+            invalidate(f"send:{inbox}")
         return {"status": "error", "reason": "exception", "detail": str(e)}
\ No newline at end of file
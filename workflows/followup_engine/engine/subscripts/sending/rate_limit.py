@@ -0,0 +1,43 @@
+from __future__ import annotations
+import os
+from typing import Optional
+
+from workflows.universal_outreach_utils.send_limiter import get_send_limiter
+
+# Follow-up send permits from the shared cross-process limiter
+# (workflows/universal_outreach_utils/send_limiter.py), so follow-ups and openers sent
+# from the same inbox count against one daily / per-minute budget.
+
+FOLLOWUP_DAILY_CAP = int(os.getenv("FOLLOWUP_DAILY_CAP", os.getenv("SEND_DAILY_CAP", "40")))
+FOLLOWUP_PER_MINUTE_CAP = float(os.getenv("FOLLOWUP_PER_MINUTE_CAP", os.getenv("SEND_PER_MINUTE_CAP", "2")))
+FOLLOWUP_MAX_WAIT_SEC = float(os.getenv("FOLLOWUP_MAX_WAIT_SEC", "180"))
+
+
+def acquire_send_permit(inbox: str, max_wait: Optional[float] = None) -> float:
+    """Take a permit for `inbox`, sleeping through short waits.
+
+    Returns 0.0 when the send may go out, otherwise the seconds until the next permit
+    (the caller should skip this send and retry later).
+    """
+    return get_send_limiter().wait_for(
+        inbox,
+        daily_cap=FOLLOWUP_DAILY_CAP,
+        per_minute=FOLLOWUP_PER_MINUTE_CAP,
+        max_wait=FOLLOWUP_MAX_WAIT_SEC if max_wait is None else max_wait,
+    )
+
+
+def send_permit_wait(inbox: str) -> float:
+    """Seconds until `inbox` could take a permit (0.0 = now), without consuming one.
+
+    Checked before generating copy, so a spent inbox doesn't pay for LLM calls it can't use.
+    """
+    return get_send_limiter().peek(inbox, daily_cap=FOLLOWUP_DAILY_CAP, per_minute=FOLLOWUP_PER_MINUTE_CAP)
+
+
+def release_send_permit(inbox: str) -> None:
+    """Give the permit back when the send did not go out."""
+    try:
+        get_send_limiter().release(inbox)
+    except Exception as e:
+        print(f"[rate_limit] release failed for {inbox}: {e}")
@@ -6,7 +6,7 @@ import json
 _ROOT = Path(__file__).resolve().parents[2]  # workflows/followup_engine
 _SETTINGS = _ROOT / "settings" / "llm.json"
 
-_def_cfg = {"provider": "openai", "model": "gpt-4o-mini", "temperature": 0.6, "max_tokens": 600}
+_def_cfg = {"provider": "openai", "model": "gpt-4o-mini", "temperature": 0.6, "max_tokens": 600, "use_llm": False}
 
 
 def load_llm_cfg() -> dict:
@@ -15,7 +15,8 @@ def load_llm_cfg() -> dict:
     except Exception:
         return dict(_def_cfg)
 
-# Example stub for callers to access model settings; actual API call is elsewhere.
+# Model settings for the follow-up writers; the API call itself goes through
+# workflows/universal_outreach_utils/llm_gateway.py when `use_llm` is on.
 class LLMConfig:
     def __init__(self):
         self.cfg = load_llm_cfg()
@@ -34,4 +35,9 @@ class LLMConfig:
 
     @property
     def max_tokens(self) -> int:
-        return int(self.cfg.get("max_tokens", _def_cfg["max_tokens"]))
\ No newline at end of file
+        return int(self.cfg.get("max_tokens", _def_cfg["max_tokens"]))
+
+    @property
+    def use_llm(self) -> bool:
+        """Writers call the LLM gateway only when enabled; otherwise they use the deterministic templates."""
+        return bool(self.cfg.get("use_llm", _def_cfg["use_llm"]))
@@ -6,9 +6,10 @@ from typing import Dict, List
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
 from google.oauth2 import service_account
 
+from workflows.universal_outreach_utils.gmail_services import gmail_service, invalidate
+
 
 class GmailClient:
     """Light wrapper around an authenticated Gmail service for a given user.
@@ -89,15 +90,7 @@ def _token_path_for(email: str) -> Path:
 
 
 
-def gmail_service_for_user(inbox_email: str):
-    """Build and return an authenticated Gmail API *service* for the given inbox
-    using a Google Workspace Service Account with Domain‑Wide Delegation (DWD).
-
-    Requirements:
-      - Admin granted DWD to this service account's Client ID in Admin Console
-      - service_account.json present at <repo>/Creds/service_account.json
-      - SCOPES limited to least privilege (e.g., gmail.readonly)
-    """
+def _delegated_creds(inbox_email: str):
     if not SA_KEY_PATH.exists():
         raise FileNotFoundError(
             f"Missing service account key at {SA_KEY_PATH}. Place your Workspace service account JSON key there."
@@ -109,8 +102,25 @@ def gmail_service_for_user(inbox_email: str):
     )
 
     # Impersonate the target user mailbox via Domain‑Wide Delegation
-    delegated = sa_creds.with_subject(inbox_email)
+    return sa_creds.with_subject(inbox_email)
+
+
+def gmail_service_for_user(inbox_email: str):
+    """Return an authenticated Gmail API *service* for the given inbox
+    using a Google Workspace Service Account with Domain‑Wide Delegation (DWD).
+
+    The delegated credentials are created once per inbox and refreshed before expiry;
+    the service object is cached per thread (see universal_outreach_utils.gmail_services),
+    so repeated ticks don't rebuild it.
+
+    Requirements:
+      - Admin granted DWD to this service account's Client ID in Admin Console
+      - service_account.json present at <repo>/Creds/service_account.json
+      - SCOPES limited to least privilege (e.g., gmail.readonly)
+    """
+    return gmail_service(f"dwd:{inbox_email.strip().lower()}", lambda: _delegated_creds(inbox_email))
+
 
-    # Build and return the Gmail API service
-    service = build("gmail", "v1", credentials=delegated)
-    return service
\ No newline at end of file
+def invalidate_service_for_user(inbox_email: str) -> None:
+    """Drop the cached credentials/service for an inbox (e.g. after an auth failure)."""
+    invalidate(f"dwd:{inbox_email.strip().lower()}")
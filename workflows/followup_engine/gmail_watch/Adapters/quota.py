@@ -0,0 +1,56 @@
+from __future__ import annotations
+import threading
+from typing import Tuple
+
+# Gmail API quota accounting for the watcher.
+# Each inbox is processed on one worker thread, so the Steps charge the units of every
+# API call they make to a thread-local tally; the runner reads it (take) at the end of
+# the inbox's tick and hands it to the poll scheduler. Batch requests are charged per
+# sub-request, which is how Gmail bills them. Rate-limit errors (429, or 403 with a
+# rate/quota reason) are counted the same way so the scheduler can back off.
+
+# Quota units per method (Gmail API usage limits)
+UNIT_COSTS = {
+    "messages.list": 5,
+    "messages.get": 5,
+    "history.list": 2,
+    "threads.get": 10,
+    "getProfile": 1,
+}
+
+_RATE_REASONS = ("ratelimitexceeded", "userratelimitexceeded", "quotaexceeded", "dailylimitexceeded", "rate limit")
+
+_local = threading.local()
+
+
+def start() -> None:
+    """Reset this thread's tally (called when an inbox tick begins)."""
+    _local.units = 0
+    _local.rate_limited = 0
+
+
+def charge(method: str, calls: int = 1) -> None:
+    _local.units = getattr(_local, "units", 0) + UNIT_COSTS.get(method, 5) * calls
+
+
+def is_rate_limit(exc: BaseException) -> bool:
+    status = getattr(getattr(exc, "resp", None), "status", None)
+    if status == 429:
+        return True
+    if status == 403:
+        detail = (str(exc) + str(getattr(exc, "content", b"") or b"")).lower()
+        return any(r in detail for r in _RATE_REASONS)
+    return False
+
+
+def note_error(exc: BaseException) -> None:
+    if is_rate_limit(exc):
+        _local.rate_limited = getattr(_local, "rate_limited", 0) + 1
+
+
+def take() -> Tuple[int, int]:
+    """Return (units, rate-limit errors) since start() and reset the tally."""
+    units = getattr(_local, "units", 0)
+    limited = getattr(_local, "rate_limited", 0)
+    start()
+    return units, limited
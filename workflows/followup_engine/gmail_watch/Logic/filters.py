@@ -17,11 +17,27 @@ def is_auto_reply(subject: str | None, headers: Dict[str, str]) -> bool:
 
 # --- Bulk/no-reply sender helper ---
 _NOREPLY_RE = re.compile(r"(no[-_]?reply|notification|noreply)@", re.I)
+# Same local parts as _NOREPLY_RE, spelled out for Gmail search (see Logic/query.py)
+_NOREPLY_LOCALPARTS = ("noreply", "no-reply", "no_reply", "notification")
 _BULK_DOMAINS = (
     "linkedin.com", "facebookmail.com", "twitter.com", "mailchimp.com",
     "sendgrid.net", "amazonses.com", "hubspotemail.net", "marketo.net"
 )
 
+# --- Delivery status notifications (bounces) ---
+_DSN_SENDER_RE = re.compile(r"^(mailer-daemon|postmaster)@", re.I)
+
+def is_delivery_report(addr: str | None, headers: Dict[str, str]) -> bool:
+    """Bounce/DSN: mailer-daemon/postmaster sender, multipart/report body or X-Failed-Recipients.
+
+    DSNs often quote the original Message-ID in References, so they thread like replies.
+    """
+    if addr and _DSN_SENDER_RE.search(addr.strip()):
+        return True
+    if headers.get("Content-Type", "").strip().lower().startswith("multipart/report"):
+        return True
+    return "X-Failed-Recipients" in headers
+
 def is_bulk_sender_domain(addr: str | None) -> bool:
     if not addr:
         return False
@@ -0,0 +1,60 @@
+from __future__ import annotations
+import os
+from typing import Iterable, List, Optional
+
+from .filters import _BULK_DOMAINS, _NOREPLY_LOCALPARTS
+
+# Gmail search query compiler for the inbox poll.
+# Pushes as much filtering as possible to the server so messages.list only returns
+# plausible replies: a precise `after:<epoch-seconds>` bound from the stored since_ms
+# watermark (instead of day-granularity newer_than), `-from:` clauses for the inbox
+# itself and for the bulk / no-reply senders the runner would skip anyway, and
+# `-category:` exclusions for Gmail's automated tabs. Anything the query lets through
+# is still checked client-side (internalDate, is_bulk_sender_domain), so the query only
+# has to be a superset of what the runner keeps.
+
+# Seconds subtracted from since_ms: Gmail's `after:` is second-granular and
+# internalDate can trail the search index slightly; the runner drops im <= since_ms.
+AFTER_SLACK_SEC = int(os.getenv("GMAIL_WATCH_AFTER_SLACK_SEC", "120"))
+
+# "updates" is left out by default: Gmail sometimes files genuine thread replies there.
+EXCLUDE_CATEGORIES = tuple(
+    c.strip().lower()
+    for c in os.getenv("GMAIL_WATCH_EXCLUDE_CATEGORIES", "promotions,social,forums").split(",")
+    if c.strip()
+)
+
+EXCLUDE_BULK = os.getenv("GMAIL_WATCH_QUERY_EXCLUDE_BULK", "1") not in ("0", "false", "False")
+
+
+def _from_clauses(inbox: str, exclude_bulk: bool) -> List[str]:
+    senders: List[str] = [inbox.strip().lower()]
+    if exclude_bulk:
+        senders.extend(_BULK_DOMAINS)
+        senders.extend(f"{local}@" for local in _NOREPLY_LOCALPARTS)
+    return [f"-from:{s}" for s in dict.fromkeys(s for s in senders if s)]
+
+
+def compile_query(
+    inbox: str,
+    since_ms: Optional[int] = None,
+    lookback_minutes: int = 1440,
+    *,
+    categories: Iterable[str] = EXCLUDE_CATEGORIES,
+    exclude_bulk: bool = EXCLUDE_BULK,
+    slack_sec: int = AFTER_SLACK_SEC,
+) -> str:
+    """Return the Gmail search string for candidate inbound messages of `inbox`.
+
+    With `since_ms` the window is `after:<epoch-seconds>`; without one it falls back
+    to `newer_than:Nd` derived from `lookback_minutes` (at least one day).
+    """
+    terms = ["in:inbox"]
+    if since_ms:
+        terms.append(f"after:{max(0, int(since_ms) // 1000 - slack_sec)}")
+    else:
+        days = max(1, (lookback_minutes // (24 * 60)) or 1)
+        terms.append(f"newer_than:{days}d")
+    terms.extend(_from_clauses(inbox, exclude_bulk))
+    terms.extend(f"-category:{c}" for c in categories)
+    return " ".join(terms)
@@ -1,19 +1,75 @@
 from __future__ import annotations
 import json
-from .paths import OFFSETS_PATH, LOCK_DIR
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, Optional
+from .paths import OFFSETS_PATH, HISTORY_PATH, THREADS_PATH, LOCK_DIR, logger
 from .file_lock import file_lock
 
+def _read_json(path: Path) -> dict:
+    """Load a watermark file; a missing or unreadable one counts as empty (the watcher re-seeds)."""
+    try:
+        return json.loads(path.read_text())
+    except FileNotFoundError:
+        return {}
+    except (json.JSONDecodeError, UnicodeDecodeError) as e:
+        logger.warning("[offsets] %s is unreadable (%s); treating it as empty", path, e)
+        return {}
+
+def _write_json(path: Path, data: dict) -> None:
+    # Temp file + atomic replace: a crash mid-write never leaves a truncated file behind
+    fd, tmp = tempfile.mkstemp(dir=str(path.parent), prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp, path)
+    except Exception:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
 def get_offset(inbox: str) -> int:
-    if not OFFSETS_PATH.exists():
-        return 0
-    data = json.loads(OFFSETS_PATH.read_text())
+    data = _read_json(OFFSETS_PATH)
     return int(data.get(inbox, 0))
 
 def set_offset(inbox: str, value: int) -> None:
-    data = {}
-    if OFFSETS_PATH.exists():
-        data = json.loads(OFFSETS_PATH.read_text())
-    data[inbox] = int(value)
+    # Read-modify-write under the lock: inboxes are processed concurrently
     lock_path = str(LOCK_DIR / "offsets.lock")
     with file_lock(lock_path):
-        OFFSETS_PATH.write_text(json.dumps(data, indent=2))
\ No newline at end of file
+        data = _read_json(OFFSETS_PATH)
+        data[inbox] = int(value)
+        _write_json(OFFSETS_PATH, data)
+
+# --- Gmail historyId watermark (incremental sync via users.history.list) ---
+
+def get_history_id(inbox: str) -> Optional[str]:
+    data = _read_json(HISTORY_PATH)
+    hid = data.get(inbox)
+    return str(hid) if hid else None
+
+def set_history_id(inbox: str, history_id: Optional[str]) -> None:
+    lock_path = str(LOCK_DIR / "history.lock")
+    with file_lock(lock_path):
+        data = _read_json(HISTORY_PATH)
+        if history_id:
+            data[inbox] = str(history_id)
+        else:
+            data.pop(inbox, None)
+        _write_json(HISTORY_PATH, data)
+
+# --- Per-thread message counts (threads strategy, see Steps/poll_threads.py) ---
+
+def get_thread_snapshot(inbox: str) -> Dict[str, int]:
+    data = _read_json(THREADS_PATH)
+    return {str(k): int(v) for k, v in (data.get(inbox) or {}).items()}
+
+def set_thread_snapshot(inbox: str, snapshot: Dict[str, int]) -> None:
+    # Replaces the inbox's snapshot, so threads that left the active set are dropped
+    lock_path = str(LOCK_DIR / "threads.lock")
+    with file_lock(lock_path):
+        data = _read_json(THREADS_PATH)
+        data[inbox] = {k: int(v) for k, v in snapshot.items()}
+        _write_json(THREADS_PATH, data)
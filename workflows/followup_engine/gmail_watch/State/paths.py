@@ -7,6 +7,8 @@ DATA_DIR = REPO_ROOT / "workflows" / "followup_engine" / "gmail_watch" / "data"
 DATA_DIR.mkdir(parents=True, exist_ok=True)
 
 OFFSETS_PATH = DATA_DIR / "gmail_offsets.json"
+HISTORY_PATH = DATA_DIR / "gmail_history_ids.json"  # last synced Gmail historyId per inbox
+THREADS_PATH = DATA_DIR / "gmail_thread_snapshots.json"  # threadId -> message count per inbox (threads strategy)
 LOCK_DIR = DATA_DIR / ".locks"
 LOCK_DIR.mkdir(exist_ok=True)
 
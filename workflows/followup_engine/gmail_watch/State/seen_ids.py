@@ -0,0 +1,154 @@
+from __future__ import annotations
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+from .paths import DATA_DIR
+
+# Persistent per-inbox set of Gmail message IDs the watcher has already handled.
+# The runner consults it right after polling, before any metadata fetch, so a message
+# seen on a previous tick (or before a restart) is never downloaded again. Each entry
+# records the classification outcome and expires after SEEN_TTL_DAYS (longer than both
+# the day-granularity scan window and Gmail's ~7 day history retention).
+#
+# Messages that failed to process are stored with an "error:<attempts>" outcome. They do not
+# count as seen (the next tick retries them) until MAX_MSG_ATTEMPTS is reached, after which
+# they are recorded as "skip:error" so one bad message cannot hold the watermarks forever.
+
+SEEN_DB_PATH = DATA_DIR / "seen_message_ids.sqlite3"
+SEEN_TTL_DAYS = float(os.getenv("GMAIL_WATCH_SEEN_TTL_DAYS", "10"))
+MAX_MSG_ATTEMPTS = int(os.getenv("GMAIL_WATCH_MAX_MSG_ATTEMPTS", "5"))
+ERROR_PREFIX = "error:"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS seen (
+    inbox   TEXT NOT NULL,
+    msg_id  TEXT NOT NULL,
+    outcome TEXT NOT NULL DEFAULT '',
+    seen_at REAL NOT NULL,
+    PRIMARY KEY (inbox, msg_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ix_seen_at ON seen(seen_at);
+"""
+
+_CHUNK = 500  # stay well under SQLite's bound-parameter limit
+
+
+class SeenIds:
+    def __init__(self, path=SEEN_DB_PATH, ttl_days: float = SEEN_TTL_DAYS) -> None:
+        self.ttl_sec = ttl_days * 86400
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self.prune()
+
+    def _cutoff(self) -> float:
+        return time.time() - self.ttl_sec
+
+    def filter_unseen(self, inbox: str, msg_ids: Iterable[str]) -> List[str]:
+        """Return the IDs (order preserved) that have not been handled for this inbox."""
+        ids = list(dict.fromkeys(msg_ids))
+        if not ids:
+            return []
+        key = inbox.strip().lower()
+        seen = set()
+        with self._lock:
+            for start in range(0, len(ids), _CHUNK):
+                chunk = ids[start:start + _CHUNK]
+                rows = self._conn.execute(
+                    f"SELECT msg_id FROM seen WHERE inbox=? AND seen_at>=? AND outcome NOT LIKE ? "
+                    f"AND msg_id IN ({','.join('?' * len(chunk))})",
+                    (key, self._cutoff(), ERROR_PREFIX + "%", *chunk),
+                ).fetchall()
+                seen.update(r[0] for r in rows)
+        return [i for i in ids if i not in seen]
+
+    def outcome(self, inbox: str, msg_id: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT outcome FROM seen WHERE inbox=? AND msg_id=? AND seen_at>=?",
+                (inbox.strip().lower(), msg_id, self._cutoff()),
+            ).fetchone()
+        return row[0] if row else None
+
+    def record(self, inbox: str, outcomes: Dict[str, str]) -> None:
+        """Mark IDs handled with their outcome (one transaction)."""
+        if not outcomes:
+            return
+        key = inbox.strip().lower()
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO seen(inbox, msg_id, outcome, seen_at) VALUES(?, ?, ?, ?)",
+                    [(key, mid, outcome or "", now) for mid, outcome in outcomes.items()],
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def record_failures(self, inbox: str, msg_ids: Iterable[str], max_attempts: int = MAX_MSG_ATTEMPTS) -> List[str]:
+        """Count a failed attempt for each ID (one transaction).
+
+        Returns the IDs that have now failed `max_attempts` times; those are recorded as
+        "skip:error" and count as seen from then on.
+        """
+        ids = list(dict.fromkeys(msg_ids))
+        if not ids:
+            return []
+        key = inbox.strip().lower()
+        now = time.time()
+        given_up: List[str] = []
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = []
+                for mid in ids:
+                    row = self._conn.execute(
+                        "SELECT outcome FROM seen WHERE inbox=? AND msg_id=? AND seen_at>=?",
+                        (key, mid, self._cutoff()),
+                    ).fetchone()
+                    prev = row[0] if row else ""
+                    attempts = 1
+                    if prev.startswith(ERROR_PREFIX):
+                        try:
+                            attempts = int(prev[len(ERROR_PREFIX):]) + 1
+                        except ValueError:
+                            pass
+                    if attempts >= max_attempts:
+                        given_up.append(mid)
+                        rows.append((key, mid, "skip:error", now))
+                    else:
+                        rows.append((key, mid, f"{ERROR_PREFIX}{attempts}", now))
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO seen(inbox, msg_id, outcome, seen_at) VALUES(?, ?, ?, ?)", rows
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return given_up
+
+    def prune(self) -> int:
+        """Drop expired entries; returns how many were removed."""
+        with self._lock:
+            cur = self._conn.execute("DELETE FROM seen WHERE seen_at<?", (self._cutoff(),))
+        return cur.rowcount or 0
+
+
+_store: Optional[SeenIds] = None
+_store_lock = threading.Lock()
+
+
+def get_seen_ids() -> SeenIds:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SeenIds()
+        return _store
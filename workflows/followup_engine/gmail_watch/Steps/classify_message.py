@@ -1,14 +1,15 @@
 from __future__ import annotations
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
 import email.utils
 import datetime
 import time
 from googleapiclient.errors import HttpError
 
-from ..Logic.filters import is_auto_reply
+from ..Adapters import quota
+from ..Logic.filters import is_auto_reply, is_delivery_report
 from ..Logic.mapping import extract_email
 
-META_HEADERS = ["From", "To", "Subject", "Date", "In-Reply-To", "References"]
+META_HEADERS = ["From", "To", "Subject", "Date", "In-Reply-To", "References", "Content-Type", "X-Failed-Recipients"]
 
 
 def _headers_to_dict(msg: Dict) -> Dict[str, str]:
@@ -50,6 +51,11 @@ def classify(svc, msg_id: str, inbox: str) -> Optional[dict]:
             time.sleep(sleep_s)
             retries += 1
 
+    return _normalize(msg, msg_id)
+
+
+def _normalize(msg: Dict, msg_id: str) -> Optional[dict]:
+    """Turn a metadata-format Gmail message into the runner's normalized dict (None = skip)."""
     headers = msg.get("payload", {}).get("headers", [])
     print(f"[classify_message] Processing {msg_id}, headers={headers}")
 
@@ -72,6 +78,7 @@ def classify(svc, msg_id: str, inbox: str) -> Optional[dict]:
     # Threading signals
     thread_id = msg.get("threadId", "") or ""
     in_reply_to = hdrs.get("In-Reply-To", "") or ""
+    references = hdrs.get("References", "") or ""
 
     parsed = {
         "from_email": from_email,
@@ -81,6 +88,86 @@ def classify(svc, msg_id: str, inbox: str) -> Optional[dict]:
         "internal_ms": internal_ms,
         "thread_id": thread_id,
         "in_reply_to": in_reply_to,
+        "references": references,
+        # Bounce/DSN (can thread like a reply; the runner never counts it as one)
+        "is_dsn": is_delivery_report(from_email, hdrs),
     }
     print(f"[classify_message] Parsed: {parsed}")
-    return parsed
\ No newline at end of file
+    return parsed
+
+
+BATCH_SIZE = 100  # Gmail batch endpoint limit
+_RETRY_SLEEPS = [0.5, 1.0, 2.0]
+
+
+def _is_retryable(exc: Exception) -> bool:
+    status = getattr(getattr(exc, "resp", None), "status", None)
+    if status is None:
+        return True  # transport-level failure
+    return status == 429 or status >= 500
+
+
+def classify_batch(svc, msg_ids: List[str], inbox: str, batch_size: int = BATCH_SIZE) -> Tuple[Dict[str, Optional[dict]], Dict[str, Exception]]:
+    """Fetch and classify many messages with Gmail batch requests (up to 100 per HTTP call).
+
+    Returns (classified, failed):
+      classified: msg_id -> normalized dict, or None to skip (same contract as classify())
+      failed:     msg_id -> last exception, for sub-requests that still failed after retries
+    Only failed sub-requests are retried; messages deleted meanwhile (404) are skipped.
+    """
+    classified: Dict[str, Optional[dict]] = {}
+    failed: Dict[str, Exception] = {}
+    pending = list(dict.fromkeys(msg_ids))
+    round_trips = 0
+
+    for attempt in range(len(_RETRY_SLEEPS) + 1):
+        if not pending:
+            break
+        if attempt:
+            sleep_s = _RETRY_SLEEPS[attempt - 1]
+            print(f"[classify_message] retrying {len(pending)} failed sub-request(s) in {sleep_s}s")
+            time.sleep(sleep_s)
+
+        retry: List[str] = []
+        for start in range(0, len(pending), batch_size):
+            chunk = pending[start:start + batch_size]
+            answered: set = set()
+
+            def _cb(request_id, response, exception):
+                answered.add(request_id)
+                if exception is None:
+                    failed.pop(request_id, None)
+                    classified[request_id] = _normalize(response, request_id)
+                elif getattr(getattr(exception, "resp", None), "status", None) == 404:
+                    failed.pop(request_id, None)
+                    classified[request_id] = None
+                    print(f"[classify_message] {request_id} no longer exists; skipping")
+                else:
+                    failed[request_id] = exception
+                    quota.note_error(exception)
+                    if _is_retryable(exception):
+                        retry.append(request_id)
+
+            batch = svc.new_batch_http_request(callback=_cb)
+            for mid in chunk:
+                batch.add(
+                    svc.users().messages().get(userId="me", id=mid, format="metadata", metadataHeaders=META_HEADERS),
+                    request_id=mid,
+                )
+            round_trips += 1
+            quota.charge("messages.get", len(chunk))
+            try:
+                batch.execute()
+            except (HttpError, ConnectionResetError, TimeoutError) as e:
+                quota.note_error(e)
+                # Whole batch failed in transport: retry every ID in it that got no response
+                print(f"[classify_message] batch request failed: {e}")
+                for mid in chunk:
+                    if mid not in answered:
+                        failed[mid] = e
+                        if mid not in retry:
+                            retry.append(mid)
+        pending = retry
+
+    print(f"[classify_message] classify_batch: {len(classified)} fetched, {len(failed)} failed, {round_trips} HTTP round trip(s) for {len(msg_ids)} id(s)")
+    return classified, failed
@@ -1,7 +1,10 @@
 from __future__ import annotations
-import csv
 import os
-import tempfile
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from workflows.universal_outreach_utils.crm_store import CRMStore
 
 print("Starting mark_responded script...")
 
@@ -22,15 +25,148 @@ except Exception:  # pragma: no cover
 CRM_CSV_PATH = \
     "/Users/kevinnovanta/backend_for_ai_agency/data/leads/CRM_Leads/CRM_leads_copy.csv"
 
+def _store() -> CRMStore:
+    return CRMStore.for_csv(CRM_CSV_PATH)
+
+def flush_crm() -> bool:
+    """Export pending CRM updates to the CSV (called once per watcher tick)."""
+    try:
+        return _store().flush()
+    except Exception as e:
+        print(f"Error exporting CRM CSV: {e}")
+        return False
+
+def _utc_now_iso() -> str:
+    from datetime import datetime, timezone
+    return datetime.now(timezone.utc).replace(microsecond=0).isoformat().replace("+00:00", "Z")
+
+
+def _reply_fields(date_iso: str, thread_id: str | None) -> Dict[str, str]:
+    fields = {
+        "Responded?": "Yes",
+        "Last Inbound Timestamp": date_iso,
+        "Replied Timestamp": date_iso,
+        "Stop Reason": "REPLIED",
+    }
+    if thread_id:
+        fields["Email Thread Link"] = thread_id
+    return fields
+
+
+def _notify_replied(emails: List[str]) -> None:
+    """Set StateStore to REPLIED for each lead (best-effort, never fails the CRM write)."""
+    if not emails:
+        return
+    if StateStore is None:
+        print("StateStore not available; skipping status update.")
+        return
+    try:
+        set_many = getattr(StateStore, "set_status_many", None)
+        if set_many is not None:
+            set_many({e: "REPLIED" for e in emails})
+            return
+        for e in emails:
+            StateStore.set_status(e, "REPLIED")
+    except Exception as e:
+        print(f"Error setting StateStore status: {e}")
+
+
+class ReplyBatch:
+    """Accumulate reply updates for a watcher tick and apply them in one CRM write.
+
+    add() only records the update (the newest reply wins when a lead replied more than
+    once). commit() applies everything with one CRMStore.patch_many, sends the StateStore
+    notifications for the leads that were found, and exports the CSV once. Callbacks
+    registered with defer() run after a successful commit (e.g. advancing watermarks),
+    so a failed commit leaves those messages to be retried. commit() can be called
+    again for updates added after a previous commit.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Dict[str, str]] = {}
+        self._deferred: List[Callable[[Dict[str, bool]], None]] = []
+        self.results: Dict[str, bool] = {}
+        self.commits = 0
+        self.commit_ms = 0.0
+
+    def add(self, lead_email: str, subject: str, date_iso: str, thread_id: str | None = None) -> Optional[str]:
+        """Queue Responded?=Yes for `lead_email`. Returns the normalized key (None if empty)."""
+        key = (lead_email or "").strip().lower()
+        if not key:
+            print("Empty lead_email provided to ReplyBatch.add")
+            return None
+        date_iso = date_iso or _utc_now_iso()
+        fields = _reply_fields(date_iso, thread_id)
+        with self._lock:
+            prev = self._pending.get(key)
+            if prev is None or prev["Last Inbound Timestamp"] <= date_iso:
+                self._pending[key] = fields
+        return key
+
+    def defer(self, fn: Callable[[Dict[str, bool]], None]) -> None:
+        """Run fn(results) after the next successful commit.
+
+        `results` is {email: found} across every commit of this batch so far, so a caller
+        whose updates went out in an earlier commit still sees them.
+        """
+        with self._lock:
+            self._deferred.append(fn)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def commit(self) -> Dict[str, bool]:
+        """Apply all pending updates in one write; returns {email: found} for this commit."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            deferred, self._deferred = self._deferred, []
+        started = time.monotonic()
+        results: Dict[str, bool] = {}
+        if pending:
+            if not os.path.exists(CRM_CSV_PATH):
+                print(f"CRM CSV file not found at {CRM_CSV_PATH}")
+                results = {k: False for k in pending}
+            else:
+                try:
+                    store = _store()
+                    results = store.patch_many(pending)
+                    if any(results.values()):
+                        store.flush()
+                except Exception:
+                    with self._lock:
+                        # Keep newer updates added meanwhile; put the rest back for a retry
+                        for k, v in pending.items():
+                            self._pending.setdefault(k, v)
+                        self._deferred[:0] = deferred
+                    raise
+            _notify_replied([k for k, ok in results.items() if ok])
+        elapsed = (time.monotonic() - started) * 1000.0
+        with self._lock:
+            self.results.update(results)
+            self.commits += 1
+            self.commit_ms += elapsed
+            seen = dict(self.results)
+        if pending:
+            print(f"[mark_responded] Committed {sum(results.values())}/{len(pending)} reply update(s) in {elapsed:.1f}ms")
+        for fn in deferred:
+            try:
+                fn(seen)
+            except Exception as e:
+                print(f"[mark_responded] deferred callback failed: {e}")
+        return results
+
+
 def mark_yes(lead_email: str, subject: str, date_iso: str, thread_id: str | None = None) -> bool:
-    """Update CSV (Responded?=Yes, Last Inbound Timestamp, Stop Reason, Email Thread Link) and set StateStore to REPLIED.
+    """Update the CRM row (Responded?=Yes, Last Inbound Timestamp, Stop Reason, Email Thread Link) and set StateStore to REPLIED.
+    Point update in the CRM store; the CSV is exported by flush_crm() / the store's autoflush.
     Returns True if the row was found and updated; False otherwise.
     """
     print(f"mark_yes called with lead_email={lead_email}, subject={subject}, date_iso={date_iso}, thread_id={thread_id}")
 
-    from datetime import datetime, timezone
     if not date_iso:
-        date_iso = datetime.now(timezone.utc).replace(microsecond=0).isoformat().replace("+00:00", "Z")
+        date_iso = _utc_now_iso()
         print(f"No date_iso provided; using current UTC {date_iso}")
 
     if not os.path.exists(CRM_CSV_PATH):
@@ -44,91 +180,26 @@ def mark_yes(lead_email: str, subject: str, date_iso: str, thread_id: str | None
         return False
     print(f"Processing lead: {target}")
 
-    updated = False
-    rows = []
+    fields = _reply_fields(date_iso, thread_id)
 
     try:
-        print("Opening CRM CSV file for reading...")
-        with open(CRM_CSV_PATH, mode='r', newline='', encoding='utf-8') as csvfile:
-            reader = csv.DictReader(csvfile)
-            fieldnames = list(reader.fieldnames or [])
-            if not fieldnames:
-                print("CSV file has no headers.")
-                return False
-            print(f"CSV headers found: {fieldnames}")
-
-            # Determine email column (case-insensitive)
-            lower_map = {fn.lower(): fn for fn in fieldnames}
-            email_key = lower_map.get("email") or lower_map.get("email address") or lower_map.get("e-mail")
-            if not email_key:
-                print("Could not find an email column in CRM CSV.")
-                return False
-            print(f"Email column identified as: {email_key}")
-
-            # Ensure required columns exist in header
-            for needed in ["Responded?", "Last Inbound Timestamp", "Replied Timestamp", "Stop Reason", "Email Thread Link"]:
-                if needed not in fieldnames:
-                    print(f"Adding missing column to headers: {needed}")
-                    fieldnames.append(needed)
-
-            for row in reader:
-                cur_email = (row.get(email_key) or "").strip().lower()
-                if cur_email == target:
-                    print(f"Found matching lead row for {target}, updating fields...")
-                    row["Responded?"] = "Yes"
-                    row["Last Inbound Timestamp"] = date_iso
-                    row["Replied Timestamp"] = date_iso
-                    row["Stop Reason"] = "REPLIED"
-                    if thread_id:
-                        if row.get("Email Thread Link") != thread_id:
-                            row["Email Thread Link"] = thread_id
-                    updated = True
-                rows.append(row)
+        print("Updating lead row in CRM store...")
+        updated = _store().patch(target, fields)
     except Exception as e:
-        print(f"Error reading CSV file: {e}")
+        print(f"Error updating CRM store: {e}")
         return False
 
     if not updated:
         print(f"Lead email {lead_email} not found in CRM CSV.")
         return False
 
-    try:
-        print("Saving updated lead state to CSV file (atomic write)...")
-        dir_name = os.path.dirname(CRM_CSV_PATH)
-        os.makedirs(dir_name, exist_ok=True)
-        fd, tmp_path = tempfile.mkstemp(prefix="crm_", suffix=".csv", dir=dir_name)
-        try:
-            with os.fdopen(fd, mode="w", newline="", encoding="utf-8") as csvfile:
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                writer.writeheader()
-                writer.writerows(rows)
-            os.replace(tmp_path, CRM_CSV_PATH)
-        finally:
-            try:
-                if os.path.exists(tmp_path):
-                    os.remove(tmp_path)
-            except Exception:
-                pass
-    except Exception as e:
-        print(f"Error writing CSV file: {e}")
-        return False
-
-    try:
-        print("Initializing StateStore...")
-        if StateStore is not None:
-            print(f"Setting StateStore status for {lead_email} to REPLIED...")
-            StateStore.set_status(lead_email, "REPLIED")
-        else:
-            print("StateStore not available; skipping status update.")
-    except Exception as e:
-        print(f"Error setting StateStore status: {e}")
-        # Do not fail the write if StateStore update fails
+    _notify_replied([lead_email])
 
     print("mark_responded script completed successfully.")
     return True
 
 def mark_no(lead_email: str, date_iso: str | None = None) -> bool:
-    """Update CSV (Responded?=No) and set StateStore to NO (non-blocking).
+    """Update the CRM row (Responded?=No) and set StateStore to NO (non-blocking).
     Returns True if the row was found and updated; False otherwise.
     """
     print(f"mark_no called with lead_email={lead_email}, date_iso={date_iso}")
@@ -144,73 +215,25 @@ def mark_no(lead_email: str, date_iso: str | None = None) -> bool:
         return False
     print(f"Processing lead for NO: {target}")
 
-    updated = False
-    rows = []
-
-    try:
-        print("Opening CRM CSV file for reading (mark_no)...")
-        with open(CRM_CSV_PATH, mode='r', newline='', encoding='utf-8') as csvfile:
-            reader = csv.DictReader(csvfile)
-            fieldnames = list(reader.fieldnames or [])
-            if not fieldnames:
-                print("CSV file has no headers.")
-                return False
-            print(f"CSV headers found (mark_no): {fieldnames}")
-
-            # Determine email column (case-insensitive)
-            lower_map = {fn.lower(): fn for fn in fieldnames}
-            email_key = lower_map.get("email") or lower_map.get("email address") or lower_map.get("e-mail")
-            if not email_key:
-                print("Could not find an email column in CRM CSV.")
-                return False
-            print(f"Email column identified as (mark_no): {email_key}")
-
-            # Ensure required columns exist in header (at least Responded?)
-            for needed in ["Responded?", "Last Inbound Timestamp", "Replied Timestamp", "Stop Reason"]:
-                if needed not in fieldnames:
-                    print(f"Adding missing column to headers (mark_no): {needed}")
-                    fieldnames.append(needed)
-
-            for row in reader:
-                cur_email = (row.get(email_key) or "").strip().lower()
-                if cur_email == target:
-                    print(f"Found matching lead row for {target}, setting Responded?=No...")
-                    row["Responded?"] = "No"
-                    # For NO we usually leave timestamp/stop reason blank to keep sequence eligible
-                    row["Last Inbound Timestamp"] = date_iso or row.get("Last Inbound Timestamp", "")
-                    # Keep Stop Reason empty so it doesn't block sequences
-                    if row.get("Stop Reason") == "REPLIED":
-                        print("Clearing Stop Reason since status is NO")
-                        row["Stop Reason"] = ""
-                    updated = True
-                rows.append(row)
-    except Exception as e:
-        print(f"Error reading CSV file (mark_no): {e}")
-        return False
-
-    if not updated:
-        print(f"Lead email {lead_email} not found in CRM CSV (mark_no).")
-        return False
-
     try:
-        print("Saving updated lead state to CSV file (mark_no, atomic write)...")
-        dir_name = os.path.dirname(CRM_CSV_PATH)
-        os.makedirs(dir_name, exist_ok=True)
-        fd, tmp_path = tempfile.mkstemp(prefix="crm_", suffix=".csv", dir=dir_name)
-        try:
-            with os.fdopen(fd, mode="w", newline="", encoding="utf-8") as csvfile:
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                writer.writeheader()
-                writer.writerows(rows)
-            os.replace(tmp_path, CRM_CSV_PATH)
-        finally:
-            try:
-                if os.path.exists(tmp_path):
-                    os.remove(tmp_path)
-            except Exception:
-                pass
+        store = _store()
+        row = store.get(target)
+        if row is None:
+            print(f"Lead email {lead_email} not found in CRM CSV (mark_no).")
+            return False
+        print(f"Found matching lead row for {target}, setting Responded?=No...")
+        # For NO we usually leave timestamp/stop reason blank to keep sequence eligible
+        fields = {
+            "Responded?": "No",
+            "Last Inbound Timestamp": date_iso or row.get("Last Inbound Timestamp", ""),
+        }
+        # Keep Stop Reason empty so it doesn't block sequences
+        if row.get("Stop Reason") == "REPLIED":
+            print("Clearing Stop Reason since status is NO")
+            fields["Stop Reason"] = ""
+        store.patch(target, fields)
     except Exception as e:
-        print(f"Error writing CSV file (mark_no): {e}")
+        print(f"Error updating CRM store (mark_no): {e}")
         return False
 
     try:
@@ -225,4 +248,4 @@ def mark_no(lead_email: str, date_iso: str | None = None) -> bool:
         # Do not fail the write if StateStore update fails
 
     print("mark_no completed successfully.")
-    return True
\ No newline at end of file
+    return True
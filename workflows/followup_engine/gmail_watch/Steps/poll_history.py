@@ -0,0 +1,96 @@
+from __future__ import annotations
+from typing import Any, List, Optional, Tuple
+import time
+from googleapiclient.errors import HttpError
+
+from ..Adapters import quota
+
+# Incremental inbox sync via the Gmail History API.
+# Instead of re-listing a whole day of inbox mail every tick, fetch only the
+# messagesAdded deltas since the last stored historyId. Gmail keeps history for
+# roughly a week; an expired/invalid startHistoryId returns 404, in which case the
+# caller falls back to a bounded full scan (poll_inbox.poll_ids) and re-seeds.
+
+# Labels that mean "not an inbound candidate"
+_SKIP_LABELS = {"SENT", "DRAFT", "SPAM", "TRASH"}
+
+
+class HistoryExpired(Exception):
+    """startHistoryId is too old (or otherwise invalid); a full resync is required."""
+
+
+def _execute(req, what: str):
+    retries = 0
+    while True:
+        try:
+            quota.charge(what)
+            return req.execute()
+        except HttpError as e:
+            quota.note_error(e)
+            status = getattr(getattr(e, "resp", None), "status", None)
+            if status == 404:
+                raise HistoryExpired(str(e))
+            if retries >= 3 or (status and status < 500 and status != 429):
+                raise
+            sleep_s = [0.5, 1.0, 2.0][retries]
+            print(f"[poll_history] transient error on {what}, retrying in {sleep_s}s: {e}")
+            time.sleep(sleep_s)
+            retries += 1
+        except (ConnectionResetError, TimeoutError) as e:
+            if retries >= 3:
+                raise
+            sleep_s = [0.5, 1.0, 2.0][retries]
+            print(f"[poll_history] transient error on {what}, retrying in {sleep_s}s: {e}")
+            time.sleep(sleep_s)
+            retries += 1
+
+
+def current_history_id(gc: Any) -> Optional[str]:
+    """The mailbox's latest historyId (users.getProfile), used to seed/re-seed the watermark."""
+    profile = _execute(gc.users().getProfile(userId="me"), "getProfile")
+    hid = profile.get("historyId")
+    return str(hid) if hid else None
+
+
+def poll_history_ids(gc: Any, inbox: str, start_history_id: str) -> Tuple[List[str], str]:
+    """Return (new inbound message IDs, latest historyId) since `start_history_id`.
+
+    Only messagesAdded records carrying the INBOX label are returned (sent/draft/spam
+    excluded). Raises HistoryExpired when Gmail no longer has history that far back.
+    """
+    ids: List[str] = []
+    seen = set()
+    latest = str(start_history_id)
+    page_token = None
+    pages = 0
+
+    while True:
+        res = _execute(
+            gc.users().history().list(
+                userId="me",
+                startHistoryId=start_history_id,
+                historyTypes=["messageAdded"],
+                labelId="INBOX",
+                maxResults=500,
+                pageToken=page_token,
+            ),
+            "history.list",
+        )
+        pages += 1
+        for record in res.get("history", []) or []:
+            for added in record.get("messagesAdded", []) or []:
+                m = added.get("message") or {}
+                mid = m.get("id")
+                labels = set(m.get("labelIds") or [])
+                if not mid or mid in seen or (labels & _SKIP_LABELS):
+                    continue
+                seen.add(mid)
+                ids.append(mid)
+        if res.get("historyId"):
+            latest = str(res["historyId"])
+        page_token = res.get("nextPageToken")
+        if not page_token:
+            break
+
+    print(f"[poll_history] {inbox}: {len(ids)} new message(s) since historyId={start_history_id} ({pages} page(s)); now at {latest}")
+    return ids, latest
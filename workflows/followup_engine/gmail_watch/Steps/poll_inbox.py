@@ -1,24 +1,27 @@
 from __future__ import annotations
-from typing import List, Any
+from typing import List, Any, Optional
 import time
 from googleapiclient.errors import HttpError
 
+from ..Adapters import quota
+from ..Logic.query import compile_query
 
-def _build_query(inbox: str, lookback_minutes: int) -> str:
-    # Gmail search only supports day granularity for newer_than, so use at least 1 day.
-    days = max(1, (lookback_minutes // (24 * 60)) or 1)
-    # Only inbox, exclude self-sent from that inbox
-    return f"in:inbox newer_than:{days}d -from:{inbox}"
 
+def _build_query(inbox: str, lookback_minutes: int, since_ms: Optional[int] = None) -> str:
+    # Inbox only, after the since_ms watermark, minus self-sent / bulk / automated tabs
+    return compile_query(inbox, since_ms, lookback_minutes)
 
-def poll_ids(gc: Any, inbox: str, since_epoch_ms: int, lookback_minutes: int = 1440) -> List[str]:
+
+def poll_ids(gc: Any, inbox: str, since_epoch_ms: int, lookback_minutes: int = 1440, max_ids: Optional[int] = None) -> List[str]:
     """Return message IDs for candidate inbound messages for this inbox.
 
-    We use a broad Gmail query and leave precise time filtering (since_ms) to the runner
-    after classification (using message.internalDate).
+    The Gmail query already bounds the window with `after:` (from since_epoch_ms) and
+    drops self-sent, bulk/no-reply and promotions-style mail server-side; the runner
+    still re-checks message.internalDate after classification. `max_ids` bounds the
+    scan (newest first) when used as the history-sync fallback.
     """
     user_id = "me"
-    q = _build_query(inbox, lookback_minutes)
+    q = _build_query(inbox, lookback_minutes, since_epoch_ms)
     print(f"[poll_inbox] Query={q}")
 
     ids: List[str] = []
@@ -39,9 +42,11 @@ def poll_ids(gc: Any, inbox: str, since_epoch_ms: int, lookback_minutes: int = 1
         retries = 0
         while True:
             try:
+                quota.charge("messages.list")
                 res = req.execute()
                 break
             except (HttpError, ConnectionResetError, TimeoutError) as e:
+                quota.note_error(e)
                 if retries >= 3:
                     raise
                 sleep_s = [0.5, 1.0, 2.0][retries]
@@ -52,6 +57,10 @@ def poll_ids(gc: Any, inbox: str, since_epoch_ms: int, lookback_minutes: int = 1
         print(f"[poll_inbox] Found {len(msgs)} messages")
         for m in msgs:
             ids.append(m["id"])
+        if max_ids is not None and len(ids) >= max_ids:
+            print(f"[poll_inbox] Reached scan bound of {max_ids} message(s)")
+            ids = ids[:max_ids]
+            break
         page_token = res.get("nextPageToken")
         if not page_token:
             break
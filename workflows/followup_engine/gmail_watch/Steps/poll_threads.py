@@ -0,0 +1,129 @@
+from __future__ import annotations
+from typing import Any, Dict, List, Optional, Tuple
+import time
+from googleapiclient.errors import HttpError
+
+from ..Adapters import quota
+from .classify_message import BATCH_SIZE, _RETRY_SLEEPS, _is_retryable
+
+# "threads" watcher strategy: instead of listing the inbox, look only at the threads of
+# leads currently in sequence (CRM stage set, not responded; see CRMIndex.active_threads).
+# Each thread is fetched with threads.get (minimal format, only id/internalDate/labels of
+# its messages) in Gmail batch requests, and its message count is compared with the
+# snapshot stored on the previous tick. Messages past the old count are the candidates.
+# Cost scales with the number of active sequences, not with inbox volume.
+
+THREAD_FIELDS = "id,messages(id,internalDate,labelIds)"
+_SKIP_LABELS = {"SENT", "DRAFT", "SPAM", "TRASH"}
+
+
+def fetch_threads(gc: Any, thread_ids: List[str], batch_size: int = BATCH_SIZE) -> Tuple[Dict[str, Optional[dict]], Dict[str, Exception]]:
+    """Batch threads.get for `thread_ids`.
+
+    Returns (threads, failed): threads maps thread_id -> response, or None when the thread
+    no longer exists (404); failed maps thread_id -> last exception after retries.
+    """
+    threads: Dict[str, Optional[dict]] = {}
+    failed: Dict[str, Exception] = {}
+    pending = list(dict.fromkeys(thread_ids))
+
+    for attempt in range(len(_RETRY_SLEEPS) + 1):
+        if not pending:
+            break
+        if attempt:
+            sleep_s = _RETRY_SLEEPS[attempt - 1]
+            print(f"[poll_threads] retrying {len(pending)} failed thread fetch(es) in {sleep_s}s")
+            time.sleep(sleep_s)
+
+        retry: List[str] = []
+        for start in range(0, len(pending), batch_size):
+            chunk = pending[start:start + batch_size]
+
+            def _cb(request_id, response, exception):
+                if exception is None:
+                    failed.pop(request_id, None)
+                    threads[request_id] = response
+                elif getattr(getattr(exception, "resp", None), "status", None) == 404:
+                    failed.pop(request_id, None)
+                    threads[request_id] = None
+                else:
+                    failed[request_id] = exception
+                    quota.note_error(exception)
+                    if _is_retryable(exception):
+                        retry.append(request_id)
+
+            batch = gc.new_batch_http_request(callback=_cb)
+            for tid in chunk:
+                batch.add(
+                    gc.users().threads().get(userId="me", id=tid, format="minimal", fields=THREAD_FIELDS),
+                    request_id=tid,
+                )
+            quota.charge("threads.get", len(chunk))
+            try:
+                batch.execute()
+            except (HttpError, ConnectionResetError, TimeoutError) as e:
+                quota.note_error(e)
+                print(f"[poll_threads] batch request failed: {e}")
+                for tid in chunk:
+                    if tid not in threads:
+                        failed[tid] = e
+                        if tid not in retry:
+                            retry.append(tid)
+        pending = retry
+
+    return threads, failed
+
+
+def poll_thread_ids(
+    gc: Any,
+    inbox: str,
+    active: Dict[str, str],
+    snapshot: Dict[str, int],
+    since_ms: int,
+) -> Tuple[List[str], Dict[str, int]]:
+    """Return (candidate message IDs, new snapshot) for the active threads of `inbox`.
+
+    `active` is threadId -> lead email, `snapshot` the threadId -> message count stored
+    last tick. A thread seen for the first time contributes its messages newer than
+    `since_ms`; a known thread contributes the messages past its old count. Sent/draft
+    messages are never candidates. Threads that failed to fetch keep their old count so
+    the next tick looks at them again; deleted threads drop out of the snapshot.
+    """
+    if not active:
+        print(f"[poll_threads] No active threads for {inbox}")
+        return [], {}
+
+    threads, failed = fetch_threads(gc, list(active))
+    ids: List[str] = []
+    new_snapshot: Dict[str, int] = {}
+    grown = 0
+
+    for tid in active:
+        if tid in failed:
+            if tid in snapshot:
+                new_snapshot[tid] = snapshot[tid]
+            continue
+        thread = threads.get(tid)
+        if thread is None:
+            continue
+        messages = thread.get("messages") or []
+        count = len(messages)
+        new_snapshot[tid] = count
+
+        old = snapshot.get(tid)
+        if old is None:
+            fresh = [m for m in messages if int(m.get("internalDate") or 0) > since_ms]
+        elif count > old:
+            fresh = messages[old:]
+        else:
+            continue
+        fresh = [m for m in fresh if not _SKIP_LABELS.intersection(m.get("labelIds") or [])]
+        if fresh:
+            grown += 1
+            ids.extend(m["id"] for m in fresh)
+
+    print(
+        f"[poll_threads] {inbox}: {len(active)} active thread(s), {grown} with new inbound message(s), "
+        f"{len(ids)} candidate(s), {len(failed)} failed"
+    )
+    return ids, new_snapshot
@@ -2,6 +2,9 @@ from __future__ import annotations
 from typing import Optional, Dict, List, Tuple
 import csv
 import os
+import threading
+
+from workflows.universal_outreach_utils.crm_journal import CRMJournal
 
 # ===== CRM CSV CONFIG =====
 # Canonical path to your CRM CSV
@@ -15,9 +18,21 @@ _EMAIL_COLS = [
 # Optional: columns to pass through if present (kept small; CSV can be huge)
 _PASS_THROUGH_COLS = [
     "Email", "email", "Client Name", "Client", "Owner / Assigned To", "Owner", "Assigned To",
-    "Responded?", "Last Inbound Timestamp", "Stop Reason", "Lead Stage", "Sequence Stage"
+    "Responded?", "Last Inbound Timestamp", "Stop Reason", "Lead Stage", "Sequence Stage",
+    "Email Thread Link", "Email Thread Thread", "Thread ID"
 ]
 
+# Columns used for the thread / owner lookups of the cached index
+# ("Email Thread Link" is written by the follow-up engine / reply watcher, "Email Thread Thread"
+# by the opener send in sequence_runner; a lead that only got the opener has just the latter)
+_THREAD_COLS = ["Email Thread Link", "Email Thread Thread", "Thread ID"]
+_OWNER_COLS = ["Owner / Assigned To", "Owner", "Assigned To"]
+# A lead is "in sequence" when one of these is set and it has not responded
+_STAGE_COLS = ["Sequence Stage", "Lead Stage"]
+
+# Keep only _PASS_THROUGH_COLS in the cached index rows (saves memory on wide CRMs)
+SLIM_INDEX = os.getenv("GMAIL_WATCH_SLIM_INDEX", "0") in ("1", "true", "True")
+
 # ===== Helpers =====
 
 def _normalize_email(value: str | None) -> str:
@@ -60,56 +75,143 @@ def find_lead_row(from_email: str, inbox: str) -> Optional[Dict[str, str]]:
         print("[resolve_lead] Empty from_email provided")
         return None
 
-    rows, header = _safe_open_csv(_CSV_PATH)
-    if not rows or not header:
-        print("[resolve_lead] No rows or headers loaded from CSV")
-        return None
-
-    email_key = _find_email_key(header)
-    if not email_key:
-        print("[resolve_lead] Could not detect an email column in CSV headers")
-        return None
-
-    for r in rows:
-        lead_email = _normalize_email(r.get(email_key))
-        if lead_email and lead_email == norm_from:
-            # Build a slimmed row preserving useful fields when present
-            slim: Dict[str, str] = {}
-            for k in _PASS_THROUGH_COLS:
-                if k in r:
-                    slim[k] = r.get(k, "")
-            # Always include canonical 'Email'
-            if "Email" not in slim:
-                slim["Email"] = r.get(email_key, "")
-            print(f"[resolve_lead] Match found for {norm_from} using column '{email_key}'")
-            print(f"[resolve_lead] Match: {norm_from} -> {slim or r}")
-            return slim or r
+    r = get_crm_index().by_email.get(norm_from)
+    if r is not None:
+        # Build a slimmed row preserving useful fields when present
+        slim: Dict[str, str] = {k: r.get(k, "") for k in _PASS_THROUGH_COLS if k in r}
+        # Always include canonical 'Email'
+        if "Email" not in slim:
+            slim["Email"] = r.get("Email") or norm_from
+        print(f"[resolve_lead] Match: {norm_from} -> {slim or r}")
+        return slim or dict(r)
 
-    print(f"[resolve_lead] No match for {norm_from}")
     print(f"[resolve_lead] No match for {norm_from}")
     return None
 
 
 # (append below existing code)
 
-def _load_rows_and_header() -> tuple[list[dict[str, str]], list[str]]:
-    return _safe_open_csv(_CSV_PATH)
+def _load_rows_and_header(path: str = _CSV_PATH) -> tuple[list[dict[str, str]], list[str]]:
+    rows, header = _safe_open_csv(path)
+    if not header:
+        return rows, header
+    # Include follow-up engine updates still sitting in the write-behind journal
+    return CRMJournal.for_csv(path).apply(rows, list(header))
+
+
+def _file_sig(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+def _thread_keys(value: str | None) -> List[str]:
+    """Thread IDs stored either bare or as a Gmail link (…#inbox/<id>)."""
+    v = (value or "").strip()
+    if not v:
+        return []
+    tail = v.rstrip("/").rsplit("/", 1)[-1].rsplit("#", 1)[-1]
+    return [v] if tail == v else [v, tail]
+
+
+class CRMIndex:
+    """Immutable lookup tables over one snapshot of the CRM (CSV + pending journal).
+
+    Rows are shared by every caller holding this snapshot; treat them as read-only.
+    """
+
+    def __init__(self, rows: List[Dict[str, str]], header: List[str], signature: tuple, slim: bool) -> None:
+        self.headers = header
+        self.signature = signature
+        self.slim = slim
+        self.by_email: Dict[str, Dict[str, str]] = {}
+        self.by_thread: Dict[str, Dict[str, str]] = {}
+        self.by_owner: Dict[str, List[Dict[str, str]]] = {}
+        self._active: Dict[str, Dict[str, str]] = {}
+        email_key = self.email_key = _find_email_key(header) if header else None
+        if not email_key:
+            return
+        thread_keys = [c for c in _THREAD_COLS if c in header]
+        owner_keys = [c for c in _OWNER_COLS if c in header]
+        for r in rows:
+            e = _normalize_email(r.get(email_key))
+            if not e:
+                continue
+            if slim:
+                r = {k: r.get(k, "") for k in _PASS_THROUGH_COLS if k in r}
+                r.setdefault("Email", e)
+            self.by_email[e] = r
+            for col in thread_keys:
+                for tid in _thread_keys(r.get(col)):
+                    self.by_thread[tid] = r
+            for col in owner_keys:
+                owner = _normalize_email(r.get(col))
+                if owner:
+                    self.by_owner.setdefault(owner, []).append(r)
+                    break
+
+    def lead_for_thread(self, thread_id: str | None) -> Optional[Dict[str, str]]:
+        for tid in _thread_keys(thread_id):
+            row = self.by_thread.get(tid)
+            if row is not None:
+                return row
+        return None
+
+    def active_threads(self, owner: str) -> Dict[str, str]:
+        """threadId -> lead email for `owner`'s leads still in sequence (stage set, not responded).
+
+        Computed once per index snapshot; rows without an owner are left out because a
+        threadId is only valid in the mailbox that sent it.
+        """
+        key = _normalize_email(owner)
+        cached = self._active.get(key)
+        if cached is not None:
+            return cached
+        active: Dict[str, str] = {}
+        for r in self.by_owner.get(key, []):
+            if (r.get("Responded?") or "").strip().lower() in ("yes", "y", "true"):
+                continue
+            if not any((r.get(c) or "").strip() for c in _STAGE_COLS):
+                continue
+            for col in _THREAD_COLS:
+                tids = _thread_keys(r.get(col))
+                if tids:
+                    active[tids[-1]] = _normalize_email(r.get(self.email_key) or r.get("Email"))
+                    break
+        self._active[key] = active
+        return active
+
+    def as_dict(self) -> dict:
+        return {"by_email": self.by_email, "by_thread": self.by_thread, "by_owner": self.by_owner, "headers": self.headers}
+
+
+# Process-wide cache: one parse per change of the CSV (size, mtime) or of its journal,
+# shared by every inbox thread of a watcher cycle.
+_index_lock = threading.Lock()
+_index_cache: Dict[Tuple[str, bool], CRMIndex] = {}
+
+
+def get_crm_index(path: str | None = None, slim: bool | None = None) -> CRMIndex:
+    """Return the cached CRMIndex, rebuilding it only when the CRM changed on disk."""
+    path = path or _CSV_PATH
+    slim = SLIM_INDEX if slim is None else slim
+    with _index_lock:
+        sig = (_file_sig(path), CRMJournal.for_csv(path).signature())
+        cached = _index_cache.get((path, slim))
+        if cached is not None and cached.signature == sig:
+            return cached
+        rows, header = _load_rows_and_header(path)
+        index = CRMIndex(rows, header, sig, slim)
+        _index_cache[(path, slim)] = index
+    print(f"[resolve_lead] Indexed {len(index.by_email)} CRM leads from {len(rows)} rows{' (slim)' if slim else ''}")
+    return index
 
 
 def load_crm_index() -> dict:
-    """Load the CRM once and build fast lookup structures.
-    Returns: {"by_email": Dict[email_lower -> row], "headers": List[str]}
+    """Return the cached CRM lookup structures (parsed at most once per CRM change).
+    Returns: {"by_email": {email_lower: row}, "by_thread": {thread_id: row},
+              "by_owner": {owner_lower: [rows]}, "headers": List[str]}
     """
-    rows, header = _load_rows_and_header()
-    by_email: dict[str, dict[str, str]] = {}
-    email_key = _find_email_key(header) if header else None
-    if not email_key:
-        print(f"[resolve_lead] Loaded {len(rows)} CRM rows")
-        return {"by_email": by_email, "headers": header}
-
-    for r in rows:
-        e = _normalize_email(r.get(email_key))
-        if e:
-            by_email[e] = r
-    print(f"[resolve_lead] Loaded {len(rows)} CRM rows")
-    return {"by_email": by_email, "headers": header}
\ No newline at end of file
+    return get_crm_index().as_dict()
@@ -0,0 +1,71 @@
+from __future__ import annotations
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Optional
+
+# Single CRM writer for the watcher.
+# Inboxes are polled concurrently, but every CRM/StateStore mutation (ReplyBatch.commit, mark_no,
+# flush_crm) is funnelled through one background thread so writes are applied one at a
+# time and in submission order. Callers get a Future (submit) or block on the result (call).
+
+
+class CRMWriter:
+    def __init__(self, name: str = "gmail-watch-crm-writer") -> None:
+        self._q: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._name = name
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=self._name, daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            item = self._q.get()
+            if item is None:
+                return
+            fut, fn, args, kwargs = item
+            if not fut.set_running_or_notify_cancel():
+                continue
+            try:
+                fut.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                fut.set_exception(e)
+
+    def submit(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        """Queue a CRM write; returns a Future with its result."""
+        self._ensure_started()
+        fut: Future = Future()
+        self._q.put((fut, fn, args, kwargs))
+        return fut
+
+    def call(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run a CRM write on the writer thread and wait for its result (re-raises its error)."""
+        if threading.current_thread() is self._thread:
+            return fn(*args, **kwargs)
+        return self.submit(fn, *args, **kwargs).result()
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Drain queued writes and stop the writer thread."""
+        with self._lock:
+            thread = self._thread
+        if thread is None:
+            return
+        self._q.put(None)
+        thread.join(timeout)
+
+
+_writer: Optional[CRMWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_crm_writer() -> CRMWriter:
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = CRMWriter()
+        return _writer
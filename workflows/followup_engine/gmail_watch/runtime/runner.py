@@ -2,17 +2,20 @@ from __future__ import annotations
 import time
 import random
 import traceback
+from concurrent.futures import ThreadPoolExecutor, wait
 from typing import Sequence, Dict
 
 
 import sys
 import os
 
-# Redirect stdout and stderr to log file
+# Redirect stdout and stderr to log file (standalone runs). Hosts that import the runner
+# next to other jobs (workflows/Orchestration) set GMAIL_WATCH_LOG_REDIRECT=0 to keep their streams.
 LOG_PATH = os.path.expanduser("/Users/kevinnovanta/backend_for_ai_agency/workflows/followup_engine/gmail_watch/utils/gmail_watcher.log")
 os.makedirs(os.path.dirname(LOG_PATH), exist_ok=True)
-sys.stdout = open(LOG_PATH, "a", buffering=1, encoding="utf-8")
-sys.stderr = open(LOG_PATH, "a", buffering=1, encoding="utf-8")
+if os.getenv("GMAIL_WATCH_LOG_REDIRECT", "1") not in ("0", "false", "False"):
+    sys.stdout = open(LOG_PATH, "a", buffering=1, encoding="utf-8")
+    sys.stderr = open(LOG_PATH, "a", buffering=1, encoding="utf-8")
 
 # ---- Safe trim_log import & helper ----
 try:
@@ -65,12 +68,19 @@ def _trim_log_safely():
         print("[runner] ERROR: trim_log raised an exception; continuing")
 
 from ..Steps.poll_inbox import poll_ids
-from ..Steps.classify_message import classify
-from ..Steps.resolve_lead import find_lead_row, load_crm_index
-from ..Steps.mark_responded import mark_yes
-from ..Adapters.gmail_client import gmail_service_for_user
-from ..State.offsets import get_offset, set_offset
+from ..Steps.poll_history import HistoryExpired, current_history_id, poll_history_ids
+from ..Steps.classify_message import classify_batch
+from ..Steps.poll_threads import poll_thread_ids
+from ..Steps.resolve_lead import find_lead_row, get_crm_index, load_crm_index
+from ..Steps.mark_responded import ReplyBatch
+from ..Adapters import quota
+from ..Adapters.gmail_client import gmail_service_for_user, invalidate_service_for_user
+from ..State.offsets import get_offset, set_offset, get_history_id, set_history_id, get_thread_snapshot, set_thread_snapshot
+from ..State.seen_ids import get_seen_ids
 from ..State.paths import logger
+from .crm_writer import get_crm_writer
+from .scheduler import PollScheduler
+from workflows.universal_outreach_utils.message_index import get_message_index, record_sent
 
 # --- Config toggles and helpers ---
 # --- Config toggles and helpers ---
@@ -81,6 +91,15 @@ STRICT_OWNER = os.getenv("GMAIL_WATCH_STRICT_OWNER", "1") not in ("0","false","F
 ENFORCE_THREAD_MATCH = os.getenv("GMAIL_WATCH_ENFORCE_THREAD", "0") in ("1","true","True")
 AUDIT_LOG_PATH = os.getenv("GMAIL_WATCH_AUDIT_LOG", "/Users/kevinnovanta/backend_for_ai_agency/workflows/followup_engine/gmail_watch/Data/reply_events.log.jsonl")
 POLL_MINUTES = int(os.getenv("GMAIL_WATCH_POLL_MINUTES", "5"))
+# Incremental sync via the History API (per-inbox historyId); full scan only to seed/recover
+USE_HISTORY = os.getenv("GMAIL_WATCH_USE_HISTORY", "1") not in ("0","false","False")
+FULL_SCAN_MAX = int(os.getenv("GMAIL_WATCH_FULL_SCAN_MAX", "500"))
+# Max inboxes processed at once (each worker thread gets its own Gmail service object)
+PARALLELISM = int(os.getenv("GMAIL_WATCH_PARALLELISM", "8"))
+# "inbox" = list the inbox (history deltas / search); "threads" = only threads of leads in sequence
+STRATEGY = os.getenv("GMAIL_WATCH_STRATEGY", "inbox").strip().lower()
+# Per-inbox adaptive intervals under a quota budget (runtime/scheduler.py); 0 = fixed interval for all
+ADAPTIVE = os.getenv("GMAIL_WATCH_ADAPTIVE", "1") not in ("0","false","False")
 
 def _audit_event(payload: dict) -> None:
     try:
@@ -99,17 +118,96 @@ def _now_ms() -> int:
     return int(time.time() * 1000)
 
 
-def run_once_for_inbox(inbox: str, lookback_minutes: int = 1440) -> Dict[str, int]:
+def _match_sent(inbox: str, msg: dict):
+    """Look the message up in the sent-message index (threadId, In-Reply-To, References).
+
+    threadIds are per mailbox, so a thread hit only counts for the inbox that sent it.
+    Returns {lead_email, inbox, via} or None.
+    """
+    try:
+        index = get_message_index()
+        box = inbox.strip().lower()
+        hit = index.lead_for_thread(msg.get("thread_id"))
+        if hit and hit.get("inbox") in ("", box):
+            return dict(hit, via="thread")
+        return index.match(None, msg.get("in_reply_to"), msg.get("references"))
+    except Exception:
+        logger.error("[runner] message index lookup failed: %s", traceback.format_exc())
+        return None
+
+
+def _poll_candidate_ids(svc, inbox: str, since_ms: int, lookback_minutes: int):
+    """Return (message IDs, historyId or None, thread snapshot or None) to store after the tick.
+
+    "threads" strategy: only the threads of this inbox's leads still in sequence are
+    checked, against the stored per-thread message counts (Steps/poll_threads.py).
+    Otherwise, with a stored historyId only the messagesAdded deltas are fetched. Without
+    one (first run) or when it has expired, do a bounded full scan and seed from the
+    current mailbox historyId, read *before* the scan so mail arriving meanwhile isn't skipped.
+    """
+    if STRATEGY == "threads":
+        active = get_crm_index().active_threads(inbox)
+        ids, snapshot = poll_thread_ids(svc, inbox, active, get_thread_snapshot(inbox), since_ms)
+        return ids, None, snapshot
+
+    if not USE_HISTORY:
+        return poll_ids(svc, inbox, since_ms, lookback_minutes), None, None
+
+    start = None
+    try:
+        start = get_history_id(inbox)
+    except Exception:
+        logger.error("[runner] get_history_id failed for %s: %s", inbox, traceback.format_exc())
+
+    if start:
+        try:
+            ids, latest = poll_history_ids(svc, inbox, start)
+            return ids, latest, None
+        except HistoryExpired:
+            logger.warning("[runner] historyId %s expired for %s; falling back to bounded full scan", start, inbox)
+
+    seed = current_history_id(svc)
+    ids = poll_ids(svc, inbox, since_ms, lookback_minutes, max_ids=FULL_SCAN_MAX)
+    logger.info("[runner] full scan for %s -> %d message(s); seeding historyId=%s", inbox, len(ids), seed)
+    return ids, seed, None
+
+
+def run_once_for_inbox(inbox: str, lookback_minutes: int = 1440, batch: ReplyBatch | None = None) -> Dict[str, int]:
+    """Process one inbox for a single tick (see _process_inbox).
+
+    Adds the tick's Gmail quota usage to the counters: quota_units and rate_limited
+    (429/403 rate errors seen), which feed the poll scheduler.
+    """
+    quota.start()
+    counts: Dict[str, int] = {}
+    try:
+        counts = _process_inbox(inbox, lookback_minutes, batch)
+    finally:
+        units, limited = quota.take()
+        counts["quota_units"] = units
+        counts["rate_limited"] = limited
+    return counts
+
+
+def _process_inbox(inbox: str, lookback_minutes: int, batch: ReplyBatch | None) -> Dict[str, int]:
     """Process one inbox for a single tick.
 
+    Matched replies are queued on a ReplyBatch rather than written one by one. Without
+    `batch` the inbox commits its own batch at the end (through the single CRM writer,
+    runtime/crm_writer.py). With a shared `batch` the caller commits it once for the whole
+    cycle; this inbox's counters, audit events, seen-ids and watermarks are then settled
+    by a deferred callback after that commit (so a failed commit leaves the messages to
+    be retried on the next tick).
+
     Steps:
       1) Build Gmail service via DWD
       2) Determine since_ms watermark (fallback: last `lookback_minutes`)
       3) poll_ids -> list of message IDs
-      4) For each ID: classify -> resolve lead -> mark responded
-      5) Advance offset to the max internal_ms we observed
+      4) For each ID: classify -> resolve lead -> queue reply update
+      5) After the batch commit: advance offset to the max internal_ms we observed
     """
-    counts: Dict[str, int] = dict(checked=0, matched=0, updated=0, auto=0, skipped=0, errors=0)
+    counts: Dict[str, int] = dict(checked=0, matched=0, updated=0, auto=0, skipped=0, errors=0, seen=0, commit_ms=0)
+    active = batch if batch is not None else ReplyBatch()
 
     logger.info("[runner] >>> START inbox=%s", inbox)
 
@@ -120,6 +218,7 @@ def run_once_for_inbox(inbox: str, lookback_minutes: int = 1440) -> Dict[str, in
     except Exception:
         counts["errors"] += 1
         logger.error("[runner] Failed to build Gmail service for %s: %s", inbox, traceback.format_exc())
+        invalidate_service_for_user(inbox)
         return counts
 
     # Determine since watermark
@@ -147,30 +246,58 @@ def run_once_for_inbox(inbox: str, lookback_minutes: int = 1440) -> Dict[str, in
         lead_by_email = {}
         logger.error("[runner] Failed to load CRM index: %s", traceback.format_exc())
 
-    # Poll IDs
+    # Poll IDs (history deltas, or a bounded full scan to seed/recover)
     try:
-        ids = poll_ids(svc, inbox, since_ms, lookback_minutes)
+        ids, next_history_id, thread_snapshot = _poll_candidate_ids(svc, inbox, since_ms, lookback_minutes)
         logger.info("[runner] poll_ids -> %d message(s) for %s", len(ids), inbox)
     except Exception:
         counts["errors"] += 1
         logger.error("[runner] poll_ids failed for %s: %s", inbox, traceback.format_exc())
         return counts
 
+    # Drop IDs already handled on an earlier tick (or before a restart) before any fetch
+    try:
+        unseen = get_seen_ids().filter_unseen(inbox, ids)
+        counts["seen"] = len(ids) - len(unseen)
+        if counts["seen"]:
+            logger.info("[runner] %d already-handled message(s) skipped without fetching for %s", counts["seen"], inbox)
+        ids = unseen
+    except Exception:
+        logger.error("[runner] seen-id lookup failed for %s; processing all ids: %s", inbox, traceback.format_exc())
+
+    # Classification outcome per handled message, recorded in the seen-id store after the loop.
+    # Messages that errored only get a failed attempt counted, and the watermarks are held back
+    # (see _persist_progress) so the next tick lists them again and retries them.
+    outcomes: Dict[str, str] = {}
+    errored: set = set()
+    # msg_id -> (lead key, audit event) for replies queued on the batch
+    queued: Dict[str, tuple] = {}
+
+    # Fetch + classify every candidate via Gmail batch requests (<=100 messages per round trip)
+    try:
+        classified, failed = classify_batch(svc, ids, inbox)
+    except Exception:
+        classified, failed = {}, {}
+        errored.update(ids)
+        counts["errors"] += 1
+        logger.error("[runner] classify_batch failed for %s: %s", inbox, traceback.format_exc())
+
     for mid in ids:
         counts["checked"] += 1
         print(f"[runner] Checking msg_id={mid}")
-        try:
-            msg = classify(svc, mid, inbox)
-            print(f"[runner] Classified: {msg}")
-            logger.info("[runner] classify(%s) -> %s", mid, "OK" if msg else "None")
-        except Exception:
+        if mid in failed or mid not in classified:
             counts["errors"] += 1
-            logger.error("[runner] classify failed for %s: %s", mid, traceback.format_exc())
+            errored.add(mid)
+            logger.error("[runner] classify failed for %s: %s", mid, failed.get(mid, "no result"))
             continue
+        msg = classified[mid]
+        print(f"[runner] Classified: {msg}")
+        logger.info("[runner] classify(%s) -> %s", mid, "OK" if msg else "None")
 
         if not msg:
             counts["skipped"] += 1
             print(f"[runner] Skipping reason: classify returned None for msg_id={mid}")
+            outcomes[mid] = "skip:filtered"
             continue
 
         # Drop if message is older than our watermark (in case search backfilled)
@@ -182,6 +309,7 @@ def run_once_for_inbox(inbox: str, lookback_minutes: int = 1440) -> Dict[str, in
             logger.info("[runner] skip old message id=%s internal_ms=%s <= since_ms=%s", mid, im, since_ms)
             counts["skipped"] += 1
             print(f"[runner] Skipping reason: message internal_ms={im} <= since_ms={since_ms} for msg_id={mid}")
+            outcomes[mid] = "skip:old"
             continue
 
         # Self-sent filter and basic sanity
@@ -190,11 +318,13 @@ def run_once_for_inbox(inbox: str, lookback_minutes: int = 1440) -> Dict[str, in
             logger.info("[runner] skip: missing from_email for %s", mid)
             counts["skipped"] += 1
             print(f"[runner] Skipping reason: missing from_email for msg_id={mid}")
+            outcomes[mid] = "skip:no_from"
             continue
         if from_email == inbox.strip().lower():
             logger.info("[runner] skip self-sent: %s", mid)
             counts["skipped"] += 1
             print(f"[runner] Skipping reason: self-sent message for msg_id={mid}")
+            outcomes[mid] = "skip:self_sent"
             continue
 
         # Drop obvious bulk/no-reply domains early (defense-in-depth)
@@ -202,35 +332,59 @@ def run_once_for_inbox(inbox: str, lookback_minutes: int = 1440) -> Dict[str, in
             logger.info("[runner] skip: bulk/no-reply sender %s (id=%s)", from_email, mid)
             counts["skipped"] += 1
             print(f"[runner] Skipping reason: bulk/no-reply sender {from_email} for msg_id={mid}")
+            outcomes[mid] = "skip:bulk_sender"
             continue
 
-        # CSV-only filter: sender must exist in CRM index
-        row = lead_by_email.get(from_email)
+        # Bounces quote our Message-ID in References, so they would match the sent index below
+        if msg.get("is_dsn"):
+            logger.info("[runner] skip: delivery status notification from=%s (id=%s)", from_email, mid)
+            counts["skipped"] += 1
+            print(f"[runner] Skipping reason: bounce/DSN from {from_email} for msg_id={mid}")
+            outcomes[mid] = "skip:bounce"
+            continue
+
+        tid = (msg.get("thread_id") or "").strip()
+        hit = _match_sent(inbox, msg)
+        if hit:
+            # Reply to something we sent (threadId / In-Reply-To / References): the lead is
+            # known even when a colleague or an alias answered, so no From/owner checks.
+            # The lead must still be a CRM row.
+            via = hit["via"]
+            lead_key = hit["lead_email"]
+            row = lead_by_email.get(lead_key)
+            logger.info("[runner] matched %s to lead %s via %s", mid, lead_key, via)
+        else:
+            via = "from"
+            # CSV-only filter: sender must exist in CRM index
+            row = lead_by_email.get(from_email)
         if not row:
-            logger.info("[runner] skip: from not in CRM from=%s (id=%s)", from_email, mid)
+            lead_key = hit["lead_email"] if hit else from_email
+            logger.info("[runner] skip: lead not in CRM lead=%s from=%s (id=%s)", lead_key, from_email, mid)
             counts["skipped"] += 1
-            print(f"[runner] Skipping reason: sender {from_email} not in CRM for msg_id={mid}")
+            print(f"[runner] Skipping reason: lead {lead_key} not in CRM for msg_id={mid}")
+            outcomes[mid] = "skip:not_in_crm"
             continue
 
         # Owner/inbox match if owner is present
         owner = (row.get("Owner / Assigned To") or "").strip().lower()
-        if owner and owner != inbox.strip().lower():
+        if via == "from" and owner and owner != inbox.strip().lower():
             if STRICT_OWNER:
                 logger.info("[runner] skip: owner mismatch from=%s owner=%s inbox=%s", from_email, owner, inbox)
                 counts["skipped"] += 1
                 print(f"[runner] Skipping reason: owner mismatch owner={owner} inbox={inbox} for msg_id={mid}")
+                outcomes[mid] = "skip:owner_mismatch"
                 continue
             else:
                 logger.warning("[runner] owner mismatch (soft) from=%s owner=%s inbox=%s", from_email, owner, inbox)
 
         # Optional thread match if both provided
         stored_tid = (row.get("Email Thread Link") or "").strip()
-        tid = (msg.get("thread_id") or "").strip()
-        if stored_tid and tid and stored_tid != tid:
+        if via == "from" and stored_tid and tid and stored_tid != tid:
             if ENFORCE_THREAD_MATCH:
                 logger.info("[runner] skip: thread mismatch from=%s tid=%s stored=%s", from_email, tid, stored_tid)
                 counts["skipped"] += 1
                 print(f"[runner] Skipping reason: thread mismatch tid={tid} stored={stored_tid} for msg_id={mid}")
+                outcomes[mid] = "skip:thread_mismatch"
                 continue
             else:
                 logger.warning("[runner] thread mismatch (soft) from=%s tid=%s stored=%s", from_email, tid, stored_tid)
@@ -238,45 +392,99 @@ def run_once_for_inbox(inbox: str, lookback_minutes: int = 1440) -> Dict[str, in
         # At this point, it's a reply from a known lead (and for this inbox if owner set)
         counts["matched"] += 1
 
+        lead_email = row.get("Email", from_email)
+        print(f"[runner] Queueing lead {lead_email} YES")
         try:
-            print(f"[runner] Marking lead {row['Email']} YES")
-            ok = mark_yes(
-                row.get("Email", from_email),
-                msg.get("subject", ""),
-                msg.get("date_iso", ""),
-                msg.get("thread_id", "")
-            )
-            if ok:
-                counts["updated"] += 1
-                logger.info("[runner] mark_yes OK for %s", from_email)
-                _audit_event({
-                    "inbox": inbox,
-                    "lead_email": row.get("Email", from_email),
-                    "from_email": from_email,
-                    "subject": msg.get("subject",""),
-                    "date_iso": msg.get("date_iso",""),
-                    "thread_id": msg.get("thread_id",""),
-                    "reason": "UPDATED"
-                })
-            else:
-                logger.info("[runner] mark_yes returned False for %s", from_email)
-                _audit_event({
-                    "inbox": inbox,
-                    "lead_email": row.get("Email", from_email),
-                    "from_email": from_email,
-                    "subject": msg.get("subject",""),
-                    "date_iso": msg.get("date_iso",""),
-                    "thread_id": msg.get("thread_id",""),
-                    "reason": "NOUPDATE"
-                })
+            key = active.add(lead_email, msg.get("subject", ""), msg.get("date_iso", ""), msg.get("thread_id", ""))
         except Exception:
             counts["errors"] += 1
-            logger.error("[runner] mark_yes failed for %s: %s", from_email, traceback.format_exc())
+            errored.add(mid)
+            logger.error("[runner] could not queue reply for %s: %s", from_email, traceback.format_exc())
+            continue
+        if key is None:
+            counts["skipped"] += 1
+            outcomes[mid] = "noupdate"
+            continue
+        if via != "thread" and tid:
+            # Later messages in this thread then match on the first lookup
+            record_sent(key, inbox, thread_id=tid)
+        queued[mid] = (key, {
+            "inbox": inbox,
+            "lead_email": lead_email,
+            "from_email": from_email,
+            "subject": msg.get("subject",""),
+            "date_iso": msg.get("date_iso",""),
+            "thread_id": msg.get("thread_id",""),
+            "match": via,
+        })
 
         # Track newest internal timestamp seen
         if im and im > newest_ms:
             newest_ms = im
 
+    def _settle(results: Dict[str, bool]) -> None:
+        for mid, (key, event) in queued.items():
+            if results.get(key):
+                counts["updated"] += 1
+                logger.info("[runner] reply update OK for %s", event["from_email"])
+                outcomes[mid] = "updated"
+                _audit_event(dict(event, reason="UPDATED"))
+            else:
+                logger.info("[runner] reply update found no CRM row for %s", event["from_email"])
+                outcomes[mid] = "noupdate"
+                _audit_event(dict(event, reason="NOUPDATE"))
+        counts["commit_ms"] = int(round(active.commit_ms))
+        _persist_progress(inbox, counts, outcomes, newest_ms, next_history_id, thread_snapshot, errored)
+
+    active.defer(_settle)
+    if batch is not None:
+        logger.info("[runner] <<< END inbox=%s queued=%d (settles after batch commit)", inbox, len(queued))
+        return counts
+
+    try:
+        get_crm_writer().call(active.commit)
+    except Exception:
+        counts["errors"] += 1
+        logger.error("[runner] reply batch commit failed for %s: %s", inbox, traceback.format_exc())
+        return counts
+    logger.info("[runner] <<< END inbox=%s counts=%s", inbox, counts)
+    return counts
+
+
+def _persist_progress(inbox: str, counts: Dict[str, int], outcomes: Dict[str, str],
+                      newest_ms: int, next_history_id, thread_snapshot=None, errored=()) -> None:
+    """Record handled IDs and advance the offset/history/thread watermarks (after the CRM commit).
+
+    When any candidate errored (classify failure or could not be queued) the offset,
+    historyId and thread snapshot stay where they were: the next tick lists the same
+    window/deltas/threads again, the seen-id store drops what was already handled, and only
+    the failed messages are retried. Each failure is counted in the seen-id store; a message
+    that keeps failing is given up on (skip:error) after GMAIL_WATCH_MAX_MSG_ATTEMPTS so
+    the watermarks can move on.
+    """
+    try:
+        get_seen_ids().record(inbox, outcomes)
+    except Exception:
+        logger.error("[runner] seen-id record failed for %s: %s", inbox, traceback.format_exc())
+
+    if errored:
+        try:
+            given_up = get_seen_ids().record_failures(inbox, errored)
+        except Exception:
+            given_up = []
+            logger.error("[runner] seen-id failure count failed for %s: %s", inbox, traceback.format_exc())
+        if given_up:
+            counts["skipped"] += len(given_up)
+            logger.warning("[runner] giving up on %d message(s) for %s after repeated failures: %s", len(given_up), inbox, ", ".join(given_up))
+            print(f"[runner] Giving up on {len(given_up)} message(s) for {inbox} after repeated failures")
+            errored = set(errored) - set(given_up)
+
+    if errored:
+        logger.warning("[runner] %d message(s) errored for %s; holding offset/historyId/thread snapshot for a retry", len(errored), inbox)
+        print(f"[runner] Not advancing watermarks for {inbox}: {len(errored)} message(s) to retry")
+        # Thread strategy: the new snapshot already counts the failed messages, so keep the old one
+        newest_ms, next_history_id, thread_snapshot = 0, None, None
+
     # Persist watermark
     try:
         if newest_ms and newest_ms > 0:
@@ -288,32 +496,137 @@ def run_once_for_inbox(inbox: str, lookback_minutes: int = 1440) -> Dict[str, in
         counts["errors"] += 1
         logger.error("[runner] set_offset failed for %s: %s", inbox, traceback.format_exc())
 
-    logger.info("[runner] <<< END inbox=%s counts=%s", inbox, counts)
-    return counts
+    # Advance the history watermark only after the tick's messages were processed
+    if next_history_id:
+        try:
+            set_history_id(inbox, next_history_id)
+            logger.info("[runner] set_history_id(%s, %s)", inbox, next_history_id)
+        except Exception:
+            counts["errors"] += 1
+            logger.error("[runner] set_history_id failed for %s: %s", inbox, traceback.format_exc())
 
+    if thread_snapshot is not None:
+        try:
+            set_thread_snapshot(inbox, thread_snapshot)
+        except Exception:
+            counts["errors"] += 1
+            logger.error("[runner] set_thread_snapshot failed for %s: %s", inbox, traceback.format_exc())
+
+
+def _log_counts(inbox: str, c: Dict[str, int]) -> None:
+    logger.info(
+        "[loop] %s -> checked=%d matched=%d updated=%d auto=%d skipped=%d errors=%d seen=%d commit_ms=%d units=%d rate_limited=%d",
+        inbox, c.get("checked",0), c.get("matched",0), c.get("updated",0), c.get("auto",0), c.get("skipped",0), c.get("errors",0), c.get("seen",0),
+        c.get("commit_ms",0), c.get("quota_units",0), c.get("rate_limited",0)
+    )
+
+
+def run_cycle(inboxes: Sequence[str], lookback_minutes: int, pool: ThreadPoolExecutor,
+              inflight: Dict[str, object] | None = None, wait_sec: float | None = None) -> Dict[str, Dict[str, int]]:
+    """Process all inboxes concurrently (bounded by the pool), then commit their replies once.
+
+    Every inbox queues its matched replies on one shared ReplyBatch; after the wait the
+    batch is committed through the CRM writer (one patch_many + one CSV export for the
+    whole cycle) and the per-inbox counters are settled from it.
+
+    Each inbox runs in isolation: an exception is logged for that inbox only. With `inflight`
+    and `wait_sec`, an inbox still running after `wait_sec` is left to finish in the
+    background and skipped by later cycles until it does, so one slow mailbox can't hold
+    up reply detection for the rest.
+    """
+    inflight = {} if inflight is None else inflight
+    for ib, fut in list(inflight.items()):
+        if fut.done():
+            inflight.pop(ib, None)
+
+    started = time.monotonic()
+    batch = ReplyBatch()
+    futures = {}
+    for inbox in inboxes:
+        if inbox in inflight:
+            logger.warning("[loop] %s still running from a previous cycle; skipping this cycle", inbox)
+            continue
+        fut = pool.submit(run_once_for_inbox, inbox, lookback_minutes, batch)
+        futures[fut] = inbox
+        inflight[inbox] = fut
 
-def run_loop(inboxes: Sequence[str], interval_sec: int | None = None, jitter_sec: int = 15, lookback_minutes: int | None = None):
+    done, not_done = wait(list(futures), timeout=wait_sec)
+    writer = get_crm_writer()
+    try:
+        writer.call(batch.commit)
+    except Exception:
+        logger.error("[loop] reply batch commit failed: %s", traceback.format_exc())
+
+    results: Dict[str, Dict[str, int]] = {}
+    for fut in done:
+        inbox = futures[fut]
+        inflight.pop(inbox, None)
+        try:
+            results[inbox] = fut.result()
+            _log_counts(inbox, results[inbox])
+        except Exception:
+            logger.error("[loop] Fatal error in inbox loop for %s: %s", inbox, "".join(traceback.format_exception(fut.exception())))
+    for fut in not_done:
+        logger.warning("[loop] %s exceeded %.0fs; continuing in background", futures[fut], wait_sec or 0)
+        # Stragglers queued on this cycle's batch: commit whatever they add once they finish
+        fut.add_done_callback(lambda _f: writer.submit(batch.commit))
+    logger.info("[loop] cycle: %d inbox(es) done in %.1fs (%d still running), reply commit %.1fms",
+                len(done), time.monotonic() - started, len(not_done), batch.commit_ms)
+    return results
+
+
+def run_loop(inboxes: Sequence[str], interval_sec: int | None = None, jitter_sec: int = 15, lookback_minutes: int | None = None,
+             parallelism: int | None = None, adaptive: bool | None = None):
+    """Poll forever. Adaptive (default): each inbox on its own schedule from PollScheduler,
+    starting at `interval_sec`. Otherwise every inbox each `interval_sec` + jitter."""
     if interval_sec is None:
         interval_sec = max(1, POLL_MINUTES) * 60
     if lookback_minutes is None:
         lookback_minutes = max(1, POLL_MINUTES)
-    logger.info("[runner] Using poll interval=%sm, lookback window=%sm", interval_sec // 60, lookback_minutes)
+    if parallelism is None:
+        parallelism = PARALLELISM
+    parallelism = max(1, min(parallelism, len(inboxes) or 1))
+    logger.info("[runner] Using poll interval=%sm, lookback window=%sm, parallelism=%d, strategy=%s",
+                interval_sec // 60, lookback_minutes, parallelism, STRATEGY)
     logger.info("Starting gmail_watch for %d inbox(es): %s", len(inboxes), ", ".join(inboxes))
-    while True:
-        for inbox in inboxes:
-            try:
-                c = run_once_for_inbox(inbox, lookback_minutes=lookback_minutes)
-                logger.info(
-                    "[loop] %s -> checked=%d matched=%d updated=%d auto=%d skipped=%d errors=%d",
-                    inbox, c.get("checked",0), c.get("matched",0), c.get("updated",0), c.get("auto",0), c.get("skipped",0), c.get("errors",0)
-                )
-            except Exception:
-                logger.error("[loop] Fatal error in inbox loop for %s: %s", inbox, traceback.format_exc())
-        # After processing all inboxes this cycle, ensure log trimming runs once per cycle
-        print("[runner] DEBUG: cycle complete; checking log size for trimming…")
+    if ADAPTIVE if adaptive is None else adaptive:
+        _run_adaptive_loop(inboxes, interval_sec, jitter_sec, lookback_minutes, parallelism)
+        return
+    inflight: Dict[str, object] = {}
+    with ThreadPoolExecutor(max_workers=parallelism, thread_name_prefix="gmail-watch") as pool:
+        while True:
+            run_cycle(inboxes, lookback_minutes, pool, inflight=inflight, wait_sec=interval_sec)
+            # After processing all inboxes this cycle, ensure log trimming runs once per cycle
+            print("[runner] DEBUG: cycle complete; checking log size for trimming…")
+            _trim_log_safely()
+            sleep_for = interval_sec + random.randint(0, max(0, jitter_sec))
+            time.sleep(sleep_for)
+
+
+def _run_adaptive_loop(inboxes: Sequence[str], interval_sec: int, jitter_sec: int, lookback_minutes: int, parallelism: int):
+    scheduler = PollScheduler(inboxes, interval_sec, jitter_sec=jitter_sec)
+    logger.info("[loop] adaptive scheduling: interval %.0f-%.0fs, quota budget %d units/min",
+                scheduler.min_interval, scheduler.max_interval, scheduler.units_per_min)
+    inflight: Dict[str, object] = {}
+    with ThreadPoolExecutor(max_workers=parallelism, thread_name_prefix="gmail-watch") as pool:
+        while True:
+            time.sleep(adaptive_step(scheduler, pool, inflight, lookback_minutes, interval_sec))
+
+
+def adaptive_step(scheduler: PollScheduler, pool: ThreadPoolExecutor, inflight: Dict[str, object],
+                  lookback_minutes: int, wait_sec: float) -> float:
+    """Poll the inboxes the scheduler says are due; return seconds until the next one is.
+
+    One iteration of the adaptive loop, also driven by the orchestrator's gmail_watch job.
+    """
+    due = scheduler.due()
+    if due:
+        results = run_cycle(due, lookback_minutes, pool, inflight=inflight, wait_sec=wait_sec)
+        for inbox in due:
+            scheduler.record(inbox, results.get(inbox))
+        logger.info("[loop] %s", scheduler.describe())
         _trim_log_safely()
-        sleep_for = interval_sec + random.randint(0, max(0, jitter_sec))
-        time.sleep(sleep_for)
+    return max(1.0, scheduler.next_wake())
 
 if __name__ == "__main__":
     # Lightweight CLI so you can run this module directly:
@@ -361,6 +674,32 @@ if __name__ == "__main__":
         default=15,
         help="Random jitter seconds added to sleep (only for --mode loop).",
     )
+    parser.add_argument(
+        "--parallelism",
+        type=int,
+        default=PARALLELISM,
+        help="Max inboxes processed concurrently (env GMAIL_WATCH_PARALLELISM, default 8).",
+    )
+    parser.add_argument(
+        "--strategy",
+        choices=["inbox", "threads"],
+        default=STRATEGY if STRATEGY in ("inbox", "threads") else "inbox",
+        help="inbox = scan the inbox (history deltas / search); threads = check only threads of leads in sequence "
+             "(env GMAIL_WATCH_STRATEGY, default inbox).",
+    )
+    parser.add_argument(
+        "--adaptive",
+        dest="adaptive",
+        action="store_true",
+        help="Loop mode: per-inbox adaptive poll intervals under a quota budget (default unless GMAIL_WATCH_ADAPTIVE=0).",
+    )
+    parser.add_argument(
+        "--fixed-interval",
+        dest="adaptive",
+        action="store_false",
+        help="Loop mode: poll every inbox each --interval seconds (+ jitter).",
+    )
+    parser.set_defaults(adaptive=ADAPTIVE)
     parser.add_argument(
         "--log-level",
         default="INFO",
@@ -416,6 +755,7 @@ if __name__ == "__main__":
     # Re-evaluate toggles for this process (no global needed at module scope)
     STRICT_OWNER = os.getenv("GMAIL_WATCH_STRICT_OWNER", "1") not in ("0", "false", "False")
     ENFORCE_THREAD_MATCH = os.getenv("GMAIL_WATCH_ENFORCE_THREAD", "0") in ("1", "true", "True")
+    STRATEGY = args.strategy
 
     # Resolve inbox list
     inboxes = args.inbox if args.inbox else load_senders()
@@ -423,17 +763,19 @@ if __name__ == "__main__":
         raise SystemExit("No inboxes configured. Check Creds/email_accounts.json or pass --inbox.")
 
     print(f"[runner __main__] Mode={args.mode} Inboxes={inboxes} "
-          f"Poll={args.poll_minutes}m Lookback={args.lookback_minutes}m StrictOwner={STRICT_OWNER} EnforceThread={ENFORCE_THREAD_MATCH}")
+          f"Poll={args.poll_minutes}m Lookback={args.lookback_minutes}m StrictOwner={STRICT_OWNER} EnforceThread={ENFORCE_THREAD_MATCH} "
+          f"Strategy={STRATEGY}")
 
 
     if args.mode == "tick":
-        results = {}
-        for ib in inboxes:
-            print(f"\n=== ONE-TICK for {ib} ===")
-            results[ib] = run_once_for_inbox(ib, lookback_minutes=args.lookback_minutes)
-            print(f"[runner __main__] {ib} -> {results[ib]}")
-            print(f"[runner __main__] DEBUG: Checking log size before trim at: {LOG_PATH}")
-            _trim_log_safely()
+        print(f"\n=== ONE-TICK for {len(inboxes)} inbox(es), parallelism={args.parallelism} ===")
+        with ThreadPoolExecutor(max_workers=max(1, min(args.parallelism, len(inboxes))), thread_name_prefix="gmail-watch") as pool:
+            results = run_cycle(inboxes, args.lookback_minutes, pool)
+        for ib, res in results.items():
+            print(f"[runner __main__] {ib} -> {res}")
+        print(f"[runner __main__] DEBUG: Checking log size before trim at: {LOG_PATH}")
+        _trim_log_safely()
     else:
         # loop mode
-        run_loop(inboxes, interval_sec=args.interval, jitter_sec=args.jitter, lookback_minutes=args.lookback_minutes)
\ No newline at end of file
+        run_loop(inboxes, interval_sec=args.interval, jitter_sec=args.jitter, lookback_minutes=args.lookback_minutes,
+                 parallelism=args.parallelism, adaptive=args.adaptive)
\ No newline at end of file
@@ -0,0 +1,143 @@
+from __future__ import annotations
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+# Adaptive per-inbox poll scheduling for run_loop.
+# Each inbox keeps its own poll interval: it halves (down to MIN_INTERVAL_SEC) after a
+# tick that found new candidates or replies and grows by 25% (up to MAX_INTERVAL_SEC)
+# after a quiet one, so busy inboxes are polled often and idle ones rarely. Every tick's
+# Gmail quota units (Adapters/quota.py) go into a sliding one-minute window shared by all
+# inboxes; due inboxes are only admitted while their expected cost fits the remaining
+# QUOTA_UNITS_PER_MIN budget (most active first). A tick that hit 429/403 rate errors
+# backs that inbox off exponentially, independent of its interval.
+
+MIN_INTERVAL_SEC = float(os.getenv("GMAIL_WATCH_MIN_INTERVAL_SEC", "60"))
+MAX_INTERVAL_SEC = float(os.getenv("GMAIL_WATCH_MAX_INTERVAL_SEC", "900"))
+QUOTA_UNITS_PER_MIN = int(os.getenv("GMAIL_WATCH_QUOTA_UNITS_PER_MIN", "6000"))
+BACKOFF_BASE_SEC = float(os.getenv("GMAIL_WATCH_BACKOFF_BASE_SEC", "60"))
+BACKOFF_MAX_SEC = float(os.getenv("GMAIL_WATCH_BACKOFF_MAX_SEC", "1800"))
+
+_WINDOW_SEC = 60.0
+_EWMA = 0.3
+
+
+class _InboxState:
+    def __init__(self, interval: float, next_at: float) -> None:
+        self.interval = interval
+        self.next_at = next_at
+        self.activity = 0.0     # EWMA of candidates + replies per tick
+        self.avg_units = 0.0    # EWMA of quota units per tick
+        self.strikes = 0        # consecutive rate-limited ticks
+        self.polls = 0
+        self.units_total = 0
+
+
+class PollScheduler:
+    def __init__(
+        self,
+        inboxes: Sequence[str],
+        base_interval: float,
+        *,
+        min_interval: float = MIN_INTERVAL_SEC,
+        max_interval: float = MAX_INTERVAL_SEC,
+        units_per_min: int = QUOTA_UNITS_PER_MIN,
+        jitter_sec: float = 0.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.min_interval = max(1.0, min(min_interval, base_interval))
+        self.max_interval = max(max_interval, base_interval)
+        self.units_per_min = max(1, units_per_min)
+        self.jitter_sec = max(0.0, jitter_sec)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._window: Deque[Tuple[float, int]] = deque()
+        now = clock()
+        # Every inbox is due immediately on start
+        self._state: Dict[str, _InboxState] = {ib: _InboxState(float(base_interval), now) for ib in inboxes}
+
+    def _spent_locked(self, now: float) -> int:
+        while self._window and self._window[0][0] <= now - _WINDOW_SEC:
+            self._window.popleft()
+        return sum(u for _, u in self._window)
+
+    def due(self, now: Optional[float] = None) -> List[str]:
+        """Inboxes to poll now: past their next poll time and within the quota budget."""
+        now = self._clock() if now is None else now
+        with self._lock:
+            ready = [ib for ib, st in self._state.items() if st.next_at <= now]
+            ready.sort(key=lambda ib: (-self._state[ib].activity, self._state[ib].next_at))
+            spent = self._spent_locked(now)
+            remaining = self.units_per_min - spent
+            admitted: List[str] = []
+            for ib in ready:
+                cost = self._state[ib].avg_units
+                # Always let one inbox through on an empty window so a large estimate can't starve it
+                if cost <= remaining or (not admitted and spent == 0):
+                    admitted.append(ib)
+                    remaining -= cost
+            return admitted
+
+    def record(self, inbox: str, counts: Optional[Dict[str, int]], now: Optional[float] = None) -> None:
+        """Account a finished tick and schedule the inbox's next poll.
+
+        counts=None means no result (failed or still running): keep the interval as is.
+        """
+        now = self._clock() if now is None else now
+        with self._lock:
+            st = self._state.get(inbox)
+            if st is None:
+                return
+            if counts is None:
+                st.next_at = now + st.interval
+                return
+            units = int(counts.get("quota_units", 0) or 0)
+            if units:
+                self._window.append((now, units))
+            st.polls += 1
+            st.units_total += units
+            st.avg_units = units if st.polls == 1 else (1 - _EWMA) * st.avg_units + _EWMA * units
+            signal = int(counts.get("checked", 0) or 0) + 4 * int(counts.get("matched", 0) or 0)
+            st.activity = (1 - _EWMA) * st.activity + _EWMA * signal
+
+            if counts.get("rate_limited"):
+                st.strikes += 1
+                backoff = min(BACKOFF_MAX_SEC, BACKOFF_BASE_SEC * 2 ** (st.strikes - 1))
+                delay = max(st.interval, backoff * random.uniform(1.0, 1.25))
+                print(f"[scheduler] {inbox} rate-limited (strike {st.strikes}); backing off {delay:.0f}s")
+            else:
+                st.strikes = 0
+                if signal > 0:
+                    st.interval = max(self.min_interval, st.interval * 0.5)
+                else:
+                    st.interval = min(self.max_interval, st.interval * 1.25)
+                delay = st.interval
+            st.next_at = now + delay + random.uniform(0, min(self.jitter_sec, delay * 0.1))
+
+    def next_wake(self, now: Optional[float] = None) -> float:
+        """Seconds until the next inbox is due (or until quota frees up when one is held back)."""
+        now = self._clock() if now is None else now
+        with self._lock:
+            if not self._state:
+                return self.max_interval
+            wake = min(st.next_at for st in self._state.values()) - now
+            if wake <= 0 and self._window and self._spent_locked(now) > 0:
+                # Something is due but was held back by the budget: wait for quota to free up
+                wake = self._window[0][0] + _WINDOW_SEC - now
+            return max(0.0, wake)
+
+    def describe(self, now: Optional[float] = None) -> str:
+        """One-line summary for the loop logs: per-inbox next poll, interval and quota use."""
+        now = self._clock() if now is None else now
+        with self._lock:
+            spent = self._spent_locked(now)
+            parts = []
+            for ib, st in sorted(self._state.items(), key=lambda kv: kv[1].next_at):
+                parts.append(
+                    f"{ib} in {max(0.0, st.next_at - now):.0f}s (every {st.interval:.0f}s, "
+                    f"~{st.avg_units:.0f}u/tick{', backoff x' + str(st.strikes) if st.strikes else ''})"
+                )
+        return f"quota {spent}/{self.units_per_min}u per min; next polls: " + "; ".join(parts)
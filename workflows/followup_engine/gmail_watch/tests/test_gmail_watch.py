@@ -4,7 +4,8 @@ Scratch test for gmail_watch pipeline (one-tick, no live Gmail).
 
 What it does:
 - Adds the repo root to sys.path so imports work when run directly
-- Monkey-patches poll_inbox + classify_message to avoid Gmail
+- Monkey-patches the runner's poll_ids + classify_batch to avoid Gmail
+- Checks classify_batch's contract against a fake Gmail batch object
 - Runs runner.run_once_for_inbox(inbox) and prints counters
 - Optionally exercises resolve_lead + mark_yes/mark_no directly
 
@@ -20,6 +21,7 @@ from __future__ import annotations
 import os
 import sys
 from pathlib import Path
+from types import SimpleNamespace
 from typing import Dict
 
 # --- Put repo root on sys.path ---
@@ -31,8 +33,9 @@ if str(REPO_ROOT) not in sys.path:
 print(f"[scratch] Using REPO_ROOT={REPO_ROOT}")
 
 # --- Imports from the project ---
+from workflows.followup_engine.gmail_watch.runtime import runner
 from workflows.followup_engine.gmail_watch.runtime.runner import run_once_for_inbox
-from workflows.followup_engine.gmail_watch.Steps import poll_inbox, classify_message
+from workflows.followup_engine.gmail_watch.Steps import classify_message
 from workflows.followup_engine.gmail_watch.Steps.resolve_lead import find_lead_row
 from workflows.followup_engine.gmail_watch.Steps.mark_responded import mark_yes, mark_no
 
@@ -47,7 +50,7 @@ print(f"[scratch] TEST_INBOX={TEST_INBOX}")
 
 # --- Monkey-patch poll + classify so we don't hit Gmail ---
 
-def _fake_poll_ids(svc, inbox: str, since_ms: int, lookback_minutes: int = 1440):
+def _fake_poll_ids(svc, inbox: str, since_ms: int, lookback_minutes: int = 1440, max_ids=None):
     print(f"[scratch] _fake_poll_ids(inbox={inbox}, since_ms={since_ms}, lookback={lookback_minutes}) -> ['FAKE_MSG_ID']")
     return ["FAKE_MSG_ID"]
 
@@ -62,9 +65,89 @@ def _fake_classify(svc, msg_id: str, inbox: str) -> Dict:
         "internal_ms": 1723652400000,
     }
 
-# Apply monkey patches
-poll_inbox.poll_ids = _fake_poll_ids
-classify_message.classify = _fake_classify
+def _fake_classify_batch(svc, msg_ids, inbox: str):
+    print(f"[scratch] _fake_classify_batch(msg_ids={msg_ids}, inbox={inbox})")
+    return {mid: _fake_classify(svc, mid, inbox) for mid in msg_ids}, {}
+
+# Apply monkey patches where the runner looks them up (it binds these names at import)
+runner.poll_ids = _fake_poll_ids
+runner.classify_batch = _fake_classify_batch
+runner.USE_HISTORY = False  # take the poll_ids path
+runner.STRATEGY = "inbox"
+
+
+# --- Fake Gmail batch for classify_batch's contract ---
+
+class _FakeHttpError(Exception):
+    def __init__(self, status: int):
+        super().__init__(f"HTTP {status}")
+        self.resp = SimpleNamespace(status=status)
+
+
+class _FakeBatchService:
+    """Answers messages.get sub-requests from a script: msg_id -> list of outcomes per attempt.
+
+    An outcome is "ok", an HTTP status (int), or "drop" (the batch call dies in transport
+    before this and every later sub-request is answered).
+    """
+
+    def __init__(self, script: Dict[str, list]):
+        self.script = {mid: list(outcomes) for mid, outcomes in script.items()}
+        self.requested: list = []  # one list of msg_ids per batch round trip
+
+    def users(self):
+        return self
+
+    def messages(self):
+        return self
+
+    def get(self, userId, id, **kwargs):
+        return id
+
+    def new_batch_http_request(self, callback):
+        svc, queued = self, []
+
+        class _Batch:
+            def add(self, request, request_id):
+                queued.append(request_id)
+
+            def execute(self):
+                svc.requested.append(list(queued))
+                for mid in queued:
+                    outcome = svc.script[mid].pop(0) if svc.script[mid] else "ok"
+                    if outcome == "drop":
+                        raise ConnectionResetError("connection reset mid-batch")
+                    if outcome == "ok":
+                        callback(mid, {"id": mid, "payload": {"headers": [{"name": "From", "value": TEST_LEAD_EMAIL}]}}, None)
+                    else:
+                        callback(mid, None, _FakeHttpError(outcome))
+
+        return _Batch()
+
+
+def _classify_batch_checks():
+    print("[scratch] Checking classify_batch against a fake batch…")
+    classify_message._RETRY_SLEEPS = [0, 0, 0]
+    svc = _FakeBatchService({
+        "OK": ["ok"],
+        "GONE": [404],
+        "FLAKY": [503, "ok"],
+        "DENIED": [403],
+        "DROPPED": ["drop", "ok"],
+        "AFTER_DROP": ["ok"],
+    })
+    classified, failed = classify_message.classify_batch(
+        svc, ["OK", "GONE", "FLAKY", "DENIED", "DROPPED", "AFTER_DROP"], TEST_INBOX
+    )
+    assert classified["OK"]["from_email"] == TEST_LEAD_EMAIL.lower(), classified
+    assert classified["GONE"] is None and "GONE" not in failed, "404 should map to None, not a failure"
+    assert isinstance(failed.get("DENIED"), _FakeHttpError) and "DENIED" not in classified, failed
+    # Retry round: only the retryable failure and the IDs the dropped batch never answered
+    assert svc.requested[1] == ["FLAKY", "DROPPED", "AFTER_DROP"], svc.requested
+    assert len(svc.requested) == 2, svc.requested
+    for mid in ("FLAKY", "DROPPED", "AFTER_DROP"):
+        assert classified.get(mid) and mid not in failed, (mid, classified, failed)
+    print("[scratch] classify_batch contract OK")
 
 
 def _unit_checks():
@@ -90,6 +173,7 @@ def _one_tick_run():
 
 if __name__ == "__main__":
     # 1) Quick unit checks (optional; comment out if you only want the one-tick)
+    _classify_batch_checks()
     _unit_checks()
 
     # 2) One-tick end-to-end simulation without Gmail
@@ -3,10 +3,20 @@
 from pathlib import Path
 import sys, json, argparse
 from datetime import datetime
+from typing import Optional
+
+ROOT = Path(__file__).resolve().parent
+REPO_ROOT = ROOT.parents[1]
+# Make sure the followup_engine directory is on sys.path so `engine` can be imported,
+# and the repo root so shared `workflows.universal_outreach_utils` modules resolve too.
+# (Must happen before the engine imports below.)
+for _p in (ROOT, REPO_ROOT):
+    if str(_p) not in sys.path:
+        sys.path.insert(0, str(_p))
 
 # --- imports from your engine package ---
 from engine.subscripts.io.load_crm import load_crm
-from engine.subscripts.io.save_crm import save_row
+from engine.subscripts.io.save_crm import save_row, flush_crm
 from engine.subscripts.filters.by_client import filter_by_client
 from engine.subscripts.filters.eligible_for_run import eligible_rows
 from engine.subscripts.gating.responded_guard import is_replied
@@ -20,16 +30,13 @@ from engine.subscripts.generation.build_context import build_context
 from engine.subscripts.generation.generic_writer import draft_generic
 from engine.subscripts.generation.personalize_writer import personalize
 from engine.subscripts.sending.gmail_send import send_followup
+from engine.subscripts.sending.rate_limit import FOLLOWUP_MAX_WAIT_SEC, send_permit_wait
 from engine.subscripts.updates.messaging_status import set_status
 from engine.subscripts.updates.stage_advance import advance_stage
 from engine.subscripts.updates.timestamps import write_last_sent_timestamps
 from engine.subscripts.updates.per_followup_fields import write_per_followup_fields
 from engine.subscripts.updates.audit_log import log_action
 
-ROOT = Path(__file__).resolve().parent
-# Make sure the followup_engine directory is on sys.path so `engine` can be imported
-if str(ROOT) not in sys.path:
-    sys.path.insert(0, str(ROOT))
 SETTINGS_DIR = ROOT / "engine" / "settings"
 
 # Dry-run toggle (set before main runs)
@@ -73,6 +80,13 @@ def main() -> int:
     if not client:
         print("No client entered. Exiting.")
         return 0
+    return run_followups(client)
+
+
+def run_followups(client: str, *, dry_run: Optional[bool] = None) -> int:
+    """Run one follow-up pass for `client` (no prompts). dry_run defaults to the module DRY_RUN."""
+    if dry_run is None:
+        dry_run = DRY_RUN
 
     # 1) Load CRM, filter to client, and require a non-empty Sequence Stage
     rows, headers, csv_path = load_crm()
@@ -103,11 +117,11 @@ def main() -> int:
 
         # 3) Skip if watcher marked as replied → pause this lead
         if is_replied(row, FIELDS):
-            if not DRY_RUN:
+            if not dry_run:
                 set_status(row, FIELDS, "Paused")
                 save_row(csv_path, headers, row)
             log_action(client=client, lead=lead_id, followup=None, inbox=None,
-                       result={"status": "skip", "reason": "replied", "dry_run": DRY_RUN})
+                       result={"status": "skip", "reason": "replied", "dry_run": dry_run})
             continue
 
         # 4) Skip non-safe deliverability
@@ -138,12 +152,26 @@ def main() -> int:
                        result={"status": "skip", "reason": "no_owner_assigned"})
             continue
 
+        # Skip before generating copy when the inbox has no send permit coming soon
+        # (daily cap spent, or the per-minute budget is held by other senders)
+        if not dry_run:
+            try:
+                permit_wait = send_permit_wait(inbox)
+            except Exception as e:
+                permit_wait = 0.0
+                print(f"[MAIN] Send limiter check failed for {inbox}: {e}")
+            if permit_wait > FOLLOWUP_MAX_WAIT_SEC:
+                log_action(client=client, lead=lead_id, followup=next_n, inbox=inbox,
+                           result={"status": "skip", "reason": "rate_limited", "retry_after": permit_wait})
+                print(f"[MAIN] Skipping {lead_id} — no send permit for {inbox} for another {permit_wait:.0f}s.")
+                continue
+
         # Require a thread link (existing or recovered); otherwise skip this lead
         ok_thread, info = thread_guard(
             row,
             FIELDS,
             inbox=inbox,
-            dry_run=DRY_RUN,
+            dry_run=dry_run,
             settings_dir=SETTINGS_DIR,
         )
         if not ok_thread:
@@ -161,12 +189,12 @@ def main() -> int:
         subject, body = personalize(generic, row, FIELDS, followup_num=next_n)
 
         # 9) Mark Pending before send (skip in DRY_RUN)
-        if not DRY_RUN:
+        if not dry_run:
             set_status(row, FIELDS, "Pending")
             save_row(csv_path, headers, row)
 
         # 10) Send (or simulate in DRY_RUN)
-        if DRY_RUN:
+        if dry_run:
             send_res = {"status": "ok", "sent_at": now_iso(), "dry_run": True, "thread_link": thread_link}
             print(f"[DRY RUN] Would send FU{next_n} to {lead_id} via {inbox} in thread {thread_link}")
         else:
@@ -184,7 +212,7 @@ def main() -> int:
 
         # 11) Persist CRM updates (only on real send success; skip in DRY_RUN)
         status = send_res.get("status", "ok")
-        if status == "ok" and not DRY_RUN:
+        if status == "ok" and not dry_run:
             print(f"[MAIN] Send succeeded for {lead_id}; updating CRM.")
             set_status(row, FIELDS, "Sent")
             advance_stage(row, FIELDS, next_n)
@@ -209,10 +237,26 @@ def main() -> int:
         log_action(client=client, lead=lead_id, followup=next_n, inbox=inbox, result=send_res)
         processed += 1
 
+    # Export the CSV once per run (updates above were point writes to the CRM store)
+    if not dry_run:
+        flush_crm(csv_path)
+
     print(f"Done. Processed {processed} lead(s) for '{client}'.")
     return 0
 
 
+def active_clients() -> list:
+    """Client names with at least one lead in sequence (for unattended runs over every client)."""
+    rows, _headers, _csv_path = load_crm()
+    client_col = CAN.get("client", "Client Name")
+    seen = {}
+    for row in eligible_rows(rows, FIELDS):
+        name = (get(row, client_col) or "").strip()
+        if name:
+            seen.setdefault(name.lower(), name)
+    return sorted(seen.values())
+
+
 if __name__ == "__main__":
     # CLI flag + interactive prompt for DRY_RUN
     parser = argparse.ArgumentParser()
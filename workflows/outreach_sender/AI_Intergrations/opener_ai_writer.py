@@ -1,13 +1,15 @@
 import json
 import re
 import os
-from openai import OpenAI
+
+from workflows.universal_outreach_utils.llm_gateway import get_gateway
 
 # Load your OpenAI API key from JSON file
 with open("/Users/kevinnovanta/backend_for_ai_agency/Creds/gpt_key.json") as f:
     openai_key = json.load(f)["api_key"]
 
-client = OpenAI(api_key=openai_key)
+# Shared async gateway (rate budget, 429 backoff, coalescing, stats) instead of a per-module client
+gateway = get_gateway(api_key=openai_key)
 
 # === Prompt loader helpers ===
 def _load_opener_prompt():
@@ -57,6 +59,14 @@ def remove_brackets_only(subject, body_html):
     print(f"🔍 remove_brackets_only: Cleaned body_html: {body_clean}")
     return subject_clean, body_clean
 
+# Lead fields that make a generated opener/subject specific to a lead (completion-cache scope)
+_LEAD_FEATURES = ("Email", "Company Name", "Industry", "Overview", "Custom 1", "Custom 2")
+
+def _lead_features(lead):
+    if not lead:
+        return None
+    return {k: str(lead.get(k, "") or "").strip() for k in _LEAD_FEATURES}
+
 def build_prompt():
     print("🔍 build_prompt: Building opener prompt...")
     prompt = _load_opener_prompt()
@@ -119,20 +129,26 @@ def _extract_subject_and_body_from_freeform(content: str):
         subject = _light_smooth(subject)
     return subject, body_text
 
-def generate_generic_subject():
-    """Generate a concise, generic subject using a configurable prompt file."""
+def generate_generic_subject(lead=None, cache=True):
+    """Generate a concise, generic subject using a configurable prompt file.
+
+    Passing the lead scopes the completion cache to it, so re-runs reuse that lead's subject.
+    cache=False always asks the model (e.g. one-off subjects with no lead to scope by).
+    """
     prompt = _load_subject_prompt() or "Return ONLY JSON: {\"subject\": \"Quick question\"}"
     print(f"🔍 generate_generic_subject: Sending prompt to OpenAI:\n{prompt}")
     try:
-        resp = client.chat.completions.create(
+        content = gateway.complete(
             model="gpt-4o-mini",
             messages=[
                 {"role": "system", "content": "You write concise, non-spammy email subjects."},
                 {"role": "user", "content": prompt}
             ],
-            temperature=0.5
+            temperature=0.5,
+            label="opener.generic_subject",
+            cache=cache,
+            cache_scope=_lead_features(lead),
         )
-        content = resp.choices[0].message.content
         print(f"🔍 generate_generic_subject: Raw AI content received:\n{content}")
         try:
             data = json.loads(content)
@@ -148,6 +164,38 @@ def generate_generic_subject():
         print(f"❌ Error generating generic subject: {e}")
         return {"subject": "Quick question"}
 
+def generate_subject_variants(count, client=None):
+    """
+    Generate `count` distinct generic subjects in one call (feeds the per-campaign subject pool).
+    Returns a de-duplicated list of sanitized subjects; may be shorter than `count`. Raises on API failure.
+    """
+    prompt = _load_subject_prompt() or "Write a concise, curiosity-led subject line for a warm, first-touch email."
+    instruction = (
+        f"Write {int(count)} distinct variants of this subject line, varied in wording and angle.\n"
+        'Return ONLY JSON: {"subjects": ["<text>", ...]} (this overrides any other output format above).'
+    )
+    print(f"🔍 generate_subject_variants: Requesting {count} subject variants for client: {client or '[any]'}")
+    content = gateway.complete(
+        model="gpt-4o-mini",
+        messages=[
+            {"role": "system", "content": "You write concise, non-spammy email subjects."},
+            {"role": "user", "content": prompt},
+            {"role": "user", "content": instruction},
+        ],
+        temperature=0.9,
+        label="opener.subject_variants",
+        response_format={"type": "json_object"},
+    )
+    print(f"🔍 generate_subject_variants: Raw AI content received:\n{content}")
+    data = json.loads(content)
+    subjects, seen = [], set()
+    for subj in data.get("subjects", []) if isinstance(data, dict) else []:
+        subj = re.sub(r"\[.*?\]", "", str(subj or "")).strip()
+        if subj and subj.lower() not in seen:
+            seen.add(subj.lower())
+            subjects.append(subj)
+    return subjects[: int(count)]
+
 def generate_email(lead):
     """
     Sends a prompt to OpenAI and returns a generic subject and body_html for a cold outreach email.
@@ -156,16 +204,18 @@ def generate_email(lead):
     print(f"🔍 generate_email: Using prompt:\n{prompt}")
 
     try:
-        response = client.chat.completions.create(
+        content = gateway.complete(
             model="gpt-4o-mini",
             messages=[
                 {"role": "system", "content": "You are a B2B cold email generator."},
                 {"role": "user", "content": prompt}
             ],
-            temperature=0.7
+            temperature=0.7,
+            label="opener.email",
+            cache=True,
+            cache_scope=_lead_features(lead),
         )
 
-        content = response.choices[0].message.content
         print(f"🔍 generate_email: Raw AI content received (freeform):\n{content}")
 
         # No JSON expectation: extract minimally
@@ -187,20 +237,20 @@ def generate_email_from_prompt(prompt, openai_key):
     """
     Sends a custom prompt to OpenAI and returns the subject and body_html.
     """
-    local_client = OpenAI(api_key=openai_key)
+    local_gateway = get_gateway(api_key=openai_key)
 
     try:
         print(f"🔍 generate_email_from_prompt: Prompt being sent:\n{prompt}")
-        response = local_client.chat.completions.create(
-           model="gpt-4o-mini",
+        content = local_gateway.complete(
+            model="gpt-4o-mini",
             messages=[
                 {"role": "system", "content": "You are a B2B cold email generator."},
                 {"role": "user", "content": prompt}
             ],
-            temperature=0.7
+            temperature=0.7,
+            label="opener.from_prompt",
         )
 
-        content = response.choices[0].message.content
         print(f"🔍 generate_email_from_prompt: Raw AI content received (freeform):\n{content}")
 
         subj, body_text = _extract_subject_and_body_from_freeform(content)
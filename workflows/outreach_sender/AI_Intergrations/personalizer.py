@@ -43,7 +43,7 @@ def personalize_subject(base_subject, lead, prompt_override=None):
     print(f"[Personalizer] Preparing to send request to AI API. Model: {model_name}, Prompt tokens: {prompt_tokens}")
     print(f"[Personalizer] Prompt preview (first 300 chars): {prompt[:300]!r}")
     try:
-        response = client.chat.completions.create(
+        output = gateway.complete(
             model=model_name,
             messages=[
                 {"role": "system", "content": "You write concise, non-spammy subject lines for B2B cold emails."},
@@ -52,8 +52,10 @@ def personalize_subject(base_subject, lead, prompt_override=None):
             ],
             temperature=0.5,
             max_tokens=80,
-        )
-        output = response.choices[0].message.content.strip()
+            label="personalizer.subject",
+            cache=True,
+            cache_scope=_cache_scope(lead),
+        ).strip()
         print(f"[Personalizer] Raw AI output: {output!r}")
         print("[Personalizer] Starting sanitation of AI output...")
         try:
@@ -79,11 +81,15 @@ if PROJECT_ROOT not in sys.path:
     sys.path.append(PROJECT_ROOT)
 
 import json
-from openai import OpenAI
+from workflows.universal_outreach_utils.llm_gateway import get_gateway
 
 def remove_brackets_only(text):
     return re.sub(r"\[.*?\]", "", text).strip()
 
+def _cache_scope(lead):
+    """Completion-cache scope: the lead payload is already in the messages; the email keeps entries per lead."""
+    return {"email": (lead.get("Email", "") or "").strip().lower()}
+
 def _aliases_for_key(key) -> list:
     """
     Given a key, return a list of aliases:
@@ -325,7 +331,8 @@ with open("/Users/kevinnovanta/backend_for_ai_agency/Creds/gpt_key.json") as f:
 _api_key = secrets.get("api_key") or secrets.get("OPENAI_API_KEY")
 if _api_key:
     os.environ.setdefault("OPENAI_API_KEY", _api_key)
-client = OpenAI()
+# Shared async gateway (rate budget, 429 backoff, coalescing, stats) instead of a per-module client
+gateway = get_gateway()
 
 def personalize_email(base_subject, base_body_html, lead, prompt_override=None):
     """
@@ -369,7 +376,7 @@ def personalize_email(base_subject, base_body_html, lead, prompt_override=None):
     print(f"[Personalizer] Preparing to send request to AI API. Model: {model_name}, Prompt tokens: {prompt_tokens}")
     print(f"[Personalizer] Prompt preview (first 300 chars): {prompt[:300]!r}")
     try:
-        response = client.chat.completions.create(
+        output = gateway.complete(
             model=model_name,
             messages=[
                 {"role": "system", "content": "You rewrite emails with subtle, high-signal personalization."},
@@ -378,8 +385,10 @@ def personalize_email(base_subject, base_body_html, lead, prompt_override=None):
             ],
             temperature=0.7,
             max_tokens=350,
-        )
-        output = response.choices[0].message.content.strip()
+            label="personalizer.email",
+            cache=True,
+            cache_scope=_cache_scope(lead),
+        ).strip()
         print(f"[Personalizer] Raw AI output: {output!r}")
         print("[Personalizer] Starting sanitation of AI output...")
         try:
@@ -440,13 +449,13 @@ def generate_personalized_email(lead):
     print(f"[Personalizer] Preparing to send request to AI API. Model: {model_name}, Prompt tokens: {prompt_tokens}")
     print(f"[Personalizer] Prompt preview (first 300 chars): {prompt[:300]!r}")
     try:
-        response = client.chat.completions.create(
+        output = gateway.complete(
             model=model_name,
             messages=[{"role": "user", "content": prompt}],
             temperature=0.7,
             max_tokens=300,
-        )
-        output = response.choices[0].message.content.strip()
+            label="personalizer.legacy",
+        ).strip()
         print(f"[Personalizer] Raw AI output: {output!r}")
         print("[Personalizer] Starting sanitation of AI output...")
         try:
@@ -0,0 +1,109 @@
+import json
+import os
+import re
+
+from workflows.universal_outreach_utils.llm_gateway import get_gateway
+from workflows.outreach_sender.AI_Intergrations.personalizer import (
+    _build_token_map,
+    _cache_scope,
+    _fix_company_like_yours,
+    _offer_hint,
+    _render_placeholders,
+    remove_brackets_only,
+)
+
+# Single-call opener: one JSON-schema-constrained completion returns the final,
+# personalized subject + body (replaces opener -> subject -> personalize body ->
+# personalize subject). Enabled with "generation_mode": "structured" in opener_controls.json.
+
+gateway = get_gateway()
+
+MODEL = "gpt-4o-mini"
+
+OPENER_SCHEMA = {
+    "name": "personalized_opener",
+    "strict": True,
+    "schema": {
+        "type": "object",
+        "properties": {
+            "subject": {"type": "string"},
+            "body_html": {"type": "string"},
+        },
+        "required": ["subject", "body_html"],
+        "additionalProperties": False,
+    },
+}
+
+
+def _load_structured_prompt(prompt_override=None):
+    """Load the single-call opener prompt from argument, env or default txt file."""
+    if prompt_override is not None:
+        print("[StructuredWriter] Using provided prompt override.")
+        return prompt_override
+    p = os.environ.get("STRUCTURED_OPENER_PROMPT")
+    if p:
+        print("[StructuredWriter] Loaded prompt from environment variable STRUCTURED_OPENER_PROMPT.")
+        return p
+    path = os.environ.get("STRUCTURED_OPENER_PROMPT_PATH") or \
+           "/Users/kevinnovanta/backend_for_ai_agency/workflows/outreach_sender/Utils/structured_opener_prompt.txt"
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            content = f.read()
+            print(f"[StructuredWriter] Loaded prompt from file: {path}")
+            return content
+    except Exception as e:
+        print(f"❌ [StructuredWriter] Failed to load prompt from file at path: {path}, error: {e}")
+        return ""
+
+
+def generate_personalized_opener(lead, prompt_override=None):
+    """
+    Generate the final subject and body for a lead in one structured call.
+    Returns {"subject": ..., "body_html": ...}. Raises on API/parse failure so the
+    caller can fall back to the multi-call chain.
+    """
+    prompt = _load_structured_prompt(prompt_override)
+    if not prompt.strip():
+        raise RuntimeError("Structured opener prompt is empty")
+
+    token_map = _build_token_map(lead, "", "")
+    prompt = _render_placeholders(prompt, token_map)
+    company_name = token_map.get("company_name", "")
+    offer_summary = token_map.get("custom_2", "") or token_map.get("industry", "")
+
+    payload_json = json.dumps({
+        "company_name": company_name,
+        "offer_summary": offer_summary,
+        "offer_hint": _offer_hint(offer_summary),
+        "industry": token_map.get("industry", ""),
+        "overview": token_map.get("overview", ""),
+        "custom_1": token_map.get("custom_1", ""),
+    })
+
+    output = gateway.complete(
+        model=MODEL,
+        messages=[
+            {"role": "system", "content": "You write short, personalized B2B cold emails with subtle, high-signal personalization."},
+            {"role": "user", "content": prompt.strip()},
+            {"role": "user", "content": f"Lead JSON:\n{payload_json}"},
+        ],
+        temperature=0.7,
+        max_tokens=400,
+        label="opener.structured",
+        cache=True,
+        cache_scope=_cache_scope(lead),
+        response_format={"type": "json_schema", "json_schema": OPENER_SCHEMA},
+    )
+    print(f"[StructuredWriter] Raw AI output: {output!r}")
+
+    parsed = json.loads(output)
+    subject = remove_brackets_only(str(parsed.get("subject", "") or ""))
+    body_html = remove_brackets_only(str(parsed.get("body_html", "") or ""))
+    if not subject or not body_html:
+        raise ValueError("Structured opener returned an empty subject or body")
+
+    body_html = _fix_company_like_yours(body_html, company_name)
+    body_html = re.sub(r'\ba\s+([aeiouAEIOU])', r'an \1', body_html)
+    subject = re.sub(r'\ba\s+([aeiouAEIOU])', r'an \1', subject)
+    print(f"[StructuredWriter] Generated opener for lead: {lead.get('Email', '[no email]')} | Subject: {subject!r}")
+    return {"subject": subject, "body_html": body_html}
@@ -0,0 +1,143 @@
+import hashlib
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from workflows.outreach_sender.AI_Intergrations.opener_ai_writer import (
+    _load_subject_prompt,
+    generate_generic_subject,
+    generate_subject_variants,
+)
+
+# Per-campaign pool of pre-generated generic subjects.
+# The generic subject never depended on the lead, so instead of one LLM call per send we
+# generate K variants once per client/campaign, persist them with usage counters, and
+# rotate through them (weighted toward the least used, each retired after max_uses).
+# A new batch is generated when every variant is retired or the subject prompt changes.
+
+STATE_PATH = Path(__file__).resolve().parents[1] / "state" / "subject_pools.json"
+
+DEFAULT_POOL_SIZE = 8
+DEFAULT_MAX_USES = 25
+
+
+def _prompt_sig() -> str:
+    return hashlib.sha256((_load_subject_prompt() or "").encode("utf-8")).hexdigest()[:16]
+
+
+def _pool_key(client: str, campaign: str) -> str:
+    return f"{(client or '').strip().lower()}::{(campaign or 'opener').strip().lower()}"
+
+
+class SubjectPool:
+    def __init__(self, path=STATE_PATH, pool_size=DEFAULT_POOL_SIZE, max_uses=DEFAULT_MAX_USES):
+        self.path = Path(path)
+        self.pool_size = max(1, int(pool_size))
+        self.max_uses = max(1, int(max_uses))
+        self._lock = threading.Lock()
+        self._checked = set()  # pool keys whose prompt signature was verified this process
+        self._state = self._load()
+
+    def _load(self) -> dict:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            print(f"⚠️ [SubjectPool] Could not read {self.path}: {e}. Starting empty.")
+            return {}
+
+    def _save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=str(self.path.parent), prefix=".subject_pools.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self._state, f, indent=2)
+            os.replace(tmp, self.path)
+        except Exception:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+
+    def _regenerate(self, key: str, client: str, sig: str) -> dict:
+        subjects = generate_subject_variants(self.pool_size, client=client)
+        if not subjects:
+            raise RuntimeError("no subject variants returned")
+        pool = {
+            "client": client,
+            "prompt_sig": sig,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "variants": [{"subject": s, "uses": 0} for s in subjects],
+        }
+        # Keep retired variants' history out of rotation but don't lose the totals
+        old = self._state.get(key) or {}
+        pool["retired_uses"] = int(old.get("retired_uses", 0)) + sum(int(v.get("uses", 0)) for v in old.get("variants", []))
+        self._state[key] = pool
+        print(f"[SubjectPool] Generated {len(subjects)} subject variants for {key}")
+        return pool
+
+    def pick(self, client: str, campaign: str = "opener") -> str:
+        """Return a subject for this client/campaign and count the use (thread-safe)."""
+        key = _pool_key(client, campaign)
+        with self._lock:
+            pool = self._state.get(key)
+            try:
+                if key not in self._checked:
+                    sig = _prompt_sig()
+                    if pool and pool.get("prompt_sig") != sig:
+                        print(f"[SubjectPool] Subject prompt changed; regenerating pool for {key}")
+                        pool = None
+                    self._checked.add(key)
+                active = [v for v in (pool or {}).get("variants", []) if int(v.get("uses", 0)) < self.max_uses]
+                if not active:
+                    pool = self._regenerate(key, client, _prompt_sig())
+                    active = list(pool["variants"])
+            except Exception as e:
+                print(f"⚠️ [SubjectPool] Pool unavailable for {key} ({e}); generating a one-off subject.")
+                active = None
+
+            if active:
+                # Weighted rotation: remaining uses as weight, so fresh variants are favored
+                weights = [self.max_uses - int(v.get("uses", 0)) for v in active]
+                choice = random.choices(active, weights=weights, k=1)[0]
+                choice["uses"] = int(choice.get("uses", 0)) + 1
+                choice["last_used"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+                try:
+                    self._save()
+                except Exception as e:
+                    print(f"⚠️ [SubjectPool] Failed to persist usage counters: {e}")
+                return choice["subject"]
+
+        # Fallback outside the lock (other threads keep picking) and uncached: with no lead to
+        # scope by, a cached call would hand every send the same subject
+        return generate_generic_subject(cache=False).get("subject", "Quick question")
+
+    def stats(self, client: str, campaign: str = "opener") -> dict:
+        with self._lock:
+            pool = self._state.get(_pool_key(client, campaign)) or {}
+            return {v["subject"]: int(v.get("uses", 0)) for v in pool.get("variants", [])}
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_subject_pool(pool_size=None, max_uses=None) -> SubjectPool:
+    """Process-wide pool (one state file) so every dispatcher thread updates the same counters."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = SubjectPool()
+        if pool_size is not None:
+            _pool.pool_size = max(1, int(pool_size))
+        if max_uses is not None:
+            _pool.max_uses = max(1, int(max_uses))
+        return _pool
@@ -1,12 +1,20 @@
+import atexit
 import smtplib
-import ssl
 import json
+import os
 import random
 import re
+import threading
+import time
 from pathlib import Path
 from email.mime.text import MIMEText 
+from email.utils import make_msgid
 from datetime import datetime
 
+from workflows.outreach_sender.Email_Scripts.smtp_pool import pool as smtp_pool
+from workflows.universal_outreach_utils.message_index import record_sent
+from workflows.universal_outreach_utils.send_limiter import get_send_limiter
+
 def remove_brackets(text):
     """Remove [] and anything between them."""
     return re.sub(r"\[[^\]]*\]", "", text)
@@ -25,8 +33,15 @@ try:
     with open(controls_path, "r") as cf:
         controls = json.load(cf)
     DAILY_LIMIT = int(controls.get("per_inbox_limit", 40))
+    PER_MINUTE_LIMIT = float(controls.get("per_inbox_per_minute", os.getenv("SEND_PER_MINUTE_CAP", "2")))
 except Exception:
     DAILY_LIMIT = 40
+    PER_MINUTE_LIMIT = float(os.getenv("SEND_PER_MINUTE_CAP", "2"))
+
+# Daily/per-minute caps are enforced by the shared limiter, which also counts sends made
+# by the dispatcher and the follow-up engine from the same inbox (sent_counts below is
+# this process's local tracking only).
+limiter = get_send_limiter()
 
 # Reset tracking if needed (new day)
 today = datetime.now().strftime("%Y-%m-%d")
@@ -43,6 +58,42 @@ else:
 # Update local reference
 sent_counts.update(tracking_data["sent_counts"])
 
+# Guards sent_counts/tracking file: the parallel dispatcher sends from several threads
+_tracking_lock = threading.Lock()
+
+# Tracking counters are flushed in batches (every N sends or T seconds, and at exit)
+# instead of rewriting the file after every message.
+TRACKING_FLUSH_EVERY = int(os.getenv("TRACKING_FLUSH_EVERY", "10"))
+TRACKING_FLUSH_SEC = float(os.getenv("TRACKING_FLUSH_SEC", "30"))
+_tracking_dirty = 0
+_tracking_last_flush = time.monotonic()
+
+def _write_tracking_locked():
+    global _tracking_dirty, _tracking_last_flush
+    tracking_data["sent_counts"] = sent_counts
+    tmp = tracking_path.with_suffix(".json.tmp")
+    with open(tmp, "w") as f:
+        json.dump(tracking_data, f, indent=2)
+    os.replace(tmp, tracking_path)
+    _tracking_dirty = 0
+    _tracking_last_flush = time.monotonic()
+
+def flush_tracking():
+    """Write pending send counters to email_send_tracking.json."""
+    with _tracking_lock:
+        if _tracking_dirty:
+            _write_tracking_locked()
+
+def _record_send(sender_email):
+    global _tracking_dirty
+    with _tracking_lock:
+        sent_counts[sender_email] = sent_counts.get(sender_email, 0) + 1
+        _tracking_dirty += 1
+        if _tracking_dirty >= TRACKING_FLUSH_EVERY or time.monotonic() - _tracking_last_flush >= TRACKING_FLUSH_SEC:
+            _write_tracking_locked()
+
+atexit.register(flush_tracking)
+
 def get_available_sender(sender_override=None):
     """
     Pick a sender under the per-inbox daily limit.
@@ -53,7 +104,7 @@ def get_available_sender(sender_override=None):
     if sender_override:
         for acc in email_accounts:
             if acc.get("email") == sender_override:
-                if sent_counts.get(acc["email"], 0) >= DAILY_LIMIT:
+                if limiter.sent_today(acc["email"]) >= DAILY_LIMIT:
                     print(f"⚠️ Sender {sender_override} is at its daily limit ({DAILY_LIMIT}). Falling back to rotation.")
                     break
                 return acc
@@ -61,7 +112,7 @@ def get_available_sender(sender_override=None):
 
     # Normal rotation: choose among accounts under limit
     available_accounts = [
-        acc for acc in email_accounts if sent_counts.get(acc["email"], 0) < DAILY_LIMIT
+        acc for acc in email_accounts if limiter.sent_today(acc["email"]) < DAILY_LIMIT
     ]
     if not available_accounts:
         raise Exception("All inboxes have reached the daily limit.")
@@ -84,18 +135,25 @@ def send_email(to_email, subject, body, sender_override=None):
     msg["Subject"] = subject
     msg["From"] = sender_email
     msg["To"] = to_email
+    # Our own Message-ID so the Gmail watcher can match replies via In-Reply-To/References
+    message_id = make_msgid(domain=sender_email.split("@")[-1])
+    msg["Message-ID"] = message_id
+
+    # Shared cross-process permit; short per-minute waits are slept through
+    wait = limiter.wait_for(sender_email, daily_cap=DAILY_LIMIT, per_minute=PER_MINUTE_LIMIT)
+    if wait:
+        print(f"⏳ {sender_email} has no send permit for another {wait:.0f}s (daily/per-minute cap); not sending to {to_email}")
+        return False, None
 
     try:
-        context = ssl.create_default_context()
-        with smtplib.SMTP(smtp_server, smtp_port) as server:
-            server.starttls(context=context)
-            server.login(sender_email, sender_password)
-            server.sendmail(sender_email, to_email, msg.as_string())
-
-        sent_counts[sender_email] += 1
-        tracking_data["sent_counts"] = sent_counts
-        with open(tracking_path, "w") as f:
-            json.dump(tracking_data, f, indent=2)
+        # Pooled per-sender session (STARTTLS + login only when the session is new or dropped)
+        smtp_pool.sendmail(
+            {"email": sender_email, "app_password": sender_password, "smtp_server": smtp_server, "smtp_port": smtp_port},
+            to_email,
+            msg.as_string(),
+        )
+        _record_send(sender_email)
+        record_sent(to_email, sender_email, message_id=message_id)
 
         print(f"✅ Email sent from {sender_email} to {to_email}")
         return True, sender_email
@@ -106,7 +164,9 @@ def send_email(to_email, subject, body, sender_override=None):
         print("   • SMTP host should be smtp.gmail.com and port 587 with STARTTLS")
         print("   • For Google Workspace, verify SMTP AUTH is allowed in Admin console")
         print(f"   • Sender: {sender_email} | Error: {e}")
+        limiter.release(sender_email)
         return False, None
     except Exception as e:
         print(f"❌ Failed to send email from {sender_email} to {to_email}: {e}")
+        limiter.release(sender_email)
         return False, None
\ No newline at end of file
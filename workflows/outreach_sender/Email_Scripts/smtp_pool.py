@@ -0,0 +1,163 @@
+import atexit
+import os
+import smtplib
+import ssl
+import threading
+import time
+
+# Pool of persistent, authenticated SMTP sessions keyed by sender address.
+# send_email() used to connect + STARTTLS + login for every message; now each sender keeps
+# one session open between sends. An idle session is health-checked with NOOP before reuse,
+# recycled after a number of messages / max idle time, and transparently re-established
+# (and the transaction retried once) if the server dropped it during MAIL/RCPT. Once DATA
+# has been issued the server may already have accepted the message, so a failure from
+# there on is raised and never re-sent (a resend could email the lead twice).
+
+NOOP_AFTER_SEC = float(os.getenv("SMTP_NOOP_AFTER_SEC", "15"))      # NOOP if idle longer than this
+MAX_IDLE_SEC = float(os.getenv("SMTP_MAX_IDLE_SEC", "240"))         # reconnect instead of reusing
+MAX_MESSAGES_PER_CONN = int(os.getenv("SMTP_MAX_MESSAGES_PER_CONN", "90"))
+CONNECT_TIMEOUT_SEC = float(os.getenv("SMTP_TIMEOUT_SEC", "30"))
+
+# Errors meaning "the session is gone"; only retried while still in the envelope (MAIL/RCPT).
+# Timeouts are not in here: a slow server may still complete the command.
+_DROPPED = (smtplib.SMTPServerDisconnected, ConnectionResetError, BrokenPipeError)
+
+
+class _Session:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.conn = None
+        self.last_used = 0.0
+        self.sent = 0
+
+
+class SMTPPool:
+    def __init__(self):
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self.stats = {"connects": 0, "reuses": 0, "noops": 0, "reconnects": 0}
+
+    def _bump(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def _session(self, sender_email):
+        with self._lock:
+            sess = self._sessions.get(sender_email)
+            if sess is None:
+                sess = self._sessions[sender_email] = _Session()
+            return sess
+
+    def _connect(self, sess, account):
+        self._close(sess)
+        server = smtplib.SMTP(
+            account.get("smtp_server", "smtp.gmail.com"),
+            account.get("smtp_port", 587),
+            timeout=CONNECT_TIMEOUT_SEC,
+        )
+        try:
+            server.starttls(context=ssl.create_default_context())
+            server.login(account["email"], account["app_password"])
+        except Exception:
+            try:
+                server.close()
+            except Exception:
+                pass
+            raise
+        sess.conn = server
+        sess.sent = 0
+        sess.last_used = time.monotonic()
+        self._bump("connects")
+        print(f"[smtp_pool] Opened SMTP session for {account['email']}")
+
+    @staticmethod
+    def _close(sess):
+        conn, sess.conn = sess.conn, None
+        if conn is None:
+            return
+        try:
+            conn.quit()
+        except Exception:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def _healthy(self, sess):
+        if sess.conn is None:
+            return False
+        idle = time.monotonic() - sess.last_used
+        if idle > MAX_IDLE_SEC or sess.sent >= MAX_MESSAGES_PER_CONN:
+            return False
+        if idle > NOOP_AFTER_SEC:
+            self._bump("noops")
+            try:
+                code, _ = sess.conn.noop()
+                return code == 250
+            except Exception:
+                return False
+        return True
+
+    @staticmethod
+    def _envelope(conn, sender, to_email):
+        """MAIL FROM + RCPT TO (nothing of the message has been sent yet)."""
+        conn.ehlo_or_helo_if_needed()
+        code, resp = conn.mail(sender)
+        if code != 250:
+            if code == 421:
+                raise smtplib.SMTPServerDisconnected(resp)
+            conn.rset()
+            raise smtplib.SMTPSenderRefused(code, resp, sender)
+        code, resp = conn.rcpt(to_email)
+        if code not in (250, 251):
+            if code == 421:
+                raise smtplib.SMTPServerDisconnected(resp)
+            conn.rset()
+            raise smtplib.SMTPRecipientsRefused({to_email: (code, resp)})
+
+    def sendmail(self, account, to_email, message):
+        """Send `message` (str) from `account` over its pooled session. Raises smtplib errors."""
+        sess = self._session(account["email"])
+        with sess.lock:
+            if self._healthy(sess):
+                self._bump("reuses")
+            else:
+                self._connect(sess, account)
+            try:
+                try:
+                    self._envelope(sess.conn, account["email"], to_email)
+                except _DROPPED as e:
+                    print(f"[smtp_pool] Session for {account['email']} dropped ({type(e).__name__}); reconnecting")
+                    self._bump("reconnects")
+                    self._connect(sess, account)
+                    self._envelope(sess.conn, account["email"], to_email)
+            except smtplib.SMTPRecipientsRefused:
+                sess.last_used = time.monotonic()
+                raise
+            except Exception:
+                # Unknown state after a failed transaction: don't reuse the session
+                self._close(sess)
+                raise
+
+            # DATA: from here the server may accept the message even if we see an error, so no resend
+            try:
+                code, resp = sess.conn.data(message)
+            except Exception:
+                self._close(sess)
+                raise
+            if code != 250:
+                self._close(sess)
+                raise smtplib.SMTPDataError(code, resp)
+            sess.sent += 1
+            sess.last_used = time.monotonic()
+
+    def close_all(self):
+        with self._lock:
+            sessions = list(self._sessions.values())
+        for sess in sessions:
+            with sess.lock:
+                self._close(sess)
+
+
+pool = SMTPPool()
+atexit.register(pool.close_all)
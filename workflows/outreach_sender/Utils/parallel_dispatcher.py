@@ -9,10 +9,23 @@ This module is *pure orchestration*: it doesn't generate copy, verify emails,
 or write CSVs. You plug in callbacks from `sequence_runner.py` for those steps.
 
 Key ideas
-- One asyncio worker per inbox (parallel across inboxes).
+- One asyncio worker per inbox (parallel across inboxes, at most one send in flight per inbox).
+- Callbacks may be plain functions or `async def`. Blocking (sync) callbacks run in a
+  bounded thread pool so one inbox's LLM/SMTP/CSV work never stalls the others.
+- `max_concurrency` caps how many sends run at once across all inboxes.
+- Optional `prepare_cb` pre-generates copy into a bounded per-inbox ready queue
+  (`prefetch_depth`) while the worker waits out its jitter, so model latency doesn't
+  push sends off their schedule. Slot drift is logged per send.
 - Jitter between sends per inbox (default 60–120s) to mimic human pacing.
 - Respect per‑inbox and optional global daily limits.
+- Optional `permit_wait_cb` (inbox -> seconds until that inbox may send, e.g. the shared
+  send limiter's `peek`) pushes a send slot back when other processes used the inbox's
+  per-minute budget, and stops the inbox when the wait exceeds `max_permit_wait`
+  (daily cap used up elsewhere). The send path itself takes the permit.
 - Route each lead to exactly one inbox via a provided `choose_inbox_cb`.
+- Slot mode: pass a `plan` from `Utils/send_planner.plan_day` and each inbox sends its
+  planned opener slots at their planned times instead of jittered gaps (routing comes
+  from the plan). Drift per slot and capacity use are reported on `plan.report`.
 - Call your provided `send_one_cb` to actually generate/personalize/send.
 - Optional `on_result_cb` lets you update the CRM/CSV as soon as a send completes.
 
@@ -30,6 +43,7 @@ Integrate from sequence_runner.py (example):
         per_inbox_daily_limit=controls.get("daily_limit_per_inbox", 200),
         global_daily_limit=controls.get("daily_limit_total"),
         max_inboxes=None,  # or an int to cap number of concurrently active inboxes
+        max_concurrency=controls.get("max_concurrent_sends"),  # default: one per inbox
     )
 
 Where `send_one_opener` should raise an Exception on failure or return a dict like:
@@ -42,22 +56,33 @@ Where `send_one_opener` should raise an Exception on failure or return a dict li
       "sender_used": inbox_email,
     }
 
-This file uses only stdlib asyncio/random/time and prints lightweight [DISPATCH] logs.
+This file uses only stdlib asyncio/concurrent.futures/random/time and prints lightweight [DISPATCH] logs.
 """
 from __future__ import annotations
 
 import asyncio
+import functools
+import inspect
 import random
 import time
-from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Deque, Dict, Iterable, List, Optional, Tuple, Union
+
+if TYPE_CHECKING:
+    from workflows.outreach_sender.Utils.send_planner import SendPlan
 
 # Type aliases for clarity
 Lead = Dict[str, Any]
 SendResult = Dict[str, Any]
 
 ChooseInboxCB = Callable[[Lead, List[str]], str]
-SendOneCB = Callable[[str, Lead], SendResult]
-OnResultCB = Callable[[Lead, str, SendResult], None]
+SendOneCB = Callable[[str, Lead], Union[SendResult, Awaitable[SendResult]]]
+OnResultCB = Callable[[Lead, str, SendResult], Union[None, Awaitable[None]]]
+# (inbox_email, lead) -> prepared copy handed to send_one_cb as its third argument
+PrepareCB = Callable[[str, Lead], Any]
+# inbox_email -> seconds until that inbox may send again (0 = now)
+PermitWaitCB = Callable[[str], float]
 
 
 class ParallelDispatcher:
@@ -69,6 +94,10 @@ class ParallelDispatcher:
         per_inbox_daily_limit: int = 200,
         global_daily_limit: Optional[int] = None,
         max_inboxes: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        prefetch_depth: int = 2,
+        permit_wait_cb: Optional[PermitWaitCB] = None,
+        max_permit_wait: float = 600.0,
     ) -> None:
         if not sender_pool:
             raise ValueError("sender_pool must contain at least one inbox email")
@@ -79,87 +108,204 @@ class ParallelDispatcher:
         self.per_inbox_daily_limit = int(per_inbox_daily_limit)
         self.global_daily_limit = int(global_daily_limit) if global_daily_limit else None
         self.max_inboxes = int(max_inboxes) if max_inboxes else None
+        # Global cap on sends in flight across inboxes (default: one per active inbox)
+        self.max_concurrency = int(max_concurrency) if max_concurrency else None
+        # Messages generated ahead per inbox when a prepare_cb is used
+        self.prefetch_depth = max(1, int(prefetch_depth))
+        # Shared (cross-process) send budget; waits longer than max_permit_wait stop the inbox
+        self.permit_wait_cb = permit_wait_cb
+        self.max_permit_wait = float(max_permit_wait)
 
         # Shared state across workers
         self._global_sent = 0
+        self._global_inflight = 0  # reserved against global_daily_limit while a send runs
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._prepare_executor: Optional[ThreadPoolExecutor] = None
+        self._send_slots: Optional[asyncio.Semaphore] = None
+        # Slot mode: per-inbox planned send times (epoch), consumed in lead order
+        self._plan: Optional["SendPlan"] = None
+        self._slot_times: Dict[str, Deque[float]] = {}
         self._global_lock = asyncio.Lock()
         self._stop = asyncio.Event()
 
+    async def _call(self, cb: Callable[..., Any], *args: Any, executor: Optional[ThreadPoolExecutor] = None) -> Any:
+        """Await async callbacks directly; run sync ones in a thread pool (off the event loop)."""
+        if inspect.iscoroutinefunction(cb):
+            return await cb(*args)
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(executor or self._executor, functools.partial(cb, *args))
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+
+    async def _producer(
+        self,
+        inbox: str,
+        queue: "asyncio.Queue[Lead]",
+        ready: "asyncio.Queue[Optional[Tuple[Lead, Any, Optional[Exception]]]]",
+        prepare_cb: PrepareCB,
+    ) -> None:
+        """Generate copy for this inbox's leads ahead of their send slots (bounded by `ready`).
+
+        The worker cancels this task when it stops early (limits reached).
+        """
+        while not self._stop.is_set():
+            try:
+                lead = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            started = time.time()
+            prepared, error = None, None
+            try:
+                prepared = await self._call(prepare_cb, inbox, lead, executor=self._prepare_executor)
+            except Exception as e:  # noqa: BLE001 — surfaced to the worker as a failed send
+                error = e
+                print(f"[DISPATCH] Inbox {inbox}: prepare_cb raised exception for {lead.get('Email')}: {e}")
+            print(f"[DISPATCH] Inbox {inbox}: copy ready for {lead.get('Email')} in {time.time() - started:.2f}s")
+            await ready.put((lead, prepared, error))
+            queue.task_done()
+        # Sentinel: nothing more will be produced for this inbox
+        await ready.put(None)
+
     async def _worker(
         self,
         inbox: str,
         queue: "asyncio.Queue[Lead]",
         send_one_cb: SendOneCB,
         on_result_cb: Optional[OnResultCB],
+        prepare_cb: Optional[PrepareCB] = None,
     ) -> None:
         sent_count = 0
-        while not self._stop.is_set():
-            print(f"[DISPATCH] Worker for inbox {inbox} started processing loop.")
-            try:
-                lead = await asyncio.wait_for(queue.get(), timeout=0.5)
-                print(f"[DISPATCH] Inbox {inbox}: fetched lead with Email={lead.get('Email')}")
-            except asyncio.TimeoutError:
-                # No more leads currently queued for this inbox
-                if queue.empty():
-                    print(f"[DISPATCH] Inbox {inbox}: queue empty, ending worker loop.")
-                    break
-                continue
-
-            print(f"[DISPATCH] Inbox {inbox}: checking per-inbox daily limit ({sent_count}/{self.per_inbox_daily_limit})")
-            # Check per-inbox cap
-            if sent_count >= self.per_inbox_daily_limit:
-                print(f"[DISPATCH] Inbox {inbox}: daily limit reached, skipping remaining queued leads ({queue.qsize()}).")
-                queue.task_done()
-                continue
-
-            print(f"[DISPATCH] Inbox {inbox}: checking global daily limit.")
-            # Check global cap
-            async with self._global_lock:
-                if self.global_daily_limit is not None and self._global_sent >= self.global_daily_limit:
-                    print("[DISPATCH] Global daily limit reached. Stopping all workers.")
-                    self._stop.set()
-                    queue.task_done()
+        # With a prepare_cb, copy is generated by a producer into a bounded ready queue
+        # while this worker waits out its jitter slot; the send itself only pops the result.
+        ready: Optional[asyncio.Queue] = None
+        producer: Optional[asyncio.Task] = None
+        if prepare_cb is not None:
+            ready = asyncio.Queue(maxsize=self.prefetch_depth)
+            producer = asyncio.create_task(self._producer(inbox, queue, ready, prepare_cb))
+        task_done = queue.task_done if ready is None else (lambda: None)
+
+        try:
+            while not self._stop.is_set():
+                print(f"[DISPATCH] Worker for inbox {inbox} started processing loop.")
+                print(f"[DISPATCH] Inbox {inbox}: checking per-inbox daily limit ({sent_count}/{self.per_inbox_daily_limit})")
+                # Check per-inbox cap before taking another lead; stopping here also cancels the
+                # producer (finally below), so no more copy is generated for leads that can't be sent
+                if sent_count >= self.per_inbox_daily_limit:
+                    print(f"[DISPATCH] Inbox {inbox}: daily limit reached, leaving remaining queued leads ({queue.qsize()}).")
                     break
+                # Jitter *before* send for natural spacing per inbox; the slot is fixed now so
+                # copy generation (if any) overlaps the wait instead of adding to it.
+                delay = random.uniform(self.min_jitter, self.max_jitter)
+                due = time.monotonic() + delay
 
-            # Jitter *before* send for natural spacing per inbox
-            delay = random.uniform(self.min_jitter, self.max_jitter)
-            print(f"[DISPATCH] Inbox {inbox}: calculated delay {delay:.1f}s, sleeping before next send.")
-            try:
-                await asyncio.sleep(delay)
-            except asyncio.CancelledError:
-                queue.task_done()
-                break
+                prepared, prep_error = None, None
+                if ready is None:
+                    try:
+                        lead = await asyncio.wait_for(queue.get(), timeout=0.5)
+                    except asyncio.TimeoutError:
+                        # No more leads currently queued for this inbox
+                        if queue.empty():
+                            print(f"[DISPATCH] Inbox {inbox}: queue empty, ending worker loop.")
+                            break
+                        continue
+                else:
+                    item = await ready.get()
+                    if item is None:
+                        print(f"[DISPATCH] Inbox {inbox}: queue empty, ending worker loop.")
+                        break
+                    lead, prepared, prep_error = item
+                print(f"[DISPATCH] Inbox {inbox}: fetched lead with Email={lead.get('Email')}")
+                slot_at: Optional[float] = None
+                if self._plan is not None and self._slot_times.get(inbox):
+                    slot_at = self._slot_times[inbox].popleft()
+                    delay = max(0.0, slot_at - time.time())
+                    due = time.monotonic() + delay
 
-            # Perform the send
-            print(f"[DISPATCH] Inbox {inbox}: about to send to lead Email={lead.get('Email')}")
-            started = time.time()
-            try:
-                result = send_one_cb(inbox, lead)
-                print(f"[DISPATCH] Inbox {inbox}: raw send_one_cb result: {result}")
-                ok = bool(result.get("ok", True))
-            except Exception as e:  # noqa: BLE001 — we want to keep sending other leads
-                ok = False
-                result = {"ok": False, "error": str(e)}
-                print(f"[DISPATCH] Inbox {inbox}: send_one_cb raised exception: {e}")
-
-            elapsed = time.time() - started
-            status = "OK" if ok else "FAIL"
-            print(f"[DISPATCH] Inbox {inbox}: send {status} in {elapsed:.2f}s → {lead.get('Email')}")
-
-            if ok:
-                # Update counts only on success
-                sent_count += 1
+                if self.permit_wait_cb is not None:
+                    try:
+                        permit_wait = float(await self._call(self.permit_wait_cb, inbox) or 0.0)
+                    except Exception as e:  # noqa: BLE001 — pacing hint only
+                        permit_wait = 0.0
+                        print(f"[DISPATCH] Inbox {inbox}: permit_wait_cb error: {e}")
+                    if permit_wait > self.max_permit_wait:
+                        print(f"[DISPATCH] Inbox {inbox}: no shared send permit for {permit_wait:.0f}s (cap used by other senders); stopping this inbox.")
+                        task_done()
+                        break
+                    if permit_wait > 0:
+                        due = max(due, time.monotonic() + permit_wait)
+                        print(f"[DISPATCH] Inbox {inbox}: shared limiter pushes send back by {permit_wait:.1f}s")
+
+                print(f"[DISPATCH] Inbox {inbox}: checking global daily limit.")
+                # Check global cap (sends in flight count against it so parallel workers can't overshoot)
                 async with self._global_lock:
-                    self._global_sent += 1
+                    if self.global_daily_limit is not None and self._global_sent + self._global_inflight >= self.global_daily_limit:
+                        print("[DISPATCH] Global daily limit reached. Stopping all workers.")
+                        self._stop.set()
+                        task_done()
+                        break
+                    self._global_inflight += 1
 
-            if on_result_cb:
-                print(f"[DISPATCH] Inbox {inbox}: invoking on_result_cb for lead Email={lead.get('Email')}")
+                wait = due - time.monotonic()
+                print(f"[DISPATCH] Inbox {inbox}: calculated delay {delay:.1f}s, sleeping {max(wait, 0.0):.1f}s before next send.")
                 try:
-                    on_result_cb(lead, inbox, result)
-                except Exception as e:  # noqa: BLE001
-                    print(f"[DISPATCH] on_result_cb error for {lead.get('Email')}: {e}")
+                    if wait > 0:
+                        await asyncio.sleep(wait)
+                except asyncio.CancelledError:
+                    async with self._global_lock:
+                        self._global_inflight -= 1
+                    task_done()
+                    break
+                if ready is not None or slot_at is not None:
+                    # Positive drift means copy generation (or the permit wait) ran past the slot
+                    drift = time.monotonic() - due
+                    print(f"[DISPATCH] Inbox {inbox}: send slot drift {drift:+.2f}s")
 
-            queue.task_done()
+                # Perform the send (bounded by the global concurrency slots)
+                print(f"[DISPATCH] Inbox {inbox}: about to send to lead Email={lead.get('Email')}")
+                started = time.time()
+                try:
+                    if prep_error is not None:
+                        raise prep_error
+                    args = (inbox, lead) if ready is None else (inbox, lead, prepared)
+                    async with self._send_slots:
+                        result = await self._call(send_one_cb, *args)
+                    print(f"[DISPATCH] Inbox {inbox}: raw send_one_cb result: {result}")
+                    ok = bool(result.get("ok", True))
+                except Exception as e:  # noqa: BLE001 — we want to keep sending other leads
+                    ok = False
+                    result = {"ok": False, "error": str(e)}
+                    print(f"[DISPATCH] Inbox {inbox}: send_one_cb raised exception: {e}")
+
+                elapsed = time.time() - started
+                if slot_at is not None:
+                    self._plan.report.record(slot_at, started, ok)
+                status = "OK" if ok else "FAIL"
+                print(f"[DISPATCH] Inbox {inbox}: send {status} in {elapsed:.2f}s → {lead.get('Email')}")
+
+                # Release the in-flight reservation; count only successes
+                async with self._global_lock:
+                    self._global_inflight -= 1
+                    if ok:
+                        self._global_sent += 1
+                if ok:
+                    sent_count += 1
+
+                if on_result_cb:
+                    print(f"[DISPATCH] Inbox {inbox}: invoking on_result_cb for lead Email={lead.get('Email')}")
+                    try:
+                        await self._call(on_result_cb, lead, inbox, result)
+                    except Exception as e:  # noqa: BLE001
+                        print(f"[DISPATCH] on_result_cb error for {lead.get('Email')}: {e}")
+
+                task_done()
+        finally:
+            if producer is not None and not producer.done():
+                producer.cancel()
+                try:
+                    await producer
+                except asyncio.CancelledError:
+                    pass
 
     async def dispatch_async(
         self,
@@ -168,30 +314,49 @@ class ParallelDispatcher:
         choose_inbox_cb: ChooseInboxCB,
         send_one_cb: SendOneCB,
         on_result_cb: Optional[OnResultCB] = None,
+        prepare_cb: Optional[PrepareCB] = None,
+        plan: Optional["SendPlan"] = None,
     ) -> List[SendResult]:
         """Route leads to per‑inbox queues and run workers in parallel.
 
+        With `prepare_cb`, copy for up to `prefetch_depth` leads per inbox is generated
+        ahead of time and `send_one_cb` is called as (inbox, lead, prepared).
+
+        With `plan`, the plan's opener slots decide routing and send times; `leads` and
+        `choose_inbox_cb` are not used for routing.
+
         Returns a list of result dicts (only successes if your callback is written
         that way). You can also persist inside `on_result_cb` to stream results out.
         """
-        print(f"[DISPATCH] dispatch_async started with {len(list(leads))} leads.")
+        # Materialize once: `leads` may be a generator
+        leads_list = list(leads)
+        print(f"[DISPATCH] dispatch_async started with {len(leads_list)} leads.")
         # Build per‑inbox queues
         active_senders = self.sender_pool[: self.max_inboxes] if self.max_inboxes else self.sender_pool
         queues: Dict[str, asyncio.Queue] = {s: asyncio.Queue() for s in active_senders}
 
-        # Route each lead to an inbox (callback decides; we fallback to round‑robin)
         rr_index = 0
         routed_count = 0
-        # Re-create leads iterable to list since we consumed it above
-        leads_list = list(leads)
-        for lead in leads_list:
-            try:
-                inbox = choose_inbox_cb(lead, active_senders)
-            except Exception:
-                inbox = active_senders[rr_index % len(active_senders)]
-                rr_index += 1
-            queues[inbox].put_nowait(lead)
-            routed_count += 1
+        if plan is not None:
+            # Slot mode: the plan already routed each lead and fixed its send time
+            self._plan = plan
+            for inbox in active_senders:
+                slots = plan.openers(inbox)
+                self._slot_times[inbox] = deque(s.at for s in slots)
+                for slot in slots:
+                    queues[inbox].put_nowait(slot.lead)
+                    routed_count += 1
+            print(f"[DISPATCH] Slot mode: {routed_count} planned opener slot(s); {len(leads_list) - routed_count} lead(s) not planned for today.")
+        else:
+            # Route each lead to an inbox (callback decides; we fallback to round‑robin)
+            for lead in leads_list:
+                try:
+                    inbox = choose_inbox_cb(lead, active_senders)
+                except Exception:
+                    inbox = active_senders[rr_index % len(active_senders)]
+                    rr_index += 1
+                queues[inbox].put_nowait(lead)
+                routed_count += 1
         print(f"[DISPATCH] Routed {routed_count} leads across {len(active_senders)} inboxes.")
         for inbox, q in queues.items():
             print(f"[DISPATCH] Inbox {inbox} queued leads: {q.qsize()}")
@@ -199,22 +364,37 @@ class ParallelDispatcher:
         # Spin up workers (one per inbox) and run until all queues are drained
         inboxes_to_run = [inbox for inbox, q in queues.items() if not q.empty()]
         print(f"[DISPATCH] Starting workers for inboxes: {inboxes_to_run}")
-        tasks = [
-            asyncio.create_task(self._worker(inbox, q, send_one_cb, on_result_cb))
-            for inbox, q in queues.items()
-            if not q.empty()
-        ]
-        if not tasks:
+        if not inboxes_to_run:
             print("[DISPATCH] No work to do (all queues empty).")
             return []
 
+        concurrency = self.max_concurrency or len(inboxes_to_run)
+        self._send_slots = asyncio.Semaphore(concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="dispatch")
+        print(f"[DISPATCH] Global send concurrency: {concurrency}")
+        if prepare_cb is not None:
+            # One generation at a time per inbox producer
+            self._prepare_executor = ThreadPoolExecutor(max_workers=len(inboxes_to_run), thread_name_prefix="prepare")
+            print(f"[DISPATCH] Pre-generating copy: up to {self.prefetch_depth} message(s) ahead per inbox")
+        tasks = [
+            asyncio.create_task(self._worker(inbox, queues[inbox], send_one_cb, on_result_cb, prepare_cb))
+            for inbox in inboxes_to_run
+        ]
+
         try:
             await asyncio.gather(*tasks)
             print("[DISPATCH] All worker tasks completed.")
         finally:
             self._stop.set()
+            self._executor.shutdown(wait=True)
+            self._executor = None
+            if self._prepare_executor is not None:
+                self._prepare_executor.shutdown(wait=True)
+                self._prepare_executor = None
 
         print(f"[DISPATCH] Completed. Global sent: {self._global_sent}")
+        if plan is not None:
+            plan.report.log()
         # This function streams results via callback; return value is mostly for symmetry
         return []
 
@@ -230,19 +410,30 @@ def run_parallel_dispatch(
     per_inbox_daily_limit: int = 200,
     global_daily_limit: Optional[int] = None,
     max_inboxes: Optional[int] = None,
+    max_concurrency: Optional[int] = None,
+    prepare_cb: Optional[PrepareCB] = None,
+    prefetch_depth: int = 2,
+    permit_wait_cb: Optional[PermitWaitCB] = None,
+    max_permit_wait: float = 600.0,
+    plan: Optional["SendPlan"] = None,
 ) -> List[SendResult]:
     """Synchronous entrypoint for sequence_runner.
 
     This wraps the async dispatcher with `asyncio.run`, so callers don't need to
     manage an event loop.
     """
-    print(f"[DISPATCH] run_parallel_dispatch invoked with {len(list(leads))} leads and {len(sender_pool)} sender_pool inboxes.")
+    leads = list(leads)
+    print(f"[DISPATCH] run_parallel_dispatch invoked with {len(leads)} leads and {len(sender_pool)} sender_pool inboxes.")
     dispatcher = ParallelDispatcher(
         sender_pool,
         jitter_seconds=jitter_seconds,
         per_inbox_daily_limit=per_inbox_daily_limit,
         global_daily_limit=global_daily_limit,
         max_inboxes=max_inboxes,
+        max_concurrency=max_concurrency,
+        prefetch_depth=prefetch_depth,
+        permit_wait_cb=permit_wait_cb,
+        max_permit_wait=max_permit_wait,
     )
     results = asyncio.run(
         dispatcher.dispatch_async(
@@ -250,6 +441,8 @@ def run_parallel_dispatch(
             choose_inbox_cb=choose_inbox_cb,
             send_one_cb=send_one_cb,
             on_result_cb=on_result_cb,
+            prepare_cb=prepare_cb,
+            plan=plan,
         )
     )
     print("[DISPATCH] run_parallel_dispatch finished.")
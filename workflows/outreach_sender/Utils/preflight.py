@@ -2,68 +2,33 @@
 # This module centralizes: client gating, status checks, ZeroBounce verification (with caching),
 # and a Deliverability allow-list. It returns (eligible_rows, skip_logs, settings_logs)
 # so the caller (sequence_runner) can log what happened.
+# Verification runs as one stage over every lead that passes the basic gates
+# (concurrent single calls or the bulk-file API, see zerobounce.py), not one request per lead.
 
 from __future__ import annotations
 from typing import List, Dict, Tuple
 
-import os
-import json
 from datetime import datetime
-from pathlib import Path
-
-import requests
 
 # -----------------------------------------------------------------------------
-# Config / constants
+# ZeroBounce helpers (cache, retry, concurrent + bulk verification live in zerobounce.py)
 # -----------------------------------------------------------------------------
-UTILS_DIR = Path(__file__).parent
-VERIFY_CACHE_PATH = UTILS_DIR / "email_verify_cache.json"
-# We also support a repo-level creds file if ENV is not set
-REPO_ROOT = UTILS_DIR.parents[2] if len(UTILS_DIR.parents) >= 2 else UTILS_DIR
-ZB_CREDS_PATH = REPO_ROOT / "Creds" / "zerobounce_key.json"
-
+from workflows.outreach_sender.Utils.zerobounce import (
+    DEFAULT_BULK_THRESHOLD,
+    DEFAULT_MAX_WORKERS,
+    ZeroBounceClient,
+    cached_result,
+    load_verify_cache,
+    load_zb_key_and_cache_days,
+    save_verify_cache,
+    verify_emails,
+)
 
-# -----------------------------------------------------------------------------
-# ZeroBounce helpers (self-contained)
-# -----------------------------------------------------------------------------
 
 def _today_str() -> str:
     return datetime.today().strftime("%Y-%m-%d")
 
 
-def _load_zb_key_and_cache_days() -> Tuple[str, int]:
-    """Load ZeroBounce API key and default cache_days.
-    Priority: ENV var ZB_API_KEY > Creds/zerobounce_key.json > defaults.
-    Returns: (api_key, cache_days)
-    """
-    key = (os.getenv("ZB_API_KEY") or "").strip()
-    if key:
-        return key, 14
-    try:
-        if ZB_CREDS_PATH.exists():
-            data = json.load(open(ZB_CREDS_PATH, "r", encoding="utf-8"))
-            return (data.get("ZB_API_KEY", ""), int(data.get("cache_days", 14)))
-    except Exception:
-        pass
-    return "", 14
-
-
-def _load_verify_cache() -> Dict[str, Dict]:
-    try:
-        if VERIFY_CACHE_PATH.exists():
-            return json.load(open(VERIFY_CACHE_PATH, "r", encoding="utf-8"))
-    except Exception:
-        pass
-    return {}
-
-
-def _save_verify_cache(cache: Dict[str, Dict]) -> None:
-    try:
-        json.dump(cache, open(VERIFY_CACHE_PATH, "w", encoding="utf-8"), ensure_ascii=False, indent=2)
-    except Exception:
-        pass
-
-
 def verify_with_zerobounce(email: str, cache_days: int = 14) -> Dict[str, str]:
     """
     Call ZeroBounce (with local JSON caching) and normalize outputs to your CRM.
@@ -72,53 +37,24 @@ def verify_with_zerobounce(email: str, cache_days: int = 14) -> Dict[str, str]:
       - reason: provider sub-status string
       - date: YYYY-MM-DD (verification date)
       - deliverability: Safe|Catch All|Risky (mapped to your CRM dropdown)
+    For many emails use verify_emails() (concurrent, one cache write).
     """
     email = (email or "").strip()
     if not email or "@" not in email:
         return {"status": "unknown", "reason": "bad_format", "date": _today_str(), "deliverability": "Risky"}
 
-    cache = _load_verify_cache()
-    cached = cache.get(email.lower())
+    cached = cached_result(load_verify_cache(), email, cache_days)
     if cached:
-        try:
-            d = datetime.strptime(cached.get("date", ""), "%Y-%m-%d")
-            if (datetime.today() - d).days <= cache_days:
-                return cached
-        except Exception:
-            pass
-
-    api_key, default_cache_days = _load_zb_key_and_cache_days()
-    cache_days = cache_days or default_cache_days
+        return cached
+
+    api_key, _ = load_zb_key_and_cache_days()
     if not api_key:
         return {"status": "unknown", "reason": "no_api_key", "date": _today_str(), "deliverability": "Risky"}
 
-    try:
-        r = requests.get(
-            "https://api.zerobounce.net/v2/validate",
-            params={"api_key": api_key, "email": email},
-            timeout=12,
-        )
-        data = r.json() if r.ok else {}
-        raw = (data.get("status") or "").lower()  # valid, invalid, catch-all, unknown, spamtrap, abuse, do_not_mail
-        sub = (data.get("sub_status") or "").replace("_", " ")
-
-        if raw == "valid":
-            deliverability = "Safe"; norm = "deliverable"
-        elif raw == "catch-all":
-            deliverability = "Catch All"; norm = "catch-all"
-        elif raw in {"invalid"}:
-            deliverability = "Risky"; norm = "undeliverable"
-        elif raw in {"spamtrap", "abuse", "do_not_mail"}:
-            deliverability = "Risky"; norm = raw
-        else:
-            deliverability = "Risky"; norm = raw or "unknown"
-
-        result = {"status": norm, "reason": sub, "date": _today_str(), "deliverability": deliverability}
-        cache[email.lower()] = result
-        _save_verify_cache(cache)
-        return result
-    except Exception as e:
-        return {"status": "unknown", "reason": f"verify_error:{type(e).__name__}", "date": _today_str(), "deliverability": "Risky"}
+    result, cacheable = ZeroBounceClient(api_key, max_workers=1).validate(email)
+    if cacheable:
+        save_verify_cache({email.lower(): result})
+    return result
 
 
 # -----------------------------------------------------------------------------
@@ -173,12 +109,15 @@ def preflight_filter(
 
     if verif_enabled and verif_provider == "zerobounce":
         settings_logs.append(
-            f"Verification ON via ZeroBounce (cache_days={verif_cache_days}). Block statuses: {sorted(verif_block_statuses)}"
+            f"Verification ON via ZeroBounce (cache_days={verif_cache_days}, "
+            f"workers={vcfg.get('max_workers', DEFAULT_MAX_WORKERS)}, bulk file from {vcfg.get('bulk_threshold', DEFAULT_BULK_THRESHOLD)} emails). "
+            f"Block statuses: {sorted(verif_block_statuses)}"
         )
     else:
         settings_logs.append("Verification OFF.")
 
-    # Row processing
+    # Pass 1: basic gates
+    candidates: List[Dict] = []
     for idx, row in enumerate(rows, start=1):
         print(f"\nProcessing row {idx}:")
         status = (row.get("Messaging Status") or "").strip().lower()
@@ -201,12 +140,28 @@ def preflight_filter(
         if status not in ("", "untouched", "new"):
             print(f"  Skipping due to messaging status '{status}' not in allowed set ('', 'untouched', 'new')")
             continue
+        candidates.append(row)
+
+    # Verification stage: every candidate without a Deliverability value, verified in one batch
+    verified: Dict[str, Dict[str, str]] = {}
+    if verif_enabled and verif_provider == "zerobounce":
+        to_verify = [row.get("Email") or "" for row in candidates if not (row.get("Deliverability") or "").strip()]
+        print(f"\nVerifying {len(to_verify)} email(s) via ZeroBounce ({len(candidates) - len(to_verify)} already have Deliverability)")
+        verified = verify_emails(
+            to_verify,
+            cache_days=verif_cache_days,
+            max_workers=int(vcfg.get("max_workers", DEFAULT_MAX_WORKERS)),
+            bulk_threshold=int(vcfg.get("bulk_threshold", DEFAULT_BULK_THRESHOLD)),
+        )
 
+    # Pass 2: verification results, deliverability canonicalization and allow-list
+    for row in candidates:
+        print(f"\nChecking {row.get('Email')}:")
         # --- Verification (ZeroBounce) ---
         if verif_enabled and verif_provider == "zerobounce":
             if (row.get("Deliverability") or "").strip():
-                # Deliverability already set, skip API call
-                print("  Deliverability already set; skipping ZeroBounce API call")
+                # Deliverability already set, no API call was made
+                print("  Deliverability already set; skipped ZeroBounce API call")
                 v = {
                     "status": "",
                     "reason": "",
@@ -214,8 +169,7 @@ def preflight_filter(
                     "deliverability": row.get("Deliverability").strip()
                 }
             else:
-                print(f"  Calling ZeroBounce API for email: {row.get('Email')}")
-                v = verify_with_zerobounce(row.get("Email"), cache_days=verif_cache_days)
+                v = verified[(row.get("Email") or "").strip().lower()]
             # Persist mapped Deliverability in-memory so allow-list can act on it
             if v.get("deliverability"):
                 row["Deliverability"] = v["deliverability"]
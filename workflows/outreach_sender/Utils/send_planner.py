@@ -0,0 +1,331 @@
+"""
+Day-ahead send planner
+----------------------
+Turns "send N openers today" into a time-slotted schedule per inbox, instead of
+checking the window once and pacing by jitter until the leads (or the day) run out.
+
+How a plan is built (`plan_day`):
+- Work items are openers (this run's eligible leads, routed to an inbox) and
+  follow-ups due today for the same inboxes (`followup_work`, read from the CRM with
+  the follow-up engine's Delays.json). Follow-ups come first in a priority queue, so
+  they keep their capacity; openers fill what is left.
+- Capacity per inbox = `per_inbox_limit` minus what it already sent today (shared
+  send limiter counts), further bounded by how many sends fit in the rest of the
+  window at `min_gap_sec` spacing. `daily_limit` caps openers across all inboxes
+  (follow-ups were never counted against it).
+- Each inbox's items are spread evenly over the remaining window (follow-ups and
+  openers interleaved), inboxes are phase-shifted against each other, and every
+  slot gets a small jitter so the cadence doesn't look machine-made.
+
+Follow-up slots are reservations only: the follow-up engine still sends them on
+its own run; the dispatcher sends the opener slots (`SendPlan.openers`).
+
+`PlanReport` collects what actually happened per slot (sent/failed, drift between
+slot time and actual send start) and prints a one-line summary at the end of the run.
+
+Integrate from sequence_runner.py (example):
+
+    plan = plan_day(
+        opener_work(leads, sender_pool, choose_inbox_cb) + followup_work(rows, sender_pool),
+        sender_pool,
+        window_start=now, window_end=end_of_window,
+        daily_limit=controls["daily_limit"], per_inbox_limit=controls["per_inbox_limit"],
+        sent_today=get_send_limiter().sent_today,
+    )
+    run_parallel_dispatch(..., plan=plan)
+"""
+from __future__ import annotations
+
+import heapq
+import json
+import random
+import re
+import statistics
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+Lead = Dict[str, Any]
+
+FOLLOWUP_DELAYS_PATH = Path(__file__).resolve().parents[2] / "followup_engine" / "engine" / "settings" / "Delays.json"
+
+# Lower runs first when capacity is short
+PRIORITY = {"followup": 0, "opener": 1}
+
+_FOLLOWUP_RE = re.compile(r"follow[\s\-]?up\s*(\d)|\bfu\s*(\d)\b")
+_OPENER_STAGES = {"opener sent", "opener", "open", "open or sent", "opener - sent"}
+_LAST_SENT_COLS = ("Last Message Sent Time Stamp", "Last Message Sent Timestamp")
+_TS_FORMATS = ("%Y-%m-%dT%H:%M:%S.%fZ", "%Y-%m-%dT%H:%M:%SZ", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d %H:%M:%S", "%Y-%m-%d")
+
+
+class SendSlot:
+    __slots__ = ("at", "inbox", "kind", "lead")
+
+    def __init__(self, at: float, inbox: str, kind: str, lead: Lead) -> None:
+        self.at = at          # epoch seconds
+        self.inbox = inbox
+        self.kind = kind      # "opener" | "followup"
+        self.lead = lead
+
+    def __repr__(self) -> str:
+        when = datetime.fromtimestamp(self.at).strftime("%H:%M:%S")
+        return f"SendSlot({when}, {self.inbox}, {self.kind}, {self.lead.get('Email')})"
+
+
+class PlanReport:
+    """Outcome of a plan: capacity used and slot drift."""
+
+    def __init__(self, planned: int, capacity: int) -> None:
+        self.planned = planned
+        self.capacity = capacity
+        self.sent = 0
+        self.failed = 0
+        self.drifts: List[float] = []
+
+    def record(self, slot_at: float, started_at: float, ok: bool) -> None:
+        """Account one dispatched slot (drift = actual send start - slot time, seconds)."""
+        self.drifts.append(started_at - slot_at)
+        if ok:
+            self.sent += 1
+        else:
+            self.failed += 1
+
+    def summary(self) -> Dict[str, Any]:
+        drifts = sorted(abs(d) for d in self.drifts)
+        p95 = drifts[min(len(drifts) - 1, int(0.95 * len(drifts)))] if drifts else 0.0
+        return {
+            "planned": self.planned,
+            "capacity": self.capacity,
+            "sent": self.sent,
+            "failed": self.failed,
+            "unused": max(0, self.planned - self.sent - self.failed),
+            "capacity_used_pct": round(100.0 * self.sent / self.capacity, 1) if self.capacity else 0.0,
+            "plan_used_pct": round(100.0 * self.sent / self.planned, 1) if self.planned else 0.0,
+            "drift_mean_s": round(statistics.fmean(self.drifts), 1) if self.drifts else 0.0,
+            "drift_abs_p95_s": round(p95, 1),
+            "drift_abs_max_s": round(drifts[-1], 1) if drifts else 0.0,
+        }
+
+    def log(self) -> None:
+        s = self.summary()
+        print(
+            f"[PLAN] Sent {s['sent']}/{s['planned']} planned opener slot(s) ({s['plan_used_pct']}%), "
+            f"{s['capacity_used_pct']}% of opener capacity {s['capacity']}; failed {s['failed']}, unused {s['unused']} | "
+            f"drift mean {s['drift_mean_s']:+.1f}s, |p95| {s['drift_abs_p95_s']}s, |max| {s['drift_abs_max_s']}s"
+        )
+
+
+class SendPlan:
+    def __init__(
+        self,
+        slots: Dict[str, List[SendSlot]],
+        unplanned: List[Tuple[str, str, Lead]],
+        capacity: Dict[str, int],
+        window: Tuple[float, float],
+    ) -> None:
+        self.slots = slots              # inbox -> slots in time order (openers and follow-ups)
+        self.unplanned = unplanned      # (inbox, kind, lead) that did not fit today
+        self.capacity = capacity        # inbox -> sends that fit today (after sent_today / window)
+        self.window = window
+        self.report = PlanReport(planned=len(self.openers()), capacity=self._opener_capacity())
+
+    def openers(self, inbox: Optional[str] = None) -> List[SendSlot]:
+        """Opener slots (what the dispatcher sends), for one inbox or all in time order."""
+        if inbox is not None:
+            return [s for s in self.slots.get(inbox, []) if s.kind == "opener"]
+        return [s for s in self.timeline() if s.kind == "opener"]
+
+    def timeline(self) -> List[SendSlot]:
+        """All slots across inboxes, merged in time order."""
+        return list(heapq.merge(*self.slots.values(), key=lambda s: s.at))
+
+    def _opener_capacity(self) -> int:
+        reserved = sum(1 for slots in self.slots.values() for s in slots if s.kind == "followup")
+        return max(0, sum(self.capacity.values()) - reserved)
+
+    def log(self) -> None:
+        start, end = (datetime.fromtimestamp(t).strftime("%H:%M") for t in self.window)
+        print(f"[PLAN] Window {start}-{end}: {len(self.openers())} opener slot(s), "
+              f"{sum(len(v) for v in self.slots.values()) - len(self.openers())} follow-up slot(s) reserved, "
+              f"{len(self.unplanned)} item(s) left for another day.")
+        for inbox, slots in self.slots.items():
+            if not slots:
+                continue
+            first, last = (datetime.fromtimestamp(s.at).strftime("%H:%M") for s in (slots[0], slots[-1]))
+            n_open = sum(1 for s in slots if s.kind == "opener")
+            print(f"[PLAN]   {inbox}: {len(slots)}/{self.capacity.get(inbox, 0)} slot(s) "
+                  f"({n_open} opener, {len(slots) - n_open} follow-up), {first}-{last}")
+
+
+def opener_work(
+    leads: Iterable[Lead],
+    sender_pool: List[str],
+    choose_inbox_cb: Callable[[Lead, List[str]], str],
+) -> List[Tuple[str, str, Lead]]:
+    """(inbox, "opener", lead) for this run's leads, routed with the dispatcher's callback."""
+    work = []
+    for i, lead in enumerate(leads):
+        try:
+            inbox = choose_inbox_cb(lead, sender_pool)
+        except Exception:
+            inbox = sender_pool[i % len(sender_pool)]
+        work.append((inbox, "opener", lead))
+    return work
+
+
+def _load_delays(path: Path = FOLLOWUP_DELAYS_PATH) -> Dict[str, Any]:
+    try:
+        return json.loads(path.read_text())
+    except Exception as e:
+        print(f"[PLAN] Could not read follow-up delays from {path}: {e}")
+        return {}
+
+
+def _parse_ts(value: str) -> Optional[datetime]:
+    value = (value or "").strip()
+    for fmt in _TS_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def _followup_due(row: Lead, delays: Dict[str, Any], now_utc: datetime) -> bool:
+    """Mirror of the follow-up engine's gates: next touch exists and its delay has passed."""
+    stage = (row.get("Sequence Stage") or "").strip()
+    s = stage.lower()
+    if not s:
+        return False
+    if s not in _OPENER_STAGES:
+        m = _FOLLOWUP_RE.search(s)
+        if not m or int(m.group(1) or m.group(2)) >= 6:
+            return False
+    rule = delays.get(stage)
+    days = rule.get("days") if isinstance(rule, dict) else rule
+    try:
+        days = int(days) if days is not None else 0
+    except (TypeError, ValueError):
+        days = 0
+    if not days:
+        return True
+    last = next((_parse_ts(row.get(c, "")) for c in _LAST_SENT_COLS if (row.get(c) or "").strip()), None)
+    return last is None or now_utc - last >= timedelta(days=days)
+
+
+def followup_work(
+    rows: Iterable[Lead],
+    sender_pool: List[str],
+    *,
+    delays: Optional[Dict[str, Any]] = None,
+    now_utc: Optional[datetime] = None,
+) -> List[Tuple[str, str, Lead]]:
+    """(inbox, "followup", row) for every lead the follow-up engine would send to today from `sender_pool`."""
+    delays = _load_delays() if delays is None else delays
+    now_utc = now_utc or datetime.utcnow()
+    pool = {s.strip().lower(): s for s in sender_pool}
+    work = []
+    for row in rows:
+        inbox = pool.get((row.get("Owner / Assigned To") or "").strip().lower())
+        if not inbox:
+            continue
+        if "yes" in ((row.get("Responded?") or "").strip().lower(), (row.get("Replied?") or "").strip().lower()):
+            continue
+        if (row.get("Messaging Status") or "").strip().lower() == "paused":
+            continue
+        if (row.get("Deliverability") or "").strip().lower() != "safe":
+            continue
+        if _followup_due(row, delays, now_utc):
+            work.append((inbox, "followup", row))
+    return work
+
+
+def _interleave(items: List[Tuple[str, Lead]]) -> List[Tuple[str, Lead]]:
+    """Spread each kind evenly through the list (j-th of n items sits at (j + 0.5) / n)."""
+    by_kind: Dict[str, List[Lead]] = {}
+    for kind, lead in items:
+        by_kind.setdefault(kind, []).append(lead)
+    keyed = [
+        ((j + 0.5) / len(leads), PRIORITY.get(kind, 9), kind, lead)
+        for kind, leads in by_kind.items()
+        for j, lead in enumerate(leads)
+    ]
+    keyed.sort(key=lambda k: (k[0], k[1]))
+    return [(kind, lead) for _, _, kind, lead in keyed]
+
+
+def plan_day(
+    work: Iterable[Tuple[str, str, Lead]],
+    sender_pool: List[str],
+    *,
+    window_start: datetime,
+    window_end: datetime,
+    daily_limit: Optional[int],
+    per_inbox_limit: int,
+    sent_today: Optional[Callable[[str], int]] = None,
+    min_gap_sec: float = 60.0,
+    jitter_frac: float = 0.25,
+    rng: Optional[random.Random] = None,
+) -> SendPlan:
+    """Build today's slotted schedule from (inbox, kind, lead) work items.
+
+    `window_start` is normally now (the planner only uses the rest of the window).
+    Items for inboxes outside `sender_pool`, or beyond an inbox's capacity, end up in
+    `SendPlan.unplanned`.
+    """
+    rng = rng or random.Random()
+    start, end = window_start.timestamp(), window_end.timestamp()
+    span = max(0.0, end - start)
+    fit = int(span // max(1.0, min_gap_sec))
+
+    capacity: Dict[str, int] = {}
+    for inbox in sender_pool:
+        used = 0
+        if sent_today is not None:
+            try:
+                used = int(sent_today(inbox) or 0)
+            except Exception as e:
+                print(f"[PLAN] sent_today failed for {inbox}: {e}")
+        capacity[inbox] = max(0, min(int(per_inbox_limit) - used, fit))
+
+    # Priority queue across all inboxes: follow-ups before openers, then input order
+    heap: List[Tuple[int, int, str, str, Lead]] = []
+    for seq, (inbox, kind, lead) in enumerate(work):
+        heapq.heappush(heap, (PRIORITY.get(kind, 9), seq, inbox, kind, lead))
+
+    remaining = dict(capacity)
+    openers_left = int(daily_limit) if daily_limit else None
+    assigned: Dict[str, List[Tuple[str, Lead]]] = {inbox: [] for inbox in sender_pool}
+    unplanned: List[Tuple[str, str, Lead]] = []
+    while heap:
+        _, _, inbox, kind, lead = heapq.heappop(heap)
+        if remaining.get(inbox, 0) <= 0 or (kind == "opener" and openers_left is not None and openers_left <= 0):
+            unplanned.append((inbox, kind, lead))
+            continue
+        remaining[inbox] -= 1
+        if kind == "opener" and openers_left is not None:
+            openers_left -= 1
+        assigned[inbox].append((kind, lead))
+
+    slots: Dict[str, List[SendSlot]] = {}
+    active = [ib for ib in sender_pool if assigned[ib]]
+    for idx, inbox in enumerate(active):
+        items = _interleave(assigned[inbox])
+        gap = span / len(items)
+        # Phase-shift inboxes so they don't all send at the same moments
+        phase = (idx + 0.5) / len(active)
+        slots[inbox] = [
+            SendSlot(
+                min(end - 1.0, max(start, start + (k + phase) * gap + rng.uniform(-0.5, 0.5) * jitter_frac * gap)),
+                inbox,
+                kind,
+                lead,
+            )
+            for k, (kind, lead) in enumerate(items)
+        ]
+        slots[inbox].sort(key=lambda s: s.at)
+
+    return SendPlan(slots, unplanned, capacity, (start, end))
+
+
+__all__ = ["SendSlot", "SendPlan", "PlanReport", "plan_day", "opener_work", "followup_work"]
@@ -0,0 +1,339 @@
+"""
+ZeroBounce verification for many emails at once
+------------------------------------------------
+`verify_emails` is the verification stage of preflight: it takes every email that
+needs a verdict, answers what it can from the local cache, and verifies the rest in
+one go instead of one blocking request per lead:
+
+- Small batches: concurrent single-email `/v2/validate` calls (`max_workers` at a
+  time, one pooled HTTP session), each retried with exponential backoff on timeouts,
+  connection errors, 429 and 5xx.
+- Large batches (>= `bulk_threshold`): the bulk-file API (`/v2/sendfile`, poll
+  `/v2/filestatus`, `/v2/getfile`). If the bulk job fails or times out, whatever is
+  still unverified falls back to concurrent single calls.
+
+The cache (email_verify_cache.json) is loaded once per stage and written every
+`save_every` new results plus once at the end (atomic replace, merged with whatever
+another process wrote meanwhile), instead of a full rewrite per email.
+
+Endpoints come from ZB_API_BASE / ZB_BULK_API_BASE so a local stub
+(benchmarks/zerobounce_stub.py) can stand in for the provider:
+
+    ZB_API_BASE=http://127.0.0.1:8765 ZB_BULK_API_BASE=http://127.0.0.1:8765 ...
+"""
+from __future__ import annotations
+
+import csv
+import io
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+UTILS_DIR = Path(__file__).parent
+VERIFY_CACHE_PATH = Path(os.getenv("ZB_VERIFY_CACHE_PATH") or (UTILS_DIR / "email_verify_cache.json"))
+# We also support a repo-level creds file if ENV is not set
+REPO_ROOT = UTILS_DIR.parents[2] if len(UTILS_DIR.parents) >= 2 else UTILS_DIR
+ZB_CREDS_PATH = REPO_ROOT / "Creds" / "zerobounce_key.json"
+
+ZB_API_BASE = os.getenv("ZB_API_BASE", "https://api.zerobounce.net").rstrip("/")
+ZB_BULK_API_BASE = os.getenv("ZB_BULK_API_BASE", "https://bulkapi.zerobounce.net").rstrip("/")
+
+DEFAULT_MAX_WORKERS = int(os.getenv("ZB_MAX_WORKERS", "16"))
+DEFAULT_BULK_THRESHOLD = int(os.getenv("ZB_BULK_THRESHOLD", "1000"))
+REQUEST_TIMEOUT_SEC = 12.0
+RETRIES = 3
+BULK_POLL_SEC = float(os.getenv("ZB_BULK_POLL_SEC", "10"))
+BULK_TIMEOUT_SEC = float(os.getenv("ZB_BULK_TIMEOUT_SEC", "1800"))
+
+_RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+def _today_str() -> str:
+    return datetime.today().strftime("%Y-%m-%d")
+
+
+def _unknown(reason: str) -> Dict[str, str]:
+    return {"status": "unknown", "reason": reason, "date": _today_str(), "deliverability": "Risky"}
+
+
+def load_zb_key_and_cache_days() -> Tuple[str, int]:
+    """Load ZeroBounce API key and default cache_days.
+    Priority: ENV var ZB_API_KEY > Creds/zerobounce_key.json > defaults.
+    Returns: (api_key, cache_days)
+    """
+    key = (os.getenv("ZB_API_KEY") or "").strip()
+    if key:
+        return key, 14
+    try:
+        if ZB_CREDS_PATH.exists():
+            data = json.load(open(ZB_CREDS_PATH, "r", encoding="utf-8"))
+            return (data.get("ZB_API_KEY", ""), int(data.get("cache_days", 14)))
+    except Exception:
+        pass
+    return "", 14
+
+
+def load_verify_cache(path: Path = VERIFY_CACHE_PATH) -> Dict[str, Dict]:
+    try:
+        if path.exists():
+            return json.load(open(path, "r", encoding="utf-8"))
+    except Exception:
+        pass
+    return {}
+
+
+def save_verify_cache(updates: Dict[str, Dict], path: Path = VERIFY_CACHE_PATH) -> None:
+    """Merge `updates` into the cache file (atomic replace)."""
+    if not updates:
+        return
+    try:
+        cache = load_verify_cache(path)
+        cache.update(updates)
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(cache, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, path)
+    except Exception as e:
+        print(f"[zerobounce] cache save failed: {e}")
+
+
+def cached_result(cache: Dict[str, Dict], email: str, cache_days: int) -> Optional[Dict[str, str]]:
+    cached = cache.get(email.lower())
+    if cached:
+        try:
+            d = datetime.strptime(cached.get("date", ""), "%Y-%m-%d")
+            if (datetime.today() - d).days <= cache_days:
+                return cached
+        except Exception:
+            pass
+    return None
+
+
+def normalize(raw_status: str, sub_status: str) -> Dict[str, str]:
+    """Map a ZeroBounce status/sub_status to the CRM's verification fields."""
+    raw = (raw_status or "").strip().lower()  # valid, invalid, catch-all, unknown, spamtrap, abuse, do_not_mail
+    sub = (sub_status or "").replace("_", " ")
+    if raw == "valid":
+        deliverability = "Safe"; norm = "deliverable"
+    elif raw == "catch-all":
+        deliverability = "Catch All"; norm = "catch-all"
+    elif raw in {"invalid"}:
+        deliverability = "Risky"; norm = "undeliverable"
+    elif raw in {"spamtrap", "abuse", "do_not_mail"}:
+        deliverability = "Risky"; norm = raw
+    else:
+        deliverability = "Risky"; norm = raw or "unknown"
+    return {"status": norm, "reason": sub, "date": _today_str(), "deliverability": deliverability}
+
+
+class ZeroBounceClient:
+    """Thread-safe client: one pooled session, retry/backoff per request."""
+
+    def __init__(self, api_key: str, *, max_workers: int = DEFAULT_MAX_WORKERS,
+                 timeout: float = REQUEST_TIMEOUT_SEC, retries: int = RETRIES,
+                 api_base: Optional[str] = None, bulk_api_base: Optional[str] = None) -> None:
+        self.api_key = api_key
+        self.max_workers = max(1, int(max_workers))
+        self.timeout = timeout
+        self.retries = max(0, int(retries))
+        self.api_base = (api_base or ZB_API_BASE).rstrip("/")
+        self.bulk_api_base = (bulk_api_base or ZB_BULK_API_BASE).rstrip("/")
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=self.max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._stats_lock = threading.Lock()
+        self.stats = {"requests": 0, "retries": 0, "errors": 0}
+
+    def _count(self, key: str) -> None:
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def _request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """One HTTP call with exponential backoff on transient failures (raises after the last try)."""
+        delay = 1.0
+        for attempt in range(self.retries + 1):
+            self._count("requests")
+            try:
+                r = self.session.request(method, url, timeout=self.timeout, **kwargs)
+                if r.status_code not in _RETRY_STATUS:
+                    return r
+                err: Exception = requests.HTTPError(f"HTTP {r.status_code}", response=r)
+                retry_after = r.headers.get("Retry-After")
+                if retry_after and retry_after.isdigit():
+                    delay = max(delay, float(retry_after))
+            except (requests.ConnectionError, requests.Timeout) as e:
+                err = e
+            if attempt == self.retries:
+                raise err
+            self._count("retries")
+            time.sleep(delay * (0.5 + random.random()))
+            delay = min(delay * 2, 30.0)
+        raise RuntimeError("unreachable")
+
+    def validate(self, email: str) -> Tuple[Dict[str, str], bool]:
+        """Verify one email. Returns (result, cacheable); transport failures are not cacheable."""
+        try:
+            r = self._request("GET", f"{self.api_base}/v2/validate", params={"api_key": self.api_key, "email": email})
+            data = r.json() if r.ok else {}
+        except Exception as e:
+            self._count("errors")
+            return _unknown(f"verify_error:{type(e).__name__}"), False
+        if data.get("error"):  # e.g. invalid key / no credits, reported with HTTP 200
+            self._count("errors")
+            return _unknown(f"verify_error:{data['error']}"), False
+        return normalize(data.get("status"), data.get("sub_status")), bool(data)
+
+    def validate_many(self, emails: List[str], on_result=None) -> Dict[str, Tuple[Dict[str, str], bool]]:
+        """Concurrent `validate` calls, at most `max_workers` in flight."""
+        out: Dict[str, Tuple[Dict[str, str], bool]] = {}
+        if not emails:
+            return out
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(emails)), thread_name_prefix="zb") as pool:
+            futures = {pool.submit(self.validate, e): e for e in emails}
+            for fut in as_completed(futures):
+                email = futures[fut]
+                out[email] = fut.result()
+                if on_result:
+                    on_result(email, *out[email])
+        return out
+
+    def validate_bulk_file(self, emails: List[str], *, poll_sec: float = BULK_POLL_SEC,
+                           max_wait_sec: float = BULK_TIMEOUT_SEC) -> Dict[str, Dict[str, str]]:
+        """Verify via the bulk-file API. Returns {email: result} for the rows the provider returned."""
+        buf = io.StringIO()
+        w = csv.writer(buf)
+        w.writerow(["email"])
+        for e in emails:
+            w.writerow([e])
+        r = self._request(
+            "POST", f"{self.bulk_api_base}/v2/sendfile",
+            data={"api_key": self.api_key, "email_address_column": 1, "has_header_row": "true"},
+            files={"file": ("emails.csv", buf.getvalue().encode("utf-8"), "text/csv")},
+        )
+        data = r.json() if r.ok else {}
+        file_id = data.get("file_id")
+        if not file_id:
+            raise RuntimeError(f"sendfile failed: {data.get('message') or r.status_code}")
+        print(f"[zerobounce] bulk file {file_id} submitted ({len(emails)} emails)")
+
+        deadline = time.monotonic() + max_wait_sec
+        while True:
+            st = self._request("GET", f"{self.bulk_api_base}/v2/filestatus",
+                               params={"api_key": self.api_key, "file_id": file_id}).json()
+            status = (st.get("file_status") or "").lower()
+            if status == "complete":
+                break
+            if status in {"deleted", "failed"} or "error" in status:
+                raise RuntimeError(f"bulk file {file_id} {status}")
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"bulk file {file_id} not complete after {max_wait_sec:g}s ({st.get('complete_percentage', '?')})")
+            time.sleep(poll_sec)
+
+        r = self._request("GET", f"{self.bulk_api_base}/v2/getfile", params={"api_key": self.api_key, "file_id": file_id})
+        results: Dict[str, Dict[str, str]] = {}
+        for row in csv.DictReader(io.StringIO(r.text)):
+            cols = {k.strip().lower(): (v or "") for k, v in row.items() if k}
+            email = (cols.get("email") or cols.get("email address") or "").strip()
+            if email:
+                results[email.lower()] = normalize(cols.get("zb status", ""), cols.get("zb sub status", ""))
+        return results
+
+
+def verify_emails(
+    emails: Iterable[str],
+    cache_days: int = 14,
+    *,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    bulk_threshold: int = DEFAULT_BULK_THRESHOLD,
+    retries: int = RETRIES,
+    save_every: int = 200,
+    cache_path: Path = VERIFY_CACHE_PATH,
+) -> Dict[str, Dict[str, str]]:
+    """
+    Verify a batch of emails (cache first, then ZeroBounce). Returns {email.lower(): result}
+    where result has the same keys as `verify_with_zerobounce`: status, reason, date, deliverability.
+    `bulk_threshold=0` disables the bulk-file API.
+    """
+    results: Dict[str, Dict[str, str]] = {}
+    todo: List[str] = []
+    queued = set()
+    cache = load_verify_cache(cache_path)
+    for raw in emails:
+        email = (raw or "").strip()
+        key = email.lower()
+        if key in results or key in queued:
+            continue
+        if not email or "@" not in email:
+            results[key] = _unknown("bad_format")
+            continue
+        hit = cached_result(cache, email, cache_days)
+        if hit:
+            results[key] = hit
+        else:
+            todo.append(key)
+            queued.add(key)
+    print(f"[zerobounce] {len(results)} from cache/format check, {len(todo)} to verify")
+    if not todo:
+        return results
+
+    api_key, _ = load_zb_key_and_cache_days()
+    if not api_key:
+        for key in todo:
+            results[key] = _unknown("no_api_key")
+        return results
+
+    client = ZeroBounceClient(api_key, max_workers=max_workers, retries=retries)
+    pending: Dict[str, Dict] = {}
+    started = time.perf_counter()
+
+    def _record(email: str, result: Dict[str, str], cacheable: bool) -> None:
+        results[email] = result
+        if cacheable:
+            pending[email] = result
+            if len(pending) >= save_every:
+                save_verify_cache(dict(pending), cache_path)
+                pending.clear()
+
+    try:
+        if bulk_threshold and len(todo) >= bulk_threshold:
+            try:
+                for email, result in client.validate_bulk_file(todo).items():
+                    if email in queued:
+                        _record(email, result, True)
+            except Exception as e:
+                print(f"[zerobounce] bulk file verification failed ({e}); falling back to single calls")
+        remaining = [e for e in todo if e not in results]
+        client.validate_many(remaining, on_result=_record)
+    finally:
+        save_verify_cache(pending, cache_path)
+
+    elapsed = time.perf_counter() - started
+    print(
+        f"[zerobounce] verified {len(todo)} in {elapsed:.1f}s "
+        f"({len(todo) / max(elapsed, 1e-9):.1f}/s; requests={client.stats['requests']} "
+        f"retries={client.stats['retries']} errors={client.stats['errors']})"
+    )
+    return results
+
+
+__all__ = [
+    "ZeroBounceClient",
+    "verify_emails",
+    "normalize",
+    "load_verify_cache",
+    "save_verify_cache",
+    "load_zb_key_and_cache_days",
+    "VERIFY_CACHE_PATH",
+    "ZB_API_BASE",
+    "ZB_BULK_API_BASE",
+]
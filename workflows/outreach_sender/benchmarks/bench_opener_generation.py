@@ -0,0 +1,124 @@
+"""
+Side-by-side benchmark: 4-call opener chain vs. single structured call.
+
+Runs both generation modes against the same sample of CRM leads (completion cache
+bypassed so every call hits the API) and prints per-lead latency, call count and
+token spend for each mode. Nothing is sent and the CRM is not modified.
+
+Run:
+    python -m workflows.outreach_sender.benchmarks.bench_opener_generation --client "Acme" --leads 5
+"""
+import argparse
+import os
+import statistics
+import time
+from pathlib import Path
+
+# Measure real API latency/tokens, not cache hits
+os.environ["LLM_CACHE_BYPASS"] = "1"
+
+from workflows.outreach_sender.AI_Intergrations.opener_ai_writer import generate_email as gen_opener_email
+from workflows.outreach_sender.AI_Intergrations.opener_ai_writer import generate_generic_subject
+from workflows.outreach_sender.AI_Intergrations.personalizer import personalize_email, personalize_subject
+from workflows.outreach_sender.AI_Intergrations.structured_writer import generate_personalized_opener
+from workflows.outreach_sender.Utils.opener_utils import sanitize_email_fields
+from workflows.universal_outreach_utils.crm_store import CRMStore
+from workflows.universal_outreach_utils.llm_gateway import get_gateway
+
+CRM_PATH = Path("/Users/kevinnovanta/backend_for_ai_agency/data/leads/CRM_Leads/CRM_leads_copy.csv")
+
+CHAIN_LABELS = ("opener.email", "opener.generic_subject", "personalizer.email", "personalizer.subject")
+STRUCTURED_LABELS = ("opener.structured",)
+
+
+def run_chain(lead):
+    base_email = gen_opener_email(lead)
+    base_email["subject"] = generate_generic_subject(lead).get("subject", base_email.get("subject", ""))
+    final_email = personalize_email(base_email.get("subject", ""), base_email.get("body_html", ""), lead)
+    final_email["subject"] = personalize_subject(final_email.get("subject", ""), lead).get("subject", final_email.get("subject", ""))
+    return final_email
+
+
+def run_structured(lead):
+    return generate_personalized_opener(lead)
+
+
+def _usage(labels):
+    stats = get_gateway().stats()
+    totals = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0}
+    for label in labels:
+        for k in totals:
+            totals[k] += int(stats.get(label, {}).get(k, 0))
+    return totals
+
+
+def bench(name, fn, labels, leads):
+    before = _usage(labels)
+    latencies, failures, samples = [], 0, []
+    for lead in leads:
+        started = time.perf_counter()
+        try:
+            out = fn(lead)
+            subject, body = sanitize_email_fields(out.get("subject", ""), out.get("body_html", ""))
+            samples.append((lead.get("Email", ""), subject, len(body.split())))
+        except Exception as e:
+            failures += 1
+            print(f"[bench] {name}: {lead.get('Email')} failed: {e}")
+        latencies.append(time.perf_counter() - started)
+    after = _usage(labels)
+    used = {k: after[k] - before[k] for k in after}
+    n = max(1, len(leads))
+    return {
+        "mode": name,
+        "leads": len(leads),
+        "failures": failures,
+        "mean_s": statistics.mean(latencies) if latencies else 0.0,
+        "p50_s": statistics.median(latencies) if latencies else 0.0,
+        "max_s": max(latencies) if latencies else 0.0,
+        "calls_per_lead": used["calls"] / n,
+        "tokens_in_per_lead": used["prompt_tokens"] / n,
+        "tokens_out_per_lead": used["completion_tokens"] / n,
+        "samples": samples,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark 4-call chain vs. structured opener generation.")
+    ap.add_argument("--client", help="Client Name to sample leads from (default: any)")
+    ap.add_argument("--leads", type=int, default=5, help="Number of leads to generate for (default 5)")
+    ap.add_argument("--crm", default=str(CRM_PATH), help="CRM CSV path")
+    args = ap.parse_args()
+
+    leads = [r for r in CRMStore.for_csv(args.crm).rows(client=args.client) if (r.get("Email") or "").strip()]
+    leads = leads[: args.leads]
+    if not leads:
+        print("[bench] No leads found.")
+        return
+
+    results = [
+        bench("chain", run_chain, CHAIN_LABELS, leads),
+        bench("structured", run_structured, STRUCTURED_LABELS, leads),
+    ]
+
+    print("\n=== Opener generation benchmark ===")
+    print(f"{'mode':<12}{'leads':>6}{'fail':>6}{'mean s':>9}{'p50 s':>9}{'max s':>9}{'calls':>7}{'tok in':>9}{'tok out':>9}")
+    for r in results:
+        print(
+            f"{r['mode']:<12}{r['leads']:>6}{r['failures']:>6}{r['mean_s']:>9.2f}{r['p50_s']:>9.2f}{r['max_s']:>9.2f}"
+            f"{r['calls_per_lead']:>7.1f}{r['tokens_in_per_lead']:>9.0f}{r['tokens_out_per_lead']:>9.0f}"
+        )
+    chain, structured = results
+    if structured["mean_s"] > 0:
+        print(f"\nLatency speedup: {chain['mean_s'] / structured['mean_s']:.2f}x")
+    tokens_chain = chain["tokens_in_per_lead"] + chain["tokens_out_per_lead"]
+    tokens_structured = structured["tokens_in_per_lead"] + structured["tokens_out_per_lead"]
+    if tokens_structured > 0:
+        print(f"Token reduction: {tokens_chain / tokens_structured:.2f}x")
+
+    print("\n--- Sample subjects (chain | structured) ---")
+    for (email, s1, w1), (_, s2, w2) in zip(chain["samples"], structured["samples"]):
+        print(f"{email}: {s1!r} ({w1}w) | {s2!r} ({w2}w)")
+
+
+if __name__ == "__main__":
+    main()
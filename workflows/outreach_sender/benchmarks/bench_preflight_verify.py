@@ -0,0 +1,100 @@
+"""
+Verification throughput benchmark: per-lead sequential calls vs. the batched stage.
+
+Starts the local ZeroBounce stub (zerobounce_stub.py) in-process, points the verifier
+at it and verifies the same synthetic addresses three ways, each with an empty cache:
+
+    sequential   one request at a time (old preflight behaviour; timed on a sample and extrapolated)
+    concurrent   verify_emails() with --workers single calls in flight
+    bulk         verify_emails() through the bulk-file endpoints
+
+Nothing touches the real cache, the CRM or the ZeroBounce account.
+
+Run:
+    python -m workflows.outreach_sender.benchmarks.bench_preflight_verify --emails 5000 --latency-ms 400
+"""
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from workflows.outreach_sender.benchmarks.zerobounce_stub import start_stub
+
+
+def bench(name, verify, emails, cache_path: Path, extrapolate_to: int = 0):
+    cache_path.unlink(missing_ok=True)
+    started = time.perf_counter()
+    results = verify(emails)
+    elapsed = time.perf_counter() - started
+    unknown = sum(1 for r in results.values() if r.get("status") == "unknown")
+    total_s = elapsed * extrapolate_to / len(emails) if extrapolate_to else elapsed
+    return {
+        "mode": name,
+        "emails": extrapolate_to or len(emails),
+        "measured": len(emails),
+        "seconds": total_s,
+        "per_sec": (extrapolate_to or len(emails)) / max(total_s, 1e-9),
+        "unknown": unknown,
+        "estimated": bool(extrapolate_to),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark ZeroBounce verification against a local stub.")
+    ap.add_argument("--emails", type=int, default=5000, help="Synthetic addresses to verify (default 5000)")
+    ap.add_argument("--workers", type=int, default=16, help="Concurrent single calls (default 16)")
+    ap.add_argument("--latency-ms", type=float, default=400.0, help="Stub /v2/validate mean latency (default 400)")
+    ap.add_argument("--error-rate", type=float, default=0.02, help="Stub transient error rate (default 0.02)")
+    ap.add_argument("--bulk-sec-per-1k", type=float, default=2.0, help="Stub bulk processing time per 1,000 emails")
+    ap.add_argument("--sequential-sample", type=int, default=50, help="Addresses timed for the sequential estimate")
+    args = ap.parse_args()
+
+    server, base = start_stub(
+        latency_ms=args.latency_ms, error_rate=args.error_rate, bulk_sec_per_1k=args.bulk_sec_per_1k
+    )
+    tmpdir = Path(tempfile.mkdtemp(prefix="zb-bench-"))
+    cache_path = tmpdir / "email_verify_cache.json"
+    os.environ.update({
+        "ZB_API_BASE": base,
+        "ZB_BULK_API_BASE": base,
+        "ZB_API_KEY": "stub",
+        "ZB_BULK_POLL_SEC": "1",
+    })
+    # Import after the env points at the stub (endpoints are read at import time)
+    from workflows.outreach_sender.Utils import zerobounce
+
+    emails = [f"lead{i:05d}@example{i % 97}.com" for i in range(args.emails)]
+    sample = emails[: max(1, min(args.sequential_sample, len(emails)))]
+
+    def sequential(batch):
+        client = zerobounce.ZeroBounceClient("stub", max_workers=1)
+        return {e: client.validate(e)[0] for e in batch}
+
+    def concurrent(batch):
+        return zerobounce.verify_emails(batch, max_workers=args.workers, bulk_threshold=0, cache_path=cache_path)
+
+    def bulk(batch):
+        return zerobounce.verify_emails(batch, max_workers=args.workers, bulk_threshold=1, cache_path=cache_path)
+
+    results = [
+        bench("sequential", sequential, sample, cache_path, extrapolate_to=len(emails)),
+        bench("concurrent", concurrent, emails, cache_path),
+        bench("bulk", bulk, emails, cache_path),
+    ]
+    server.shutdown()
+
+    print(f"\n=== Verification benchmark ({len(emails)} emails, stub latency {args.latency_ms:g}ms, errors {args.error_rate:.0%}) ===")
+    print(f"{'mode':<12}{'emails':>8}{'seconds':>10}{'per sec':>10}{'unknown':>9}")
+    for r in results:
+        note = f"  (estimated from {r['measured']})" if r["estimated"] else ""
+        print(f"{r['mode']:<12}{r['emails']:>8}{r['seconds']:>10.1f}{r['per_sec']:>10.1f}{r['unknown']:>9}{note}")
+    seq = results[0]["seconds"]
+    for r in results[1:]:
+        if r["seconds"] > 0:
+            print(f"{r['mode']} speedup vs sequential: {seq / r['seconds']:.1f}x")
+    print(f"Stub request counts: {server.counts}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Local ZeroBounce stand-in for offline verification benchmarks.
+
+Implements the endpoints preflight uses (/v2/validate, /v2/sendfile, /v2/filestatus,
+/v2/getfile) with configurable per-request latency and transient-error rate, so
+throughput, retries and the bulk-file path can be measured without credits or network.
+Verdicts are deterministic per address (hash buckets: ~80% valid, 8% catch-all,
+7% invalid, 5% unknown).
+
+Run standalone and point preflight at it:
+    python -m workflows.outreach_sender.benchmarks.zerobounce_stub --port 8765 --latency-ms 400
+    ZB_API_BASE=http://127.0.0.1:8765 ZB_BULK_API_BASE=http://127.0.0.1:8765 ZB_API_KEY=stub ...
+
+or start it in-process with start_stub() (bench_preflight_verify does).
+"""
+import argparse
+import csv
+import hashlib
+import io
+import json
+import random
+import threading
+import time
+import uuid
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def verdict(email: str):
+    """Deterministic (status, sub_status) for an address."""
+    bucket = int(hashlib.sha1(email.strip().lower().encode("utf-8")).hexdigest()[:4], 16) % 100
+    if bucket < 80:
+        return "valid", ""
+    if bucket < 88:
+        return "catch-all", ""
+    if bucket < 95:
+        return "invalid", "mailbox_not_found"
+    return "unknown", "timeout_exceeded"
+
+
+class _StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, addr, latency_ms: float, error_rate: float, bulk_sec_per_1k: float):
+        super().__init__(addr, _Handler)
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.bulk_sec_per_1k = bulk_sec_per_1k
+        self.files = {}  # file_id -> (ready_at, [emails], submitted_at)
+        self.lock = threading.Lock()
+        self.counts = {"validate": 0, "errors": 0, "sendfile": 0, "filestatus": 0, "getfile": 0}
+
+    def count(self, key: str) -> None:
+        with self.lock:
+            self.counts[key] += 1
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: _StubServer
+
+    def log_message(self, fmt, *args):  # keep benchmark output clean
+        pass
+
+    def _send(self, code: int, body, content_type: str = "application/json") -> None:
+        data = body if isinstance(body, bytes) else json.dumps(body).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        q = {k: v[0] for k, v in parse_qs(url.query).items()}
+        if url.path == "/v2/validate":
+            self.server.count("validate")
+            # Latency varies +/-50% around the configured mean
+            time.sleep(self.server.latency_ms / 1000.0 * random.uniform(0.5, 1.5))
+            if random.random() < self.server.error_rate:
+                self.server.count("errors")
+                return self._send(random.choice((429, 503)), {"error": "try again"})
+            status, sub = verdict(q.get("email", ""))
+            return self._send(200, {"address": q.get("email", ""), "status": status, "sub_status": sub})
+        if url.path == "/v2/filestatus":
+            self.server.count("filestatus")
+            with self.server.lock:
+                entry = self.server.files.get(q.get("file_id", ""))
+            if not entry:
+                return self._send(200, {"success": False, "message": "file not found"})
+            ready_at, _, submitted_at = entry
+            left = ready_at - time.monotonic()
+            if left > 0:
+                total = max(ready_at - submitted_at, 1e-9)
+                pct = max(0, min(99, int(100 * (1 - left / total))))
+                return self._send(200, {"success": True, "file_status": "Processing", "complete_percentage": f"{pct}%"})
+            return self._send(200, {"success": True, "file_status": "Complete", "complete_percentage": "100%"})
+        if url.path == "/v2/getfile":
+            self.server.count("getfile")
+            with self.server.lock:
+                entry = self.server.files.get(q.get("file_id", ""))
+            if not entry:
+                return self._send(400, {"success": False, "message": "file not found"})
+            buf = io.StringIO()
+            w = csv.writer(buf)
+            w.writerow(["email", "ZB Status", "ZB Sub Status"])
+            for e in entry[1]:
+                w.writerow([e, *verdict(e)])
+            return self._send(200, buf.getvalue().encode("utf-8"), "text/csv")
+        self._send(404, {"error": "not found"})
+
+    def do_POST(self):
+        if urlparse(self.path).path != "/v2/sendfile":
+            return self._send(404, {"error": "not found"})
+        self.server.count("sendfile")
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        msg = BytesParser(policy=HTTP).parsebytes(
+            f"Content-Type: {self.headers.get('Content-Type', '')}\r\n\r\n".encode("utf-8") + body
+        )
+        fields, file_bytes = {}, b""
+        for part in msg.iter_parts():
+            name = part.get_param("name", header="content-disposition")
+            if name == "file":
+                file_bytes = part.get_payload(decode=True) or b""
+            elif name:
+                fields[name] = part.get_content().strip()
+        rows = list(csv.reader(io.StringIO(file_bytes.decode("utf-8"))))
+        col = int(fields.get("email_address_column", 1)) - 1
+        if fields.get("has_header_row", "true").lower() == "true":
+            rows = rows[1:]
+        emails = [r[col].strip() for r in rows if len(r) > col and r[col].strip()]
+        file_id = uuid.uuid4().hex
+        now = time.monotonic()
+        with self.server.lock:
+            self.server.files[file_id] = (now + self.server.bulk_sec_per_1k * len(emails) / 1000.0, emails, now)
+        self._send(200, {"success": True, "message": "File Accepted", "file_name": "emails.csv", "file_id": file_id})
+
+
+def start_stub(port: int = 0, *, latency_ms: float = 300.0, error_rate: float = 0.02, bulk_sec_per_1k: float = 2.0):
+    """Start the stub on 127.0.0.1 in a daemon thread. Returns (server, base_url)."""
+    server = _StubServer(("127.0.0.1", port), latency_ms, error_rate, bulk_sec_per_1k)
+    threading.Thread(target=server.serve_forever, name="zb-stub", daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Local ZeroBounce stub server.")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--latency-ms", type=float, default=300.0, help="Mean /v2/validate latency (default 300)")
+    ap.add_argument("--error-rate", type=float, default=0.02, help="Fraction of validate calls answered 429/503 (default 0.02)")
+    ap.add_argument("--bulk-sec-per-1k", type=float, default=2.0, help="Bulk file processing time per 1,000 emails")
+    args = ap.parse_args()
+    server, base = start_stub(args.port, latency_ms=args.latency_ms, error_rate=args.error_rate, bulk_sec_per_1k=args.bulk_sec_per_1k)
+    print(f"[zb-stub] listening on {base} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -6,18 +6,26 @@ from workflows.outreach_sender.AI_Intergrations.opener_ai_writer import generate
 from workflows.outreach_sender.AI_Intergrations.opener_ai_writer import generate_generic_subject
 from workflows.outreach_sender.AI_Intergrations.personalizer import personalize_email
 from workflows.outreach_sender.AI_Intergrations.personalizer import personalize_subject
+from workflows.outreach_sender.AI_Intergrations.structured_writer import generate_personalized_opener
+from workflows.outreach_sender.AI_Intergrations.subject_pool import get_subject_pool
 from workflows.outreach_sender.Email_Scripts.send_email import send_email as gmail_send_email
+from workflows.outreach_sender.Email_Scripts.send_email import flush_tracking
 from workflows.outreach_sender.Utils.opener_utils import sanitize_email_fields
 from workflows.outreach_sender.Utils.preflight import preflight_filter
 from workflows.outreach_sender.Utils.parallel_dispatcher import run_parallel_dispatch
+from workflows.outreach_sender.Utils.send_planner import followup_work, opener_work, plan_day
+from workflows.universal_outreach_utils.crm_store import CRMStore
+from workflows.universal_outreach_utils.send_limiter import get_send_limiter
 
 import csv
 import json
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
 import time
 import random
 import sys
+import threading
+from typing import Optional
 
 from datetime import datetime
 
@@ -79,28 +87,29 @@ class _Tee:
         except Exception:
             return False
 
-# Install tee for stdout and stderr
-_orig_stdout = sys.stdout
-_orig_stderr = sys.stderr
-_tee_out = _Tee(_orig_stdout, _LOG_FILE)
-_tee_err = _Tee(_orig_stderr, _LOG_FILE)
-sys.stdout = _tee_out
-sys.stderr = _tee_err
-
-# Ensure files close on exit
-def _close_teelog():
-    try:
-        _tee_out.file.close()
-    except Exception:
-        pass
-    try:
-        _tee_err.file.close()
-    except Exception:
-        pass
+# Install tee for stdout and stderr (off when hosted by the orchestrator: OUTREACH_LOG_TEE=0)
+if os.getenv("OUTREACH_LOG_TEE", "1") != "0":
+    _orig_stdout = sys.stdout
+    _orig_stderr = sys.stderr
+    _tee_out = _Tee(_orig_stdout, _LOG_FILE)
+    _tee_err = _Tee(_orig_stderr, _LOG_FILE)
+    sys.stdout = _tee_out
+    sys.stderr = _tee_err
+
+    # Ensure files close on exit
+    def _close_teelog():
+        try:
+            _tee_out.file.close()
+        except Exception:
+            pass
+        try:
+            _tee_err.file.close()
+        except Exception:
+            pass
 
-_atexit_for_log.register(_close_teelog)
+    _atexit_for_log.register(_close_teelog)
 
-print(f"🧾 Logging to {_LOG_FILE} (console + file). Session start.")
+    print(f"🧾 Logging to {_LOG_FILE} (console + file). Session start.")
 
 
 # Simple logger helper for step-wise logging
@@ -133,22 +142,20 @@ def _find_col(fieldnames, target_label: str) -> str:
     return target_label  # fallback if not found
 
 
-# Helper to persist owner assignment to the CRM for a specific lead email, preserving headers and quoting.
+# CRM columns written back after an opener send (per-lead persist + final reconciliation)
+_OPENER_PERSIST_COLS = [
+    "Messaging Status", "Campaign Type", "Sequence Stage", "Lead Stage",
+    "Last Contacted Date", "Campaign Assigned", "Outreach Channel", "Owner / Assigned To",
+    "Bounce Status for Opener", "Opener Sender Used", "Opener Subject Sent", "Opener Body Sent",
+    "Opener Time Sent", "Opener Date Sent", "Email Thread Thread",
+]
+
+
+# Helper to persist owner assignment to the CRM for a specific lead email (point update in the CRM store).
 def _persist_owner_assignment(crm_path: Path, lead_email: str, owner_email: str) -> None:
-    """Write Owner / Assigned To to CSV for a specific lead email, preserving headers and quoting."""
+    """Write Owner / Assigned To for a specific lead email (CSV is exported at the end of the run)."""
     try:
-        with open(crm_path, "r", newline="", encoding="utf-8") as f:
-            rows = list(csv.DictReader(f))
-        if not rows:
-            return
-        fieldnames = rows[0].keys()
-        with open(crm_path, "w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames, quoting=csv.QUOTE_ALL)
-            writer.writeheader()
-            for r in rows:
-                if (r.get("Email") or "") == (lead_email or ""):
-                    r["Owner / Assigned To"] = owner_email
-                writer.writerow(r)
+        CRMStore.for_csv(crm_path).patch(lead_email, {"Owner / Assigned To": owner_email})
     except Exception as e:
         print(f"⚠️ Failed to persist owner assignment for {lead_email}: {e}")
 
@@ -189,199 +196,181 @@ def send_email(recipient_email, subject, body, sender_override=None):
 
     return success, sender_email, thread_id, thread_url
 
-def run_opener_sequence():
-    # Load config
-    control_path = Path(__file__).parent / "Utils" / "opener_controls.json"
-    with open(control_path, "r") as f:
+CONTROL_PATH = Path(__file__).parent / "Utils" / "opener_controls.json"
+CRM_PATH = Path("/Users/kevinnovanta/backend_for_ai_agency/data/leads/CRM_Leads/CRM_leads_copy.csv")
+SENDER_CREDS_PATH = Path("/Users/kevinnovanta/backend_for_ai_agency/Creds/email_accounts.json")
+
+
+def load_controls(path: Path = CONTROL_PATH) -> dict:
+    """Read opener_controls.json (run settings shared by every client in a run)."""
+    with open(path, "r") as f:
         controls = json.load(f)
-        log_step("Loaded opener_controls.json with run settings.")
+    log_step("Loaded opener_controls.json with run settings.")
+    return controls
 
-        # Deliverability filter controls (default: disabled)
-        use_deliv_filter = bool(controls.get("use_deliverability_filter", False))
-        allowed_deliv = list(controls.get("allowed_deliverability_statuses", [])) or []
 
+def _window_open(controls: dict, now: datetime) -> bool:
+    """Day/time gate from controls (weekday abbreviations + start/end hour)."""
     allowed_days = controls["days_allowed"]
     start_hour = int(controls["start_time"].split(":")[0])
     end_hour = int(controls["end_time"].split(":")[0])
-    daily_limit = controls["daily_limit"]
-    per_inbox_limit = controls["per_inbox_limit"]
-    send_interval_seconds = int(controls.get("send_interval_seconds", 120))  # default 2 minutes
-    send_jitter_seconds = int(controls.get("send_jitter_seconds", 20))       # default +/- up to ~20s
-
-    # Time check (use weekday abbreviations to match controls)
-    now = datetime.now()
     weekday_abbr = now.strftime("%a")  # e.g., "Mon", "Tue", "Sat"
     if weekday_abbr not in allowed_days:
         print(f"⛔ Not a sending day. Today is {weekday_abbr}. Allowed: {allowed_days}")
-        return
+        return False
     if not (start_hour <= now.hour < end_hour):
         print(f"⛔ Outside sending window. Now: {now.strftime('%H:%M')} | Window: {start_hour:02d}:00-{end_hour:02d}:00")
-        return
+        return False
     log_step(f"Day/time check passed. Allowed days: {allowed_days}, Window: {start_hour:02d}:00-{end_hour:02d}:00")
+    return True
 
-    # Preload CRM once, detect the actual Client Name column, and build lookup
-    crm_path = Path("/Users/kevinnovanta/backend_for_ai_agency/data/leads/CRM_Leads/CRM_leads_copy.csv")
-    with open(crm_path, newline="", encoding="utf-8") as csvfile:
-        reader = csv.DictReader(csvfile)
-        fieldnames = reader.fieldnames or []
-        client_col = _find_col(fieldnames, "Client Name")
-        rows = list(reader)
-        log_step(f"Loaded CRM leads from {crm_path}. Total rows: {len(rows)} | Client column: {client_col}")
-    if not rows:
-        print(f"⚠️ No leads found in CRM file: {crm_path}")
-        return
-
-    # Build normalized set/map of client names present
-    clients_present = {}
-    for r in rows:
-        val = (r.get(client_col, "") or "").strip()
-        if val:
-            clients_present[_norm(val)] = val  # preserve original casing
-
-    # Pitch message: explain what this sequence does and why
-    print("🚀 Outreach Sequence Initiator")
-    print("This tool sends personalized opener emails to selected client leads from your CRM,")
-    print("updates their Messaging Status, and spaces sends to mimic human behavior.")
-    print("You'll be prompted for the client name, and optionally can review/edit each email in test mode.")
-
-    # Prompt until a valid client is entered
-    while True:
-        print("🔍 Enter the client name to run outreach for:")
-        client_name_display = input().strip()
-        client_name_norm = _norm(client_name_display)
-        if client_name_norm in clients_present:
-            # preserve the exact casing from the CSV
-            client_name_display = clients_present[client_name_norm]
-            break
-        print(f"⚠️ No leads found for client: '{client_name_display}'. Please try again.")
-
-    log_step(f"Selected client: {client_name_display}")
 
-    # Optional interactive testing mode
-    print("🧪 Interactive test mode? (y/N):")
-    interactive_mode = input().strip().lower().startswith("y")
-    sender_override = None
-    auto_send_rest = False
-    if interactive_mode:
-        print("✉️  (Optional) Force send from which sender email? Leave blank to keep rotation:")
-        override_inp = input().strip()
-        if override_inp:
-            sender_override = override_inp
-
-    log_step("Interactive mode evaluated; proceeding to lead filtering.")
-
-    # Use centralized preflight (verification + allow-list + basic gates)
-    leads_to_send, skip_logs, settings_logs = preflight_filter(
-        rows,
-        controls,
-        client_col_name=client_col,
-        selected_client_norm=client_name_norm,
-    )
-
-    # Print settings summary and any skip reasons
-    for msg in settings_logs:
-        log_step(msg)
-    for msg in skip_logs:
-        print(msg)
-
-    # Enforce daily limit
-    if len(leads_to_send) > daily_limit:
-        leads_to_send = leads_to_send[:daily_limit]
-
-    log_step(f"Filtered to {len(leads_to_send)} eligible leads for outreach (daily_limit={daily_limit}).")
-
-    if not leads_to_send:
-        print(f"⚠️ No leads found for client: '{client_name_display}'")
-        return
+def _load_sender_pool(controls: dict) -> list:
+    """sender_pool from controls, falling back to every address in Creds/email_accounts.json."""
+    sender_pool = [s.strip() for s in controls.get("sender_pool", []) if (s or "").strip()]
+    if sender_pool:
+        return sender_pool
+    try:
+        if SENDER_CREDS_PATH.exists():
+            with open(SENDER_CREDS_PATH, "r", encoding="utf-8") as cf:
+                creds_json = json.load(cf)
+
+            def _extract_emails(x):
+                emails = []
+                # Recursively walk JSON and collect strings that look like emails
+                if isinstance(x, dict):
+                    for k, v in x.items():
+                        emails.extend(_extract_emails(v))
+                elif isinstance(x, list):
+                    for it in x:
+                        emails.extend(_extract_emails(it))
+                elif isinstance(x, str):
+                    # very light email pattern; avoids pulling API keys etc.
+                    if re.match(r"^[^@\s]+@[^@\s]+\.[^@\s]+$", x.strip()):
+                        emails.append(x.strip())
+                return emails
+
+            # De-dup while preserving order
+            sender_pool = list(dict.fromkeys(_extract_emails(creds_json)))
+            if sender_pool:
+                print(f"📫 Loaded {len(sender_pool)} sender(s) from Creds/email_accounts.json")
+    except Exception as e:
+        print(f"⚠️ Could not load sender_pool from Creds/email_accounts.json: {e}")
+    return sender_pool
 
-    print(f"📬 Preparing to send {len(leads_to_send)} opener emails...")
 
-    # Compute inbox_count after final filtering
-    inbox_count = max(1, daily_limit // per_inbox_limit)
+class OpenerRun:
+    """Settings, CRM handle and inbox rotation shared by every client dispatched in one run.
 
+    The CRM is loaded once and partitioned per client in a single pass; each client's
+    leads go through preflight separately, then all clients are sent through one
+    dispatcher so every inbox has one worker (and one pacing/limit budget) no matter how
+    many clients it sends for.
+    """
 
-    # Load sender pool from controls (with fallback to Creds/email_accounts.json if empty)
-    sender_pool = [s.strip() for s in controls.get("sender_pool", []) if (s or "").strip()]
-    # If no sender_pool provided in controls, attempt to derive it from Creds/email_accounts.json
-    if not sender_pool:
-        try:
-            creds_path = Path("/Users/kevinnovanta/backend_for_ai_agency/Creds/email_accounts.json")
-            if creds_path.exists():
-                with open(creds_path, "r", encoding="utf-8") as cf:
-                    creds_json = json.load(cf)
-
-                def _extract_emails(x):
-                    emails = []
-                    # Recursively walk JSON and collect strings that look like emails
-                    if isinstance(x, dict):
-                        for k, v in x.items():
-                            emails.extend(_extract_emails(v))
-                    elif isinstance(x, list):
-                        for it in x:
-                            emails.extend(_extract_emails(it))
-                    elif isinstance(x, str):
-                        # very light email pattern; avoids pulling API keys etc.
-                        if re.match(r"^[^@\s]+@[^@\s]+\.[^@\s]+$", x.strip()):
-                            emails.append(x.strip())
-                    return emails
-
-                extracted = _extract_emails(creds_json)
-                # De-dup while preserving order
-                seen = set()
-                ordered = []
-                for e in extracted:
-                    if e not in seen:
-                        seen.add(e)
-                        ordered.append(e)
-                sender_pool = ordered
-                if sender_pool:
-                    print(f"📫 Loaded {len(sender_pool)} sender(s) from Creds/email_accounts.json")
-        except Exception as e:
-            print(f"⚠️ Could not load sender_pool from Creds/email_accounts.json: {e}")
-
-    log_step(f"Sender pool resolved: {sender_pool if sender_pool else '[]'}")
-    # Build a deterministic rotation list of actual sender emails for each inbox slot
-    # Optional strict mode: if a pool exists but is smaller than inbox_count, warn (still repeats by default)
-    if sender_pool and len(sender_pool) < inbox_count:
-        print(f"⚠️ sender_pool has {len(sender_pool)} inbox(es) but inbox_count is {inbox_count}. Repeating pool to fill slots.")
-    # (rest of rotation logic continues below)
-
-    # --- Dispatch mode selection ---
-    # If interactive_mode is ON, keep the existing sequential flow (you confirm each send).
-    # If interactive_mode is OFF, use the parallel dispatcher to run one worker per inbox.
-    #
-    # Build a deterministic rotation count to help choose_inbox_cb:
-    rr_index = 0
+    def __init__(self, controls: dict, *, interactive: bool = False, sender_override: Optional[str] = None,
+                 crm_path: Path = CRM_PATH) -> None:
+        self.controls = controls
+        self.interactive = interactive
+        self.sender_override = sender_override
+        self.end_hour = int(controls["end_time"].split(":")[0])
+        self.daily_limit = controls["daily_limit"]
+        self.per_inbox_limit = controls["per_inbox_limit"]
+        self.send_interval_seconds = int(controls.get("send_interval_seconds", 120))  # default 2 minutes
+        self.send_jitter_seconds = int(controls.get("send_jitter_seconds", 20))       # default +/- up to ~20s
+        # "chain" = opener -> subject -> personalize body -> personalize subject (4 LLM calls)
+        # "structured" = one JSON-schema call for the final subject + body (falls back to chain on failure)
+        self.generation_mode = str(controls.get("generation_mode", "chain")).strip().lower()
+        # Generic subjects come from a per-client pool of pre-generated variants (no LLM call per lead)
+        self.subject_pool = get_subject_pool(
+            pool_size=int(controls.get("subject_pool_size", 8)),
+            max_uses=int(controls.get("subject_max_uses", 25)),
+        ) if bool(controls.get("use_subject_pool", True)) else None
+
+        # Preload CRM once, detect the actual Client Name column
+        self.crm_path = crm_path
+        self.crm_store = CRMStore.for_csv(crm_path)
+        self.client_col = _find_col(self.crm_store.headers(), "Client Name")
+        self.rows = self.crm_store.rows()
+        log_step(f"Loaded CRM leads from {crm_path}. Total rows: {len(self.rows)} | Client column: {self.client_col}")
+
+        # A sender override replaces the pool, so every send (and owner assignment) uses that inbox
+        self.sender_pool = [sender_override] if sender_override else _load_sender_pool(controls)
+        log_step(f"Sender pool resolved: {self.sender_pool if self.sender_pool else '[]'}")
+        # Optional strict mode: if a pool exists but is smaller than inbox_count, warn (still repeats by default)
+        inbox_count = max(1, self.daily_limit // self.per_inbox_limit)
+        if self.sender_pool and not sender_override and len(self.sender_pool) < inbox_count:
+            print(f"⚠️ sender_pool has {len(self.sender_pool)} inbox(es) but inbox_count is {inbox_count}. Repeating pool to fill slots.")
+
+        self._rr_index = 0
+        self._rr_lock = threading.Lock()
+        # id(lead) -> client display name, for the copy callbacks (leads of all clients share one dispatch)
+        self._client_of: dict = {}
+
+    def partition(self) -> dict:
+        """Single pass over the CRM: {normalized client: (display name, rows)}."""
+        by_client: dict = {}
+        for r in self.rows:
+            val = (r.get(self.client_col, "") or "").strip()
+            if val:
+                # preserve the first casing seen in the CSV
+                by_client.setdefault(_norm(val), (val, []))[1].append(r)
+        return by_client
 
     # Helper to pick/remember an inbox for a lead, and persist that owner to the CRM immediately.
-    def choose_inbox_cb(lead: dict, senders: list[str]) -> str:
-        nonlocal rr_index
+    def choose_inbox_cb(self, lead: dict, senders: list[str]) -> str:
         # If this lead already has an explicit owner that matches a real inbox, keep it
         current_owner = (lead.get("Owner / Assigned To", "") or "").strip()
         if current_owner in senders:
             return current_owner
         # Otherwise choose round-robin
-        inbox = senders[rr_index % len(senders)]
-        rr_index += 1
+        with self._rr_lock:
+            inbox = senders[self._rr_index % len(senders)]
+            self._rr_index += 1
         # Persist the owner so other processes won't double-assign
-        _persist_owner_assignment(crm_path, lead.get("Email", ""), inbox)
+        _persist_owner_assignment(self.crm_path, lead.get("Email", ""), inbox)
         lead["Owner / Assigned To"] = inbox
         print(f"📌 Assigned inbox for {lead.get('Email')} → '{inbox}' (persisted to CRM)")
         return inbox
 
-    # The core "send one opener" operation used by both modes.
-    # It mirrors your previous per-lead logic, but receives the chosen inbox explicitly.
-    def send_one_opener(inbox_email: str, lead: dict) -> dict:
-        email = lead.get("Email")
+    def eligible_leads(self, client_display: str, client_rows: list) -> list:
+        """Preflight (verification + allow-list + basic gates) and daily_limit for one client."""
+        leads_to_send, skip_logs, settings_logs = preflight_filter(
+            client_rows,
+            self.controls,
+            client_col_name=self.client_col,
+            selected_client_norm=_norm(client_display),
+        )
+
+        # Print settings summary and any skip reasons
+        for msg in settings_logs:
+            log_step(msg)
+        for msg in skip_logs:
+            print(msg)
+
+        # Enforce daily limit
+        if len(leads_to_send) > self.daily_limit:
+            leads_to_send = leads_to_send[:self.daily_limit]
 
+        log_step(f"[{client_display}] Filtered to {len(leads_to_send)} eligible leads for outreach (daily_limit={self.daily_limit}).")
+        for lead in leads_to_send:
+            self._client_of[id(lead)] = client_display
+        return leads_to_send
+
+    # Default copy generation: four sequential LLM calls per lead
+    def generate_chain(self, lead: dict) -> dict:
         # === Generate a generic opener ===
         base_email = gen_opener_email(lead)  # {"subject": "...", "body_html": "..."}
         log_step("Generated generic opener email via opener_ai_writer.")
 
-        # === Generate generic subject ===
-        subj_data = generate_generic_subject()
-        base_email["subject"] = subj_data.get("subject", base_email.get("subject", "Quick question"))
-        log_step("Generated generic subject via subject_prompt.")
+        # === Generic subject (pooled per client, or one call per lead) ===
+        if self.subject_pool is not None:
+            base_email["subject"] = self.subject_pool.pick(self._client_of.get(id(lead), ""), "opener")
+            log_step("Picked generic subject from the client's subject pool.")
+        else:
+            subj_data = generate_generic_subject(lead)
+            base_email["subject"] = subj_data.get("subject", base_email.get("subject", "Quick question"))
+            log_step("Generated generic subject via subject_prompt.")
 
         # === Personalize body ===
         final_email = personalize_email(
@@ -396,6 +385,24 @@ def run_opener_sequence():
         subj_final = personalize_subject(final_email.get("subject", ""), lead)
         final_email["subject"] = subj_final.get("subject", final_email.get("subject", ""))
         log_step("Personalized subject via subject_personalizer.")
+        return final_email
+
+    # The core "send one opener" operation used by both modes is split in two:
+    # prepare_opener() generates + sanitizes copy (slow: LLM calls) and deliver_opener()
+    # previews/sends/persists it. The parallel dispatcher runs prepare ahead of each
+    # inbox's jitter slot so model latency doesn't delay sends.
+    def prepare_opener(self, inbox_email: str, lead: dict) -> dict:
+        email = lead.get("Email")
+
+        final_email = None
+        if self.generation_mode == "structured":
+            try:
+                final_email = generate_personalized_opener(lead)
+                log_step("Generated personalized opener via single structured call.")
+            except Exception as e:
+                print(f"⚠️ Structured generation failed for {email}: {e}. Falling back to the 4-call chain.")
+        if final_email is None:
+            final_email = self.generate_chain(lead)
 
         print("\n=== RAW AI OUTPUT (after personalization) ===")
         print("SUBJECT:", final_email.get("subject", ""))
@@ -414,8 +421,15 @@ def run_opener_sequence():
         if not (clean_subject or "").strip():
             raise RuntimeError(f"Subject became empty after sanitization for {email}")
 
+        return {"subject": clean_subject, "body": clean_body}
+
+    def deliver_opener(self, inbox_email: str, lead: dict, prepared: dict) -> dict:
+        email = lead.get("Email")
+        clean_subject = prepared["subject"]
+        clean_body = prepared["body"]
+
         # In interactive mode, preview and require explicit confirmation
-        if interactive_mode:
+        if self.interactive:
             preview = clean_body if len(clean_body) <= 500 else (clean_body[:500] + "...")
             print("\n— Preview —")
             print(f"To: {email}")
@@ -469,41 +483,9 @@ def run_opener_sequence():
         if final_thread_val:
             print(f"🔗 Gmail thread saved: {final_thread_val}")
 
-        # Persist the opener fields to CSV immediately
+        # Persist the opener fields immediately (point update; CSV exported at the end of the run)
         try:
-            with open(crm_path, "r", newline="", encoding="utf-8") as f:
-                csv_rows = list(csv.DictReader(f))
-            required_cols = [
-                "Opener Sender Used", "Opener Subject Sent", "Opener Body Sent",
-                "Opener Time Sent", "Opener Date Sent", "Bounce Status for Opener",
-                "Email Thread Thread"
-            ]
-            existing_cols = list(csv_rows[0].keys()) if csv_rows else []
-            fieldnames_local = list(dict.fromkeys(existing_cols + required_cols))
-            with open(crm_path, "w", newline="", encoding="utf-8") as f:
-                writer = csv.DictWriter(f, fieldnames=fieldnames_local, quoting=csv.QUOTE_ALL)
-                writer.writeheader()
-                for row in csv_rows:
-                    if row.get("Email") == lead.get("Email"):
-                        row["Messaging Status"] = lead.get("Messaging Status", row.get("Messaging Status", ""))
-                        row["Campaign Type"] = lead.get("Campaign Type", row.get("Campaign Type", ""))
-                        row["Sequence Stage"] = lead.get("Sequence Stage", row.get("Sequence Stage", ""))
-                        row["Lead Stage"] = lead.get("Lead Stage", row.get("Lead Stage", ""))
-                        row["Last Contacted Date"] = lead.get("Last Contacted Date", row.get("Last Contacted Date", ""))
-                        row["Campaign Assigned"] = lead.get("Campaign Assigned", row.get("Campaign Assigned", ""))
-                        row["Outreach Channel"] = lead.get("Outreach Channel", row.get("Outreach Channel", ""))
-                        row["Owner / Assigned To"] = lead.get("Owner / Assigned To", row.get("Owner / Assigned To", ""))
-                        row["Bounce Status for Opener"] = lead.get("Bounce Status for Opener", row.get("Bounce Status for Opener", ""))
-                        row["Opener Sender Used"] = lead.get("Opener Sender Used", row.get("Opener Sender Used", ""))
-                        row["Opener Subject Sent"] = lead.get("Opener Subject Sent", row.get("Opener Subject Sent", ""))
-                        row["Opener Body Sent"] = lead.get("Opener Body Sent", row.get("Opener Body Sent", ""))
-                        row["Opener Time Sent"] = lead.get("Opener Time Sent", row.get("Opener Time Sent", ""))
-                        row["Opener Date Sent"] = lead.get("Opener Date Sent", row.get("Opener Date Sent", ""))
-                        row["Email Thread Thread"] = lead.get("Email Thread Thread", row.get("Email Thread Thread", ""))
-                    for col in fieldnames_local:
-                        if col not in row:
-                            row[col] = ""
-                    writer.writerow(row)
+            self.crm_store.patch(email, {col: lead.get(col, "") for col in _OPENER_PERSIST_COLS})
         except Exception as e:
             print(f"⚠️ Failed to persist opener fields for {email}: {e}")
 
@@ -516,27 +498,24 @@ def run_opener_sequence():
             "sender_used": sender_used,
         }
 
+    def send_one_opener(self, inbox_email: str, lead: dict) -> dict:
+        return self.deliver_opener(inbox_email, lead, self.prepare_opener(inbox_email, lead))
+
     # Result hook (already persisted above; kept for symmetry/metrics)
-    def on_result_cb(lead: dict, inbox: str, result: dict) -> None:
+    def on_result_cb(self, lead: dict, inbox: str, result: dict) -> None:
         if result.get("ok"):
             print(f"[DISPATCH] Persisted opener for {lead.get('Email')} via {inbox}")
         else:
             print(f"[DISPATCH] Not sent for {lead.get('Email')} (skipped or failed).")
 
-    if interactive_mode:
+    def dispatch_interactive(self, leads_to_send: list) -> None:
         # === Original sequential flow with confirmation ===
         # (Single-threaded; identical to your previous per-lead loop, but we reuse send_one_opener)
-        # Compute inbox_count after final filtering
-        inbox_count = max(1, daily_limit // per_inbox_limit)
-
-        # Optional strict mode warning for small pools
-        if sender_pool and len(sender_pool) < inbox_count:
-            print(f"⚠️ sender_pool has {len(sender_pool)} inbox(es) but inbox_count is {inbox_count}. Repeating pool to fill slots.")
-
+        sender_pool = self.sender_pool
         for i, lead in enumerate(leads_to_send):
             inbox_index = i % max(1, len(sender_pool)) if sender_pool else 0
             # Choose a real inbox email if available; otherwise keep rotation label
-            chosen_inbox = sender_pool[inbox_index] if sender_pool else (sender_override or f"slot:{inbox_index}")
+            chosen_inbox = sender_pool[inbox_index] if sender_pool else f"slot:{inbox_index}"
 
             # Respect existing owner assignment if it points to a real inbox
             assigned_owner = (lead.get('Owner / Assigned To', '') or '').strip()
@@ -547,90 +526,212 @@ def run_opener_sequence():
                 print(f"⏭️  Skipping {lead.get('Email')}: already assigned to '{assigned_owner}', not '{chosen_inbox}'.")
                 continue
             if not assigned_owner:
-                _persist_owner_assignment(crm_path, lead.get("Email", ""), chosen_inbox)
+                _persist_owner_assignment(self.crm_path, lead.get("Email", ""), chosen_inbox)
                 lead["Owner / Assigned To"] = chosen_inbox
                 print(f"📌 Assigned inbox for {lead.get('Email')} → '{chosen_inbox}' (persisted to CRM)")
                 log_step(f"Assigning inbox '{chosen_inbox}' to lead {lead.get('Email')}")
 
             # Send with interactive confirmation inside send_one_opener()
-            res = send_one_opener(chosen_inbox, lead)
+            res = self.send_one_opener(chosen_inbox, lead)
             if res.get("ok"):
                 print(f"✅ Sent to {lead.get('Email')}")
             else:
                 print(f"⏭️  Not sent to {lead.get('Email')} (skipped or failed).")
 
             # Manual pacing between interactive sends (keep your existing cadence)
-            delay = send_interval_seconds + random.randint(-send_jitter_seconds, send_jitter_seconds)
+            delay = self.send_interval_seconds + random.randint(-self.send_jitter_seconds, self.send_jitter_seconds)
             if delay < 0:
-                delay = send_interval_seconds // 2
+                delay = self.send_interval_seconds // 2
             print(f"⏳ Waiting {delay}s before next send...")
             time.sleep(delay)
 
-    else:
+    def dispatch_parallel(self, leads_to_send: list, n_clients: int = 1) -> None:
         # === Parallel dispatch mode (no prompts; respects jitter and limits per inbox) ===
-        min_j = max(1, send_interval_seconds - send_jitter_seconds)
-        max_j = send_interval_seconds + send_jitter_seconds
+        controls = self.controls
+        per_inbox_limit = self.per_inbox_limit
+        # daily_limit applies per client (as when each client was its own run)
+        daily_limit = self.daily_limit * max(1, n_clients)
+        min_j = max(1, self.send_interval_seconds - self.send_jitter_seconds)
+        max_j = self.send_interval_seconds + self.send_jitter_seconds
         print(f"[DISPATCH] Parallel mode ON. Jitter window: {min_j}-{max_j}s | per-inbox cap: {per_inbox_limit} | global cap: {daily_limit}")
+        # Pace against the shared cross-process limiter (follow-ups may send from the same inboxes);
+        # send_email() takes the actual permit.
+        send_limiter = get_send_limiter()
+        per_minute_cap = float(controls.get("per_inbox_per_minute", os.getenv("SEND_PER_MINUTE_CAP", "2")))
+
+        def permit_wait_cb(inbox):
+            return send_limiter.peek(inbox, daily_cap=per_inbox_limit, per_minute=per_minute_cap)
+
+        # Day-ahead plan: spread each inbox's remaining quota evenly over the rest of the window,
+        # keeping capacity for today's follow-ups from the same inboxes
+        plan = None
+        dispatch_pool = self.sender_pool
+        if controls.get("use_send_planner", True) and dispatch_pool:
+            now = datetime.now()
+            window_end = now.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(hours=self.end_hour)
+            plan = plan_day(
+                opener_work(leads_to_send, dispatch_pool, self.choose_inbox_cb) + followup_work(self.rows, dispatch_pool),
+                dispatch_pool,
+                window_start=now,
+                window_end=window_end,
+                daily_limit=daily_limit,
+                per_inbox_limit=per_inbox_limit,
+                sent_today=send_limiter.sent_today,
+                min_gap_sec=max(min_j, 60.0 / max(per_minute_cap, 0.001)),
+            )
+            plan.log()
 
         run_parallel_dispatch(
             leads=leads_to_send,
-            sender_pool=sender_pool if sender_pool else [sender_override] if sender_override else [],
-            send_one_cb=send_one_opener,
-            choose_inbox_cb=choose_inbox_cb,
-            on_result_cb=on_result_cb,
+            sender_pool=dispatch_pool,
+            prepare_cb=self.prepare_opener,
+            send_one_cb=self.deliver_opener,
+            choose_inbox_cb=self.choose_inbox_cb,
+            on_result_cb=self.on_result_cb,
             jitter_seconds=(min_j, max_j),
             per_inbox_daily_limit=per_inbox_limit,
             global_daily_limit=daily_limit,
             max_inboxes=None,  # or set a cap
+            max_concurrency=controls.get("max_concurrent_sends"),  # default: one per inbox
+            prefetch_depth=int(controls.get("prefetch_depth", 2)),  # openers generated ahead per inbox
+            permit_wait_cb=permit_wait_cb,
+            plan=plan,
         )
 
-    log_step("Starting final reconciliation pass for untouched/new leads.")
-    # Reload full CRM data and update relevant rows
-    with open(crm_path, "r", newline="", encoding="utf-8") as csvfile:
-        csvfile_data = list(csv.DictReader(csvfile))
-
-    # Reopen CRM for rewriting
-    required_cols = [
-        "Opener Sender Used", "Opener Subject Sent", "Opener Body Sent",
-        "Opener Time Sent", "Opener Date Sent", "Bounce Status for Opener",
-        "Email Thread Thread"
-    ]
-    existing_cols = list(csvfile_data[0].keys()) if csvfile_data else []
-    fieldnames = list(dict.fromkeys(existing_cols + required_cols))
-    with open(crm_path, "w", newline="", encoding="utf-8") as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames, quoting=csv.QUOTE_ALL)
-        writer.writeheader()
-
-        for row in csvfile_data:
-            if _norm(row.get(client_col, "")) == client_name_norm and row.get("Messaging Status", "").strip().lower() in ("", "untouched", "new"):
-                # Find the updated status in leads_to_send
-                matching = next((lead for lead in leads_to_send if lead["Email"] == row["Email"]), None)
+    def reconcile(self, clients: dict) -> None:
+        """Write back opener fields for sent leads still marked untouched/new, then export the CSV once."""
+        log_step("Starting final reconciliation pass for untouched/new leads.")
+        updates = {}
+        for client_norm, leads in clients.items():
+            # Re-read this client's rows from the CRM store and update the ones still untouched/new
+            sent_by_email = {(lead.get("Email") or "").strip().lower(): lead for lead in leads}
+            for row in self.crm_store.rows(client=client_norm):
+                if row.get("Messaging Status", "").strip().lower() not in ("", "untouched", "new"):
+                    continue
+                matching = sent_by_email.get((row.get("Email") or "").strip().lower())
                 if matching:
-                    row["Messaging Status"] = matching.get("Messaging Status", row.get("Messaging Status", ""))
-                    row["Campaign Type"] = matching.get("Campaign Type", row.get("Campaign Type", ""))
-                    row["Sequence Stage"] = matching.get("Sequence Stage", row.get("Sequence Stage", ""))
-                    row["Lead Stage"] = matching.get("Lead Stage", row.get("Lead Stage", ""))
-                    row["Last Contacted Date"] = matching.get("Last Contacted Date", row.get("Last Contacted Date", ""))
-                    row["Campaign Assigned"] = matching.get("Campaign Assigned", row.get("Campaign Assigned", ""))
-                    row["Outreach Channel"] = matching.get("Outreach Channel", row.get("Outreach Channel", ""))
-                    row["Owner / Assigned To"] = matching.get("Owner / Assigned To", row.get("Owner / Assigned To", ""))
-                    if "Bounce Status for Opener" in matching:
-                        row["Bounce Status for Opener"] = matching.get("Bounce Status for Opener", row.get("Bounce Status for Opener", ""))
-                    # Update opener NEW columns
-                    row["Opener Sender Used"] = matching.get("Opener Sender Used", row.get("Opener Sender Used", ""))
-                    row["Opener Subject Sent"] = matching.get("Opener Subject Sent", row.get("Opener Subject Sent", ""))
-                    row["Opener Body Sent"] = matching.get("Opener Body Sent", row.get("Opener Body Sent", ""))
-                    row["Opener Time Sent"] = matching.get("Opener Time Sent", row.get("Opener Time Sent", ""))
-                    row["Opener Date Sent"] = matching.get("Opener Date Sent", row.get("Opener Date Sent", ""))
-                    row["Email Thread Thread"] = matching.get("Email Thread Thread", row.get("Email Thread Thread", ""))
-            # Ensure all required columns exist for DictWriter
-            for col in fieldnames:
-                if col not in row:
-                    row[col] = ""
-            writer.writerow(row)
-
-    log_step("Final reconciliation complete. Script finished.")
+                    updates[row["Email"]] = {col: matching[col] for col in _OPENER_PERSIST_COLS if col in matching}
+        if updates:
+            self.crm_store.patch_many(updates)
+        self.crm_store.flush()
+        flush_tracking()
+        log_step("Final reconciliation complete.")
+
+
+def run_opener_batch(clients="all", *, interactive: bool = False, sender_override: Optional[str] = None,
+                     controls: Optional[dict] = None) -> dict:
+    """Non-interactive entry point: send openers for `clients` (list of names, or "all").
+
+    Returns {client display name: eligible lead count}. With interactive=True each
+    email is previewed and confirmed, and clients run one after another.
+    """
+    controls = controls if controls is not None else load_controls()
+    if not _window_open(controls, datetime.now()):
+        return {}
+
+    run = OpenerRun(controls, interactive=interactive, sender_override=sender_override)
+    if not run.rows:
+        print(f"⚠️ No leads found in CRM file: {run.crm_path}")
+        return {}
+    by_client = run.partition()
+
+    if clients == "all" or clients == ["all"]:
+        selected = list(by_client)
+    else:
+        selected = []
+        for name in ([clients] if isinstance(clients, str) else clients):
+            if _norm(name) in by_client:
+                selected.append(_norm(name))
+            else:
+                print(f"⚠️ No leads found for client: '{name}'")
+    if not selected:
+        return {}
+
+    leads_by_client: dict = {}
+    for client_norm in selected:
+        display, client_rows = by_client[client_norm]
+        log_step(f"Selected client: {display}")
+        leads_by_client[client_norm] = run.eligible_leads(display, client_rows)
+    summary = {by_client[c][0]: len(leads) for c, leads in leads_by_client.items()}
+    all_leads = [lead for leads in leads_by_client.values() for lead in leads]
+    if not all_leads:
+        print(f"⚠️ No eligible leads for: {', '.join(summary)}")
+        return summary
+
+    print(f"📬 Preparing to send {len(all_leads)} opener emails for {len(summary)} client(s): {summary}")
+    try:
+        if interactive:
+            for client_norm, leads in leads_by_client.items():
+                run.dispatch_interactive(leads)
+        else:
+            run.dispatch_parallel(all_leads, n_clients=len(leads_by_client))
+    finally:
+        run.reconcile(leads_by_client)
+    return summary
+
+
+def run_opener_sequence():
+    """Interactive session: prompts for the client and test mode, then runs that client."""
+    controls = load_controls()
+    if not _window_open(controls, datetime.now()):
+        return
+
+    # Build normalized set/map of client names present (single pass over the CRM)
+    clients_present = {}
+    for r in CRMStore.for_csv(CRM_PATH).rows():
+        val = (r.get(_find_col(r.keys(), "Client Name"), "") or "").strip()
+        if val:
+            clients_present[_norm(val)] = val  # preserve original casing
+
+    # Pitch message: explain what this sequence does and why
+    print("🚀 Outreach Sequence Initiator")
+    print("This tool sends personalized opener emails to selected client leads from your CRM,")
+    print("updates their Messaging Status, and spaces sends to mimic human behavior.")
+    print("You'll be prompted for the client name, and optionally can review/edit each email in test mode.")
+
+    # Prompt until a valid client is entered
+    while True:
+        print("🔍 Enter the client name to run outreach for:")
+        client_name_display = input().strip()
+        client_name_norm = _norm(client_name_display)
+        if client_name_norm in clients_present:
+            # preserve the exact casing from the CSV
+            client_name_display = clients_present[client_name_norm]
+            break
+        print(f"⚠️ No leads found for client: '{client_name_display}'. Please try again.")
+
+    # Optional interactive testing mode
+    print("🧪 Interactive test mode? (y/N):")
+    interactive_mode = input().strip().lower().startswith("y")
+    sender_override = None
+    if interactive_mode:
+        print("✉️  (Optional) Force send from which sender email? Leave blank to keep rotation:")
+        override_inp = input().strip()
+        if override_inp:
+            sender_override = override_inp
+
+    log_step("Interactive mode evaluated; proceeding to lead filtering.")
+    run_opener_batch([client_name_display], interactive=interactive_mode, sender_override=sender_override, controls=controls)
+    log_step("Script finished.")
+
+
+def main(argv=None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Send opener emails for one or more clients.")
+    parser.add_argument("--clients", help='Comma-separated client names, or "all". Omit to be prompted (interactive session).')
+    parser.add_argument("--interactive", action="store_true", help="Preview and confirm each email (sequential).")
+    parser.add_argument("--sender", default=None, help="Force every send from this inbox (replaces the sender pool).")
+    args = parser.parse_args(argv)
+
+    if not args.clients:
+        run_opener_sequence()
+        return 0
+    clients = "all" if args.clients.strip().lower() == "all" else [c.strip() for c in args.clients.split(",") if c.strip()]
+    summary = run_opener_batch(clients, interactive=args.interactive, sender_override=args.sender)
+    print(f"Done. Eligible leads per client: {summary}")
+    return 0
 
 
 if __name__ == "__main__":
-    run_opener_sequence()
\ No newline at end of file
+    sys.exit(main())
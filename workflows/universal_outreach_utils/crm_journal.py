@@ -0,0 +1,240 @@
+"""
+Write-behind journal for CRM row updates.
+
+The follow-up engine saves a lead up to three times per send (Paused, Pending,
+Sent). Instead of touching the CRM for each of those, ``append`` writes one
+JSONL line per row patch (keyed by Email, fsync'd) next to the CSV:
+
+    CRM_leads.csv -> CRM_leads.journal.jsonl
+
+- Readers merge pending patches on load (``apply`` / ``pending``).
+- ``compact`` folds the journal into the CRM store, exports the CSV, and
+  truncates the journal. It runs at the end of a run, or automatically once the
+  journal grows past ``CRM_JOURNAL_MAX_BYTES``.
+- A torn last line (crash mid-append) is ignored; a leftover ``.compacting``
+  file (crash mid-compaction) is folded again on the next compaction. Patches
+  are idempotent, so replaying them is safe.
+- Appends and the whole compaction hold an ``fcntl`` lock on
+  ``CRM_leads.journal.lock``, so a second process (e.g. a manual follow-up run next
+  to the orchestrator) can't append into a ``.compacting`` file that is about to be
+  removed.
+
+Path suggestion: workflows/universal_outreach_utils/crm_journal.py
+"""
+from __future__ import annotations
+
+import fcntl
+import json
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
+
+from workflows.universal_outreach_utils.crm_store import CRMStore, EMAIL_COLS, normalize_email
+
+# Compact automatically once the live journal grows past this many bytes
+JOURNAL_MAX_BYTES = int(os.getenv("CRM_JOURNAL_MAX_BYTES", str(1024 * 1024)))
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).replace(microsecond=0).isoformat().replace("+00:00", "Z")
+
+
+def _find_email_col(headers: List[str]) -> str:
+    lower_map = {h.lower(): h for h in headers or []}
+    return next((lower_map[c.lower()] for c in EMAIL_COLS if c.lower() in lower_map), "Email")
+
+
+class CRMJournal:
+    """Append-only patch log for one CRM CSV."""
+
+    _instances: Dict[str, "CRMJournal"] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, csv_path: Path | str) -> None:
+        self.csv_path = Path(csv_path)
+        self.path = self.csv_path.with_suffix(".journal.jsonl")
+        self.compacting_path = self.csv_path.with_suffix(".journal.compacting")
+        self.lock_path = self.csv_path.with_suffix(".journal.lock")
+        self._lock = threading.RLock()
+        # Cross-process lock: flock fd held while _locked() is entered (re-entrant per thread via _lock)
+        self._lock_fd: int = -1
+        self._lock_depth = 0
+        # Parsed view of the journal files, reused while their sizes are unchanged
+        self._cache: Dict[str, Dict[str, Any]] = {}
+        self._cache_sig: Tuple[int, int] = (-1, -1)
+
+    @classmethod
+    def for_csv(cls, csv_path: Path | str) -> "CRMJournal":
+        key = str(Path(csv_path).resolve())
+        with cls._instances_lock:
+            journal = cls._instances.get(key)
+            if journal is None:
+                journal = cls(csv_path)
+                cls._instances[key] = journal
+            return journal
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Thread lock plus an exclusive flock on the journal's lock file (blocks until free)."""
+        with self._lock:
+            if self._lock_depth == 0:
+                self.lock_path.parent.mkdir(parents=True, exist_ok=True)
+                fd = os.open(str(self.lock_path), os.O_RDWR | os.O_CREAT, 0o644)
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                except BaseException:
+                    os.close(fd)
+                    raise
+                self._lock_fd = fd
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+                if self._lock_depth == 0:
+                    try:
+                        fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+                    finally:
+                        os.close(self._lock_fd)
+                        self._lock_fd = -1
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _read_file(path: Path, into: Dict[str, Dict[str, Any]]) -> int:
+        if not path.exists():
+            return 0
+        count = 0
+        with path.open("r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # Torn write from a crash; everything before it is intact
+                    print(f"[crm_journal] Skipping unreadable line in {path.name}")
+                    continue
+                email = normalize_email(entry.get("email"))
+                if email:
+                    into.setdefault(email, {}).update(entry.get("fields") or {})
+                    count += 1
+        return count
+
+    def _sig(self) -> Tuple[int, int]:
+        return tuple(p.stat().st_size if p.exists() else -1 for p in (self.compacting_path, self.path))  # type: ignore[return-value]
+
+    def _load_locked(self) -> Dict[str, Dict[str, Any]]:
+        sig = self._sig()
+        if sig != self._cache_sig:
+            merged: Dict[str, Dict[str, Any]] = {}
+            self._read_file(self.compacting_path, merged)
+            self._read_file(self.path, merged)
+            self._cache, self._cache_sig = merged, sig
+        return self._cache
+
+    def signature(self) -> Tuple[int, int]:
+        """Cheap change marker for the uncompacted journal files (sizes; -1 when absent)."""
+        return self._sig()
+
+    def pending(self) -> Dict[str, Dict[str, Any]]:
+        """Merged patches not yet compacted: {email_lower: {column: value}} (later lines win)."""
+        with self._lock:
+            return {k: dict(v) for k, v in self._load_locked().items()}
+
+    def pending_for(self, email: str) -> Dict[str, Any]:
+        """Pending (uncompacted) fields for one lead."""
+        with self._lock:
+            return dict(self._load_locked().get(normalize_email(email), {}))
+
+    def apply(self, rows: List[Dict[str, Any]], headers: List[str], *, append_missing: bool = True) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """Merge pending patches into rows loaded from the CRM (in place). Returns (rows, headers)."""
+        patches = self.pending()
+        if not patches:
+            return rows, headers
+        email_col = _find_email_col(headers)
+        headers = list(headers)
+        known = set(headers)
+        applied = 0
+        for r in rows:
+            fields = patches.pop(normalize_email(r.get(email_col)), None)
+            if fields:
+                r.update(fields)
+                applied += 1
+                for k in fields:
+                    if k not in known:
+                        headers.append(k)
+                        known.add(k)
+        if append_missing:
+            for email, fields in patches.items():
+                rows.append({email_col: email, **fields})
+                for k in fields:
+                    if k not in known:
+                        headers.append(k)
+                        known.add(k)
+        print(f"[crm_journal] Merged {applied} pending patch(es) from {self.path.name}")
+        return rows, headers
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def append(self, email: str, fields: Dict[str, Any]) -> bool:
+        """Append one row patch (durable once this returns). Returns False if there was nothing to write."""
+        key = normalize_email(email)
+        fields = {k: v for k, v in (fields or {}).items() if v is not None}
+        if not key or not fields:
+            return False
+        line = json.dumps({"ts": _now_iso(), "email": key, "fields": fields}, ensure_ascii=False) + "\n"
+        with self._locked():
+            fresh = self._sig() == self._cache_sig
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            size = self.path.stat().st_size
+            if fresh:
+                # Nobody else wrote in between: keep the cached view current without re-reading
+                self._cache.setdefault(key, {}).update(fields)
+                self._cache_sig = self._sig()
+        if JOURNAL_MAX_BYTES > 0 and size >= JOURNAL_MAX_BYTES:
+            print(f"[crm_journal] Journal is {size} bytes (limit {JOURNAL_MAX_BYTES}); compacting")
+            self.compact()
+        return True
+
+    def compact(self) -> int:
+        """Fold pending patches into the CRM store and export the CSV. Returns rows patched."""
+        with self._locked():
+            if self.path.exists() and not self.compacting_path.exists():
+                os.replace(self.path, self.compacting_path)
+            elif self.path.exists():
+                # A previous compaction died midway: fold both, oldest first
+                with self.compacting_path.open("a", encoding="utf-8") as dst, self.path.open("r", encoding="utf-8") as src:
+                    dst.write(src.read())
+                    dst.flush()
+                    os.fsync(dst.fileno())
+                os.remove(self.path)
+            if not self.compacting_path.exists():
+                return 0
+
+            patches: Dict[str, Dict[str, Any]] = {}
+            lines = self._read_file(self.compacting_path, patches)
+            store = CRMStore.for_csv(self.csv_path)
+            found = store.patch_many(patches)
+            missing = [email for email, ok in found.items() if not ok]
+            if missing:
+                # Leads saved before they existed in the CRM are appended (save_row semantics)
+                email_col = _find_email_col(store.headers())
+                store.upsert_many([{email_col: email, **patches[email]} for email in missing], email_key=email_col)
+            store.flush()
+            os.remove(self.compacting_path)
+            self._cache, self._cache_sig = {}, (-1, -1)
+        print(f"[crm_journal] Compacted {lines} patch line(s) into {len(patches)} row(s)")
+        return len(patches)
+
+
+__all__ = ["CRMJournal", "JOURNAL_MAX_BYTES"]
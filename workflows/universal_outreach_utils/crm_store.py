@@ -0,0 +1,407 @@
+"""
+SQLite-backed CRM store for the Outreach system.
+
+The CRM CSV stays the import/export format (Google Sheet sync, registry sync and
+humans all read it), but per-lead updates no longer rewrite the whole file:
+
+- Rows live in a sidecar SQLite database next to the CSV (``CRM_leads.csv`` ->
+  ``CRM_leads.sqlite3``), keyed by normalized Email.
+- Client Name, Sequence Stage, Owner / Assigned To and Messaging Status are
+  mirrored into indexed columns so selections don't scan every row.
+- ``upsert`` / ``patch`` are point writes (one small transaction per call).
+- ``flush`` exports the CSV atomically. It runs at the end of each run, at most
+  every ``CRM_STORE_FLUSH_SEC`` seconds while writes happen, and at exit.
+- If the CSV changes underneath us (registry sync, manual edit) it is
+  re-imported on the next access; fields we changed but have not exported yet
+  are re-applied on top so neither side loses updates.
+
+Path suggestion: workflows/universal_outreach_utils/crm_store.py
+"""
+from __future__ import annotations
+
+import atexit
+import csv
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+# Seconds between automatic CSV exports while updates are pending (0 = only on flush()).
+AUTOFLUSH_SEC = int(os.getenv("CRM_STORE_FLUSH_SEC", "300"))
+
+# Candidate column names for the lead's email (case-insensitive), first match wins
+EMAIL_COLS = ["Email", "email", "Email Address", "E-mail", "Primary Email"]
+
+# Indexed column -> CRM header it mirrors
+INDEXED_COLUMNS: Dict[str, str] = {
+    "client_name": "Client Name",
+    "sequence_stage": "Sequence Stage",
+    "owner": "Owner / Assigned To",
+    "messaging_status": "Messaging Status",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS leads (
+    pos              INTEGER PRIMARY KEY,      -- CSV row order
+    email            TEXT UNIQUE,              -- normalized key; NULL when blank/duplicate
+    client_name      TEXT NOT NULL DEFAULT '',
+    sequence_stage   TEXT NOT NULL DEFAULT '',
+    owner            TEXT NOT NULL DEFAULT '',
+    messaging_status TEXT NOT NULL DEFAULT '',
+    dirty            TEXT NOT NULL DEFAULT '', -- JSON list of fields not yet exported
+    data             TEXT NOT NULL             -- full row as JSON
+);
+CREATE INDEX IF NOT EXISTS ix_leads_client ON leads(client_name);
+CREATE INDEX IF NOT EXISTS ix_leads_stage ON leads(sequence_stage);
+CREATE INDEX IF NOT EXISTS ix_leads_owner ON leads(owner);
+CREATE INDEX IF NOT EXISTS ix_leads_status ON leads(messaging_status);
+CREATE TABLE IF NOT EXISTS headers (pos INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+"""
+
+
+def normalize_email(value: Any) -> str:
+    return (str(value) if value is not None else "").strip().lower()
+
+
+def _norm(value: Any) -> str:
+    """Lowercase, trim, and collapse inner whitespace (same rule the runners use)."""
+    return " ".join((str(value) if value is not None else "").split()).lower()
+
+
+def _csv_signature(path: Path) -> str:
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return ""
+    return f"{st.st_size}:{st.st_mtime_ns}"
+
+
+class CRMStore:
+    """Indexed, point-updatable view of one CRM CSV file."""
+
+    _instances: Dict[str, "CRMStore"] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, csv_path: Path | str, db_path: Path | str | None = None) -> None:
+        self.csv_path = Path(csv_path)
+        self.db_path = Path(db_path) if db_path else self.csv_path.with_suffix(".sqlite3")
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        print(f"[crm_store] Opened store {self.db_path} for {self.csv_path}")
+        self._sync_from_csv()
+
+    @classmethod
+    def for_csv(cls, csv_path: Path | str) -> "CRMStore":
+        """Process-wide store instance for a CSV path."""
+        key = str(Path(csv_path).resolve())
+        with cls._instances_lock:
+            store = cls._instances.get(key)
+            if store is None:
+                store = cls(csv_path)
+                cls._instances[key] = store
+            return store
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _meta(self, key: str, default: str = "") -> str:
+        row = self._conn.execute("SELECT value FROM meta WHERE key=?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def _set_meta(self, key: str, value: str) -> None:
+        self._conn.execute("INSERT OR REPLACE INTO meta(key, value) VALUES(?, ?)", (key, value))
+
+    def _email_col(self) -> str:
+        return self._meta("email_col", "Email")
+
+    def _index_values(self, data: Dict[str, Any]) -> List[str]:
+        return [_norm(data.get(col)) for col in INDEXED_COLUMNS.values()]
+
+    def _ensure_headers(self, names: Iterable[str]) -> None:
+        known = {r[0] for r in self._conn.execute("SELECT name FROM headers")}
+        nxt = self._conn.execute("SELECT COALESCE(MAX(pos), -1) + 1 FROM headers").fetchone()[0]
+        for name in names:
+            if name and name not in known:
+                self._conn.execute("INSERT INTO headers(pos, name) VALUES(?, ?)", (nxt, name))
+                known.add(name)
+                nxt += 1
+
+    def _begin(self) -> None:
+        self._conn.execute("BEGIN IMMEDIATE")
+
+    def _sync_from_csv(self) -> None:
+        """Re-import the CSV if it changed since our last import/export."""
+        sig = _csv_signature(self.csv_path)
+        if not sig or sig == self._meta("csv_sig"):
+            return
+        with self._lock:
+            self._begin()
+            try:
+                # Re-check under the write lock (another process may have imported it already)
+                if sig != self._meta("csv_sig"):
+                    self._import_csv_locked(sig)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _import_csv_locked(self, sig: str) -> None:
+        print(f"[crm_store] CSV changed on disk; importing {self.csv_path}")
+        with self.csv_path.open("r", newline="", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            headers = list(reader.fieldnames or [])
+            rows = [dict(r) for r in reader]
+
+        lower_map = {h.lower(): h for h in headers}
+        email_col = next((lower_map[c.lower()] for c in EMAIL_COLS if c.lower() in lower_map), "Email")
+
+        # Keep fields we changed but have not exported yet
+        pending: Dict[str, Dict[str, Any]] = {}
+        for email, dirty, data in self._conn.execute("SELECT email, dirty, data FROM leads WHERE dirty <> ''"):
+            if not email:
+                continue
+            fields = json.loads(dirty)
+            row = json.loads(data)
+            pending[email] = {k: row.get(k, "") for k in fields}
+
+        self._conn.execute("DELETE FROM leads")
+        self._conn.execute("DELETE FROM headers")
+        self._ensure_headers(headers)
+        self._ensure_headers(k for fields in pending.values() for k in fields)
+
+        seen = set()
+        duplicates = 0
+        for pos, row in enumerate(rows):
+            key = normalize_email(row.get(email_col)) or None
+            if key in seen:
+                duplicates += 1
+                key = None
+            if key:
+                seen.add(key)
+            dirty = ""
+            if key and key in pending:
+                fields = pending.pop(key)
+                row.update(fields)
+                dirty = json.dumps(sorted(fields))
+            self._conn.execute(
+                "INSERT INTO leads(pos, email, client_name, sequence_stage, owner, messaging_status, dirty, data) "
+                "VALUES(?, ?, ?, ?, ?, ?, ?, ?)",
+                (pos, key, *self._index_values(row), dirty, json.dumps(row, ensure_ascii=False)),
+            )
+
+        # Rows we created that the external writer dropped: keep them (save_row appended too)
+        nxt = len(rows)
+        for key, fields in pending.items():
+            self._ensure_headers(fields.keys())
+            row = {email_col: key, **fields}
+            self._conn.execute(
+                "INSERT INTO leads(pos, email, client_name, sequence_stage, owner, messaging_status, dirty, data) "
+                "VALUES(?, ?, ?, ?, ?, ?, ?, ?)",
+                (nxt, key, *self._index_values(row), json.dumps(sorted(row.keys())), json.dumps(row, ensure_ascii=False)),
+            )
+            nxt += 1
+
+        self._set_meta("email_col", email_col)
+        self._set_meta("csv_sig", sig)
+        if not self._meta("last_export_ts"):
+            # The CSV on disk is current as of this import; start the autoflush clock here
+            self._set_meta("last_export_ts", str(time.time()))
+        if duplicates:
+            print(f"[crm_store] WARNING: {duplicates} duplicate email row(s) kept but not addressable by email")
+        print(f"[crm_store] Imported {len(rows)} rows with {len(headers)} columns (email column: {email_col})")
+
+    def _write_row(self, key: str, incoming: Dict[str, Any], *, insert: bool) -> bool:
+        """Merge `incoming` into the row for `key` inside an open transaction."""
+        cur = self._conn.execute("SELECT pos, dirty, data FROM leads WHERE email=?", (key,)).fetchone()
+        if cur is None:
+            if not insert:
+                return False
+            pos = self._conn.execute("SELECT COALESCE(MAX(pos), -1) + 1 FROM leads").fetchone()[0]
+            row = dict(incoming)
+            row.setdefault(self._email_col(), key)
+            self._ensure_headers(row.keys())
+            self._conn.execute(
+                "INSERT INTO leads(pos, email, client_name, sequence_stage, owner, messaging_status, dirty, data) "
+                "VALUES(?, ?, ?, ?, ?, ?, ?, ?)",
+                (pos, key, *self._index_values(row), json.dumps(sorted(row.keys())), json.dumps(row, ensure_ascii=False)),
+            )
+            return True
+
+        pos, dirty, data = cur
+        row = json.loads(data)
+        changed = {k for k, v in incoming.items() if row.get(k) != v}
+        if not changed:
+            return True
+        row.update({k: incoming[k] for k in changed})
+        self._ensure_headers(changed)
+        fields = set(json.loads(dirty)) if dirty else set()
+        fields |= changed
+        self._conn.execute(
+            "UPDATE leads SET client_name=?, sequence_stage=?, owner=?, messaging_status=?, dirty=?, data=? WHERE pos=?",
+            (*self._index_values(row), json.dumps(sorted(fields)), json.dumps(row, ensure_ascii=False), pos),
+        )
+        return True
+
+    def _transaction_write(self, items: List[tuple[str, Dict[str, Any]]], *, insert: bool) -> List[bool]:
+        self._sync_from_csv()
+        with self._lock:
+            self._begin()
+            try:
+                results = [self._write_row(key, fields, insert=insert) for key, fields in items]
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        self._maybe_autoflush()
+        return results
+
+    def _maybe_autoflush(self) -> None:
+        if AUTOFLUSH_SEC <= 0:
+            return
+        last = float(self._meta("last_export_ts", "0") or 0)
+        if time.time() - last >= AUTOFLUSH_SEC:
+            self.flush()
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def headers(self) -> List[str]:
+        self._sync_from_csv()
+        with self._lock:
+            return [r[0] for r in self._conn.execute("SELECT name FROM headers ORDER BY pos")]
+
+    def get(self, email: str) -> Optional[Dict[str, Any]]:
+        key = normalize_email(email)
+        if not key:
+            return None
+        self._sync_from_csv()
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM leads WHERE email=?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def rows(
+        self,
+        *,
+        client: Optional[str] = None,
+        stage: Optional[str] = None,
+        owner: Optional[str] = None,
+        status: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """All rows in CSV order, optionally narrowed via the indexed columns.
+
+        Filters compare case-insensitively after whitespace normalization; pass ""
+        to select rows where that column is blank.
+        """
+        self._sync_from_csv()
+        clauses, params = [], []
+        for col, val in (("client_name", client), ("sequence_stage", stage), ("owner", owner), ("messaging_status", status)):
+            if val is not None:
+                clauses.append(f"{col}=?")
+                params.append(_norm(val))
+        sql = "SELECT data FROM leads"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY pos"
+        with self._lock:
+            return [json.loads(r[0]) for r in self._conn.execute(sql, params)]
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def upsert(self, row: Dict[str, Any], *, email_key: Optional[str] = None, headers: Iterable[str] = ()) -> bool:
+        """Merge `row` into the stored lead (values that are None are ignored); insert if missing.
+
+        Returns False only when the row has no email to key on.
+        """
+        return self.upsert_many([row], email_key=email_key, headers=headers) == 1
+
+    def upsert_many(self, rows: Iterable[Dict[str, Any]], *, email_key: Optional[str] = None, headers: Iterable[str] = ()) -> int:
+        """Upsert several rows in one transaction. Returns how many had an email to key on."""
+        col = email_key or self._email_col()
+        items = []
+        for row in rows:
+            key = normalize_email(row.get(col))
+            if key:
+                items.append((key, {k: v for k, v in row.items() if v is not None}))
+        headers = list(headers)
+        if headers:
+            with self._lock:
+                self._begin()
+                self._ensure_headers(headers)
+                self._conn.execute("COMMIT")
+        if items:
+            self._transaction_write(items, insert=True)
+        return len(items)
+
+    def patch(self, email: str, fields: Dict[str, Any]) -> bool:
+        """Update only `fields` on an existing lead. Returns False if the email is unknown."""
+        key = normalize_email(email)
+        if not key:
+            return False
+        return self._transaction_write([(key, dict(fields))], insert=False)[0]
+
+    def patch_many(self, updates: Dict[str, Dict[str, Any]]) -> Dict[str, bool]:
+        """Apply several patches in one transaction. Returns {email: found}."""
+        items = [(normalize_email(e), dict(f)) for e, f in updates.items() if normalize_email(e)]
+        results = self._transaction_write(items, insert=False) if items else []
+        return {key: ok for (key, _), ok in zip(items, results)}
+
+    def flush(self, *, quoting: int = csv.QUOTE_ALL) -> bool:
+        """Export the CSV atomically if there are unexported changes. Returns True if written."""
+        self._sync_from_csv()
+        with self._lock:
+            self._begin()
+            try:
+                pending = self._conn.execute("SELECT COUNT(*) FROM leads WHERE dirty <> ''").fetchone()[0]
+                if not pending:
+                    self._set_meta("last_export_ts", str(time.time()))
+                    self._conn.execute("COMMIT")
+                    return False
+                headers = [r[0] for r in self._conn.execute("SELECT name FROM headers ORDER BY pos")]
+                self.csv_path.parent.mkdir(parents=True, exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(prefix="crm_", suffix=".csv", dir=str(self.csv_path.parent))
+                try:
+                    with os.fdopen(fd, "w", newline="", encoding="utf-8") as f:
+                        writer = csv.DictWriter(f, fieldnames=headers, quoting=quoting, restval="", extrasaction="ignore")
+                        writer.writeheader()
+                        for (data,) in self._conn.execute("SELECT data FROM leads ORDER BY pos"):
+                            writer.writerow(json.loads(data))
+                    os.replace(tmp_path, self.csv_path)
+                finally:
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+                self._conn.execute("UPDATE leads SET dirty='' WHERE dirty <> ''")
+                self._set_meta("csv_sig", _csv_signature(self.csv_path))
+                self._set_meta("last_export_ts", str(time.time()))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        print(f"[crm_store] Exported {pending} updated row(s) to {self.csv_path}")
+        return True
+
+
+def flush_all() -> None:
+    """Export every open store that still has pending changes (registered at exit)."""
+    for store in list(CRMStore._instances.values()):
+        try:
+            store.flush()
+        except Exception as e:
+            print(f"[crm_store] Flush at exit failed for {store.csv_path}: {e}")
+
+
+atexit.register(flush_all)
+
+__all__ = ["CRMStore", "INDEXED_COLUMNS", "normalize_email", "flush_all"]
@@ -0,0 +1,128 @@
+"""
+Shared Gmail API service cache for the Outreach system.
+
+Building a Gmail client means loading credentials (token file I/O, sometimes a
+refresh round trip) and constructing the API resource from the discovery doc.
+The senders, the thread resolver and the Gmail watcher used to do this for every
+message. This module does it once per inbox:
+
+- Credentials are loaded once per cache key (e.g. ``"send:<inbox>"``) via the
+  caller's loader and kept in memory.
+- Tokens are refreshed proactively when they are within ``GMAIL_REFRESH_MARGIN_SEC``
+  of expiry (default 300s), so a request never starts with a token about to
+  lapse. ``on_refresh`` lets the caller persist the refreshed token.
+- The built service is cached per thread, because the underlying httplib2
+  transport is not thread-safe. Worker threads each get their own client, and
+  all of them share one credentials object.
+- ``invalidate(key)`` drops an entry (e.g. after an auth error) so the next call
+  reloads from disk / re-runs the OAuth flow.
+
+Path suggestion: workflows/universal_outreach_utils/gmail_services.py
+"""
+from __future__ import annotations
+
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Optional
+
+REFRESH_MARGIN_SEC = int(os.getenv("GMAIL_REFRESH_MARGIN_SEC", "300"))
+
+
+class _Entry:
+    def __init__(self, creds: Any, on_refresh: Optional[Callable[[Any], None]]) -> None:
+        self.creds = creds
+        self.on_refresh = on_refresh
+        self.lock = threading.Lock()
+        self.services = threading.local()
+
+
+class GmailServiceCache:
+    """Per-key credentials + per-thread Gmail service objects."""
+
+    def __init__(self, refresh_margin_sec: int = REFRESH_MARGIN_SEC) -> None:
+        self.refresh_margin = timedelta(seconds=refresh_margin_sec)
+        self._entries: Dict[str, _Entry] = {}
+        self._lock = threading.Lock()
+
+    def _entry(self, key: str, load_creds: Callable[[], Any], on_refresh) -> _Entry:
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None:
+            return entry
+        # Load outside the global lock (may hit disk or run an OAuth flow)
+        creds = load_creds()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = _Entry(creds, on_refresh)
+                print(f"[gmail_services] Loaded credentials for {key}")
+            return entry
+
+    def _needs_refresh(self, creds: Any) -> bool:
+        if not getattr(creds, "token", None):
+            return True
+        expiry = getattr(creds, "expiry", None)
+        if expiry is None:
+            return False
+        # google-auth keeps expiry as a naive UTC datetime
+        return expiry - self.refresh_margin <= datetime.now(timezone.utc).replace(tzinfo=None)
+
+    def _ensure_fresh(self, key: str, entry: _Entry) -> None:
+        if not self._needs_refresh(entry.creds):
+            return
+        with entry.lock:
+            if not self._needs_refresh(entry.creds):
+                return
+            from google.auth.transport.requests import Request
+
+            entry.creds.refresh(Request())
+            print(f"[gmail_services] Refreshed token for {key} (expires {getattr(entry.creds, 'expiry', None)})")
+            if entry.on_refresh:
+                try:
+                    entry.on_refresh(entry.creds)
+                except Exception as e:
+                    print(f"[gmail_services] on_refresh failed for {key}: {e}")
+
+    def service(
+        self,
+        key: str,
+        load_creds: Callable[[], Any],
+        *,
+        on_refresh: Optional[Callable[[Any], None]] = None,
+    ):
+        """Return this thread's Gmail service for `key`, loading/refreshing credentials as needed."""
+        entry = self._entry(key, load_creds, on_refresh)
+        self._ensure_fresh(key, entry)
+        svc = getattr(entry.services, "svc", None)
+        if svc is None:
+            from googleapiclient.discovery import build
+
+            svc = build("gmail", "v1", credentials=entry.creds, cache_discovery=False)
+            entry.services.svc = svc
+        return svc
+
+    def credentials(self, key: str) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+        return entry.creds if entry else None
+
+    def invalidate(self, key: str) -> None:
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                print(f"[gmail_services] Invalidated cached credentials for {key}")
+
+
+_cache = GmailServiceCache()
+
+
+def gmail_service(key: str, load_creds: Callable[[], Any], *, on_refresh: Optional[Callable[[Any], None]] = None):
+    """Module-level shortcut to the shared cache (see GmailServiceCache.service)."""
+    return _cache.service(key, load_creds, on_refresh=on_refresh)
+
+
+def invalidate(key: str) -> None:
+    _cache.invalidate(key)
+
+
+__all__ = ["GmailServiceCache", "gmail_service", "invalidate"]
@@ -0,0 +1,149 @@
+"""
+Persistent LLM completion cache for the Outreach system.
+
+Content-addressed: the key is a SHA-256 of (model, temperature, max_tokens,
+rendered messages, lead feature payload). Re-running a client after a crash or a
+dry run therefore returns the same opener/subject/personalization instantly
+instead of paying for it again.
+
+- SQLite (WAL) so several processes can share it safely.
+- Entries expire after ``LLM_CACHE_TTL_SEC`` (default 7 days).
+- Size-bounded: past ``LLM_CACHE_MAX_ENTRIES`` the least recently used entries
+  are evicted.
+- Bypass: set ``LLM_CACHE_BYPASS=1`` (or pass ``cache=False`` at the call site)
+  to skip reads and writes.
+
+Used through ``llm_gateway.LLMGateway.complete(..., cache=True, cache_scope=...)``.
+
+Path suggestion: workflows/universal_outreach_utils/llm_cache.py
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+CACHE_PATH = os.getenv("LLM_CACHE_PATH", "/Users/kevinnovanta/backend_for_ai_agency/data/caches/llm_cache.sqlite3")
+TTL_SEC = int(os.getenv("LLM_CACHE_TTL_SEC", str(7 * 24 * 3600)))
+MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "20000"))
+
+# Check the size bound every N writes rather than on each one
+_EVICT_EVERY = 50
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS completions (
+    key         TEXT PRIMARY KEY,
+    label       TEXT NOT NULL DEFAULT '',
+    content     TEXT NOT NULL,
+    created_at  REAL NOT NULL,
+    last_access REAL NOT NULL,
+    hits        INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS ix_completions_last_access ON completions(last_access);
+"""
+
+
+def cache_bypassed() -> bool:
+    return os.getenv("LLM_CACHE_BYPASS", "").strip().lower() in ("1", "true", "yes", "on")
+
+
+class LLMCache:
+    """Disk-backed completion cache with TTL and LRU eviction."""
+
+    def __init__(self, path: Path | str = CACHE_PATH, *, ttl_sec: int = TTL_SEC, max_entries: int = MAX_ENTRIES) -> None:
+        self.path = Path(path)
+        self.ttl_sec = ttl_sec
+        self.max_entries = max_entries
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    @staticmethod
+    def make_key(
+        *,
+        model: str,
+        temperature: float,
+        messages: List[Dict[str, str]],
+        max_tokens: Optional[int] = None,
+        scope: Any = None,
+        extra: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        payload = {
+            "model": model,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "messages": messages,
+            "scope": scope,
+            "extra": extra or {},
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT content, created_at FROM completions WHERE key=?", (key,)).fetchone()
+            if row is None:
+                return None
+            content, created_at = row
+            if self.ttl_sec > 0 and now - created_at > self.ttl_sec:
+                self._conn.execute("DELETE FROM completions WHERE key=?", (key,))
+                return None
+            self._conn.execute("UPDATE completions SET last_access=?, hits=hits+1 WHERE key=?", (now, key))
+            return content
+
+    def put(self, key: str, content: str, *, label: str = "") -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO completions(key, label, content, created_at, last_access, hits) VALUES(?, ?, ?, ?, ?, 0)",
+                (key, label, content, now, now),
+            )
+            self._writes += 1
+            if self._writes % _EVICT_EVERY == 0:
+                self._evict_locked(now)
+
+    def _evict_locked(self, now: float) -> None:
+        if self.ttl_sec > 0:
+            self._conn.execute("DELETE FROM completions WHERE created_at < ?", (now - self.ttl_sec,))
+        if self.max_entries > 0:
+            count = self._conn.execute("SELECT COUNT(*) FROM completions").fetchone()[0]
+            excess = count - self.max_entries
+            if excess > 0:
+                self._conn.execute(
+                    "DELETE FROM completions WHERE key IN (SELECT key FROM completions ORDER BY last_access ASC LIMIT ?)",
+                    (excess,),
+                )
+                print(f"[llm_cache] Evicted {excess} least recently used entr{'y' if excess == 1 else 'ies'}")
+
+    def evict(self) -> None:
+        """Drop expired entries and trim to max_entries (LRU)."""
+        with self._lock:
+            self._evict_locked(time.time())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM completions")
+
+
+_cache: Optional[LLMCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> LLMCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = LLMCache()
+        return _cache
+
+
+__all__ = ["LLMCache", "get_cache", "cache_bypassed"]
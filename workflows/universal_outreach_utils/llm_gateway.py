@@ -0,0 +1,377 @@
+"""
+Shared LLM gateway for the Outreach system.
+
+Every copy-generation call (opener writer, personalizer, follow-up writers) goes
+through one process-wide gateway instead of its own synchronous OpenAI client:
+
+- One ``AsyncOpenAI`` client running on a background event-loop thread. Sync
+  callers use ``complete()``; async callers use ``acomplete()``.
+- A request/token budget (RPM + TPM token buckets) shared by all callers.
+- Adaptive backoff on 429s: the budget is halved and requests pause for the
+  server's retry-after. It then creeps back up on successes (AIMD).
+- Per-request timeout plus bounded retries on 429 / timeouts / 5xx.
+- Identical requests already in flight are coalesced into one API call.
+- Per-label call counts, latency and token usage (``stats()``; summary at exit).
+- Optional persistent completion cache (``cache=True``; see ``llm_cache.py``).
+
+Config (env): LLM_RPM, LLM_TPM, LLM_TIMEOUT_SEC, LLM_MAX_RETRIES, LLM_MAX_CONCURRENCY,
+OPENAI_API_KEY (otherwise read from Creds/gpt_key.json), LLM_CACHE_* (see llm_cache.py).
+
+Path suggestion: workflows/universal_outreach_utils/llm_gateway.py
+"""
+from __future__ import annotations
+
+import asyncio
+import atexit
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from openai import AsyncOpenAI, APIConnectionError, APIStatusError, APITimeoutError, RateLimitError
+
+from workflows.universal_outreach_utils.llm_cache import cache_bypassed, get_cache
+
+GPT_KEY_PATH = "/Users/kevinnovanta/backend_for_ai_agency/Creds/gpt_key.json"
+DEFAULT_MODEL = "gpt-4o-mini"
+
+RPM = float(os.getenv("LLM_RPM", "500"))
+TPM = float(os.getenv("LLM_TPM", "200000"))
+TIMEOUT_SEC = float(os.getenv("LLM_TIMEOUT_SEC", "30"))
+MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+
+
+def _load_api_key() -> str:
+    key = os.environ.get("OPENAI_API_KEY")
+    if key:
+        return key
+    with open(os.environ.get("OPENAI_KEY_PATH", GPT_KEY_PATH)) as f:
+        secrets = json.load(f)
+    return secrets.get("api_key") or secrets.get("OPENAI_API_KEY") or ""
+
+
+def _estimate_tokens(messages: List[Dict[str, str]], max_tokens: Optional[int]) -> int:
+    # ~4 chars/token is close enough for budgeting; reconciled with real usage afterwards
+    chars = sum(len(m.get("content") or "") for m in messages)
+    return chars // 4 + (max_tokens or 256)
+
+
+def _retry_after(e: Exception) -> Optional[float]:
+    response = getattr(e, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    for name in ("retry-after-ms", "retry-after"):
+        val = headers.get(name)
+        if val:
+            try:
+                return float(val) / (1000.0 if name.endswith("-ms") else 1.0)
+            except ValueError:
+                pass
+    return None
+
+
+class _RateBudget:
+    """RPM/TPM token buckets with an AIMD scale factor (lives on the gateway loop)."""
+
+    def __init__(self, rpm: float, tpm: float) -> None:
+        self.rpm = rpm
+        self.tpm = tpm
+        self.scale = 1.0
+        self.requests = rpm
+        self.tokens = tpm
+        self.paused_until = 0.0
+        self._last = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._last
+        self._last = now
+        self.requests = min(self.rpm, self.requests + elapsed * self.rpm * self.scale / 60.0)
+        self.tokens = min(self.tpm, self.tokens + elapsed * self.tpm * self.scale / 60.0)
+
+    async def acquire(self, tokens: int) -> float:
+        """Wait for budget; returns seconds spent waiting."""
+        tokens = min(tokens, int(self.tpm))
+        waited = 0.0
+        async with self._lock:
+            while True:
+                self._refill()
+                pause = self.paused_until - time.monotonic()
+                if pause <= 0 and self.requests >= 1 and self.tokens >= tokens:
+                    self.requests -= 1
+                    self.tokens -= tokens
+                    return waited
+                need_req = max(0.0, 1 - self.requests) * 60.0 / (self.rpm * self.scale)
+                need_tok = max(0.0, tokens - self.tokens) * 60.0 / (self.tpm * self.scale)
+                delay = max(pause, need_req, need_tok, 0.01)
+                waited += delay
+                await asyncio.sleep(delay)
+
+    def reconcile(self, estimated: int, actual: int) -> None:
+        self.tokens = min(self.tpm, self.tokens + estimated - actual)
+
+    def on_success(self) -> None:
+        self.scale = min(1.0, self.scale + 0.05)
+
+    def on_rate_limited(self, retry_after: Optional[float]) -> None:
+        self.scale = max(0.05, self.scale * 0.5)
+        pause = retry_after if retry_after is not None else 2.0
+        self.paused_until = max(self.paused_until, time.monotonic() + pause)
+
+
+class LLMGateway:
+    """Process-wide async OpenAI access with budgeting, backoff, coalescing and stats."""
+
+    def __init__(
+        self,
+        *,
+        api_key: Optional[str] = None,
+        rpm: float = RPM,
+        tpm: float = TPM,
+        timeout: float = TIMEOUT_SEC,
+        max_retries: int = MAX_RETRIES,
+        max_concurrency: int = MAX_CONCURRENCY,
+    ) -> None:
+        self._api_key = api_key or _load_api_key()
+        self._rpm, self._tpm = rpm, tpm
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self._max_concurrency = max(1, max_concurrency)
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._stats_lock = threading.Lock()
+
+        # Dedicated event loop thread: the async client and limiter live here
+        self._loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run_loop, name="llm-gateway", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def _run_loop(self) -> None:
+        asyncio.set_event_loop(self._loop)
+        self._client = AsyncOpenAI(api_key=self._api_key, timeout=self.timeout, max_retries=0)
+        self._budget = _RateBudget(self._rpm, self._tpm)
+        self._slots = asyncio.Semaphore(self._max_concurrency)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._ready.set()
+        self._loop.run_forever()
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def complete(
+        self,
+        *,
+        messages: List[Dict[str, str]],
+        model: str = DEFAULT_MODEL,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        label: str = "llm",
+        cache: bool = False,
+        cache_scope: Any = None,
+        **extra: Any,
+    ) -> str:
+        """Blocking chat completion; returns the message content. Raises after retries are exhausted.
+
+        With ``cache=True`` the result is read from / written to the persistent completion
+        cache, keyed by the request plus ``cache_scope`` (e.g. the lead features the prompt
+        was rendered for). ``LLM_CACHE_BYPASS=1`` disables it globally.
+        """
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("LLMGateway.complete() called from the gateway loop; use acomplete()")
+        cache_key = self._cache_lookup(cache, messages, model, temperature, max_tokens, cache_scope, extra)
+        if isinstance(cache_key, tuple):
+            self._bump(label, cache_hits=1)
+            return cache_key[1]
+        fut = asyncio.run_coroutine_threadsafe(
+            self._complete(messages, model, temperature, max_tokens, label, extra), self._loop
+        )
+        content = fut.result()
+        self._cache_store(cache_key, content, label)
+        return content
+
+    async def acomplete(
+        self,
+        *,
+        messages: List[Dict[str, str]],
+        model: str = DEFAULT_MODEL,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        label: str = "llm",
+        cache: bool = False,
+        cache_scope: Any = None,
+        **extra: Any,
+    ) -> str:
+        """Async chat completion usable from any event loop (same ``cache`` semantics as ``complete``)."""
+        cache_key = self._cache_lookup(cache, messages, model, temperature, max_tokens, cache_scope, extra)
+        if isinstance(cache_key, tuple):
+            self._bump(label, cache_hits=1)
+            return cache_key[1]
+        coro = self._complete(messages, model, temperature, max_tokens, label, extra)
+        if asyncio.get_running_loop() is self._loop:
+            content = await coro
+        else:
+            content = await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, self._loop))
+        self._cache_store(cache_key, content, label)
+        return content
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Per-label counters: calls, errors, retries, coalesced, cache_hits, latency_total/max, prompt/completion tokens."""
+        with self._stats_lock:
+            return {label: dict(s) for label, s in self._stats.items()}
+
+    def log_stats(self) -> None:
+        for label, s in sorted(self.stats().items()):
+            calls = int(s.get("calls", 0))
+            avg = (s.get("latency_total", 0.0) / calls) if calls else 0.0
+            print(
+                f"[llm_gateway] {label}: calls={calls} errors={int(s.get('errors', 0))} "
+                f"retries={int(s.get('retries', 0))} coalesced={int(s.get('coalesced', 0))} "
+                f"cache_hits={int(s.get('cache_hits', 0))} "
+                f"avg_latency={avg:.2f}s max_latency={s.get('latency_max', 0.0):.2f}s "
+                f"tokens_in={int(s.get('prompt_tokens', 0))} tokens_out={int(s.get('completion_tokens', 0))}"
+            )
+
+    # ------------------------------------------------------------------
+    # Completion cache (checked before the request is handed to the gateway loop)
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _cache_lookup(cache, messages, model, temperature, max_tokens, scope, extra):
+        """Returns (key, content) on a hit, the key to store under on a miss, or None when caching is off."""
+        if not cache or cache_bypassed():
+            return None
+        try:
+            store = get_cache()
+            key = store.make_key(
+                model=model, temperature=temperature, messages=messages,
+                max_tokens=max_tokens, scope=scope, extra=extra,
+            )
+            hit = store.get(key)
+        except Exception as e:
+            print(f"[llm_gateway] cache lookup failed, calling the API: {e}")
+            return None
+        return (key, hit) if hit is not None else key
+
+    @staticmethod
+    def _cache_store(key: Optional[str], content: str, label: str) -> None:
+        if not key or not content:
+            return
+        try:
+            get_cache().put(key, content, label=label)
+        except Exception as e:
+            print(f"[llm_gateway] cache write failed: {e}")
+
+    # ------------------------------------------------------------------
+    # Internals (run on the gateway loop)
+    # ------------------------------------------------------------------
+
+    def _bump(self, label: str, **values: float) -> None:
+        with self._stats_lock:
+            s = self._stats.setdefault(label, {})
+            for k, v in values.items():
+                if k == "latency_max":
+                    s[k] = max(s.get(k, 0.0), v)
+                else:
+                    s[k] = s.get(k, 0) + v
+
+    async def _complete(self, messages, model, temperature, max_tokens, label, extra) -> str:
+        key = hashlib.sha256(
+            json.dumps([model, temperature, max_tokens, messages, extra], sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()
+        existing = self._inflight.get(key)
+        if existing is not None:
+            self._bump(label, coalesced=1)
+            return await asyncio.shield(existing)
+
+        fut = self._loop.create_future()
+        self._inflight[key] = fut
+        try:
+            content = await self._request(messages, model, temperature, max_tokens, label, extra)
+            fut.set_result(content)
+            return content
+        except BaseException as e:
+            fut.set_exception(e)
+            fut.exception()  # mark retrieved when nobody else is waiting
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _request(self, messages, model, temperature, max_tokens, label, extra) -> str:
+        estimated = _estimate_tokens(messages, max_tokens)
+        kwargs: Dict[str, Any] = {"model": model, "messages": messages, "temperature": temperature, **extra}
+        if max_tokens is not None:
+            kwargs["max_tokens"] = max_tokens
+
+        attempt = 0
+        while True:
+            await self._budget.acquire(estimated)
+            started = time.monotonic()
+            try:
+                async with self._slots:
+                    resp = await self._client.chat.completions.create(**kwargs)
+            except RateLimitError as e:
+                retry_after = _retry_after(e)
+                self._budget.on_rate_limited(retry_after)
+                error, retryable = e, True
+                print(f"[llm_gateway] {label}: rate limited (retry-after={retry_after}); budget scale now {self._budget.scale:.2f}")
+            except (APITimeoutError, APIConnectionError) as e:
+                error, retryable = e, True
+                print(f"[llm_gateway] {label}: {type(e).__name__}: {e}")
+            except APIStatusError as e:
+                error, retryable = e, e.status_code >= 500
+                print(f"[llm_gateway] {label}: HTTP {e.status_code}: {e}")
+            else:
+                latency = time.monotonic() - started
+                usage = getattr(resp, "usage", None)
+                prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+                completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+                self._budget.reconcile(estimated, prompt_tokens + completion_tokens or estimated)
+                self._budget.on_success()
+                self._bump(
+                    label,
+                    calls=1,
+                    latency_total=latency,
+                    latency_max=latency,
+                    prompt_tokens=prompt_tokens,
+                    completion_tokens=completion_tokens,
+                )
+                return resp.choices[0].message.content or ""
+
+            attempt += 1
+            if not retryable or attempt > self.max_retries:
+                self._bump(label, errors=1)
+                raise error
+            self._bump(label, retries=1)
+            # Exponential backoff with jitter (rate-limit pauses are enforced by the budget)
+            await asyncio.sleep(min(30.0, 0.5 * (2 ** (attempt - 1))) + random.uniform(0, 0.25))
+
+
+_gateways: Dict[str, LLMGateway] = {}
+_gateways_lock = threading.Lock()
+
+
+def get_gateway(api_key: Optional[str] = None) -> LLMGateway:
+    """Shared gateway (one per API key) so every caller draws from the same budget."""
+    key = api_key or _load_api_key()
+    with _gateways_lock:
+        gw = _gateways.get(key)
+        if gw is None:
+            gw = LLMGateway(api_key=key)
+            _gateways[key] = gw
+        return gw
+
+
+def _log_all_stats() -> None:
+    for gw in list(_gateways.values()):
+        gw.log_stats()
+
+
+atexit.register(_log_all_stats)
+
+__all__ = ["LLMGateway", "get_gateway", "DEFAULT_MODEL"]
@@ -0,0 +1,191 @@
+"""
+Persistent Message-ID / threadId -> lead index for reply matching.
+
+The senders record every outgoing message here: the RFC 5322 Message-ID they
+stamped on it and, when the Gmail API returns one, the threadId. The Gmail
+watcher then resolves an inbound message by its own threading headers first:
+
+    threadId -> In-Reply-To -> References -> (fallback) From address vs CRM
+
+Each step is a primary-key lookup, so matching stays constant time per message
+and also catches replies sent by a colleague or from an alias of the lead,
+which the From-address match misses.
+
+- SQLite (WAL) so the sender processes and the watcher can share it.
+- Entries older than ``MESSAGE_INDEX_TTL_DAYS`` (default 120) are pruned on open.
+- When a reply is matched by Message-ID the watcher also records its threadId,
+  so later messages in the same thread match on the first lookup.
+
+Path suggestion: workflows/universal_outreach_utils/message_index.py
+"""
+from __future__ import annotations
+
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+INDEX_PATH = os.getenv("MESSAGE_INDEX_PATH", "/Users/kevinnovanta/backend_for_ai_agency/data/caches/message_index.sqlite3")
+TTL_DAYS = float(os.getenv("MESSAGE_INDEX_TTL_DAYS", "120"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    message_id TEXT PRIMARY KEY,
+    lead_email TEXT NOT NULL,
+    inbox      TEXT NOT NULL DEFAULT '',
+    thread_id  TEXT NOT NULL DEFAULT '',
+    sent_at    REAL NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS threads (
+    thread_id  TEXT PRIMARY KEY,
+    lead_email TEXT NOT NULL,
+    inbox      TEXT NOT NULL DEFAULT '',
+    updated_at REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ix_messages_sent_at ON messages(sent_at);
+CREATE INDEX IF NOT EXISTS ix_threads_updated_at ON threads(updated_at);
+"""
+
+_MSGID_RE = re.compile(r"<([^<>\s]+)>")
+
+
+def normalize_message_id(value: Optional[str]) -> str:
+    """'<Abc@host>' -> 'abc@host' (brackets/whitespace stripped, case-folded)."""
+    return (value or "").strip().strip("<>").strip().lower()
+
+
+def parse_message_ids(header: Optional[str]) -> List[str]:
+    """All Message-IDs in an In-Reply-To / References header, newest (last) first."""
+    if not header:
+        return []
+    ids = _MSGID_RE.findall(header) or header.split()
+    return [normalize_message_id(i) for i in reversed(ids) if normalize_message_id(i)]
+
+
+class MessageIndex:
+    """Message-ID and threadId lookups for leads we have emailed."""
+
+    def __init__(self, path: Path | str = INDEX_PATH, *, ttl_days: float = TTL_DAYS) -> None:
+        self.path = Path(path)
+        self.ttl_sec = ttl_days * 86400
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self.prune()
+
+    def record(
+        self,
+        lead_email: str,
+        inbox: str = "",
+        *,
+        message_id: Optional[str] = None,
+        thread_id: Optional[str] = None,
+    ) -> bool:
+        """Remember that `inbox` emailed `lead_email` (by Message-ID and/or threadId)."""
+        lead = (lead_email or "").strip().lower()
+        mid = normalize_message_id(message_id)
+        tid = (thread_id or "").strip()
+        if not lead or not (mid or tid):
+            return False
+        box = (inbox or "").strip().lower()
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if mid:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO messages(message_id, lead_email, inbox, thread_id, sent_at) VALUES(?, ?, ?, ?, ?)",
+                        (mid, lead, box, tid, now),
+                    )
+                if tid:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO threads(thread_id, lead_email, inbox, updated_at) VALUES(?, ?, ?, ?)",
+                        (tid, lead, box, now),
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return True
+
+    def lead_for_thread(self, thread_id: Optional[str]) -> Optional[Dict[str, str]]:
+        tid = (thread_id or "").strip()
+        if not tid:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT lead_email, inbox FROM threads WHERE thread_id=?", (tid,)
+            ).fetchone()
+        return {"lead_email": row[0], "inbox": row[1]} if row else None
+
+    def lead_for_message_ids(self, message_ids: Iterable[str]) -> Optional[Dict[str, str]]:
+        """First indexed Message-ID among `message_ids` (in the given order)."""
+        ids = [i for i in dict.fromkeys(normalize_message_id(m) for m in message_ids) if i]
+        if not ids:
+            return None
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT message_id, lead_email, inbox FROM messages WHERE message_id IN ({','.join('?' * len(ids))})",
+                ids,
+            ).fetchall()
+        found = {r[0]: {"lead_email": r[1], "inbox": r[2]} for r in rows}
+        for mid in ids:
+            if mid in found:
+                return found[mid]
+        return None
+
+    def match(
+        self,
+        thread_id: Optional[str] = None,
+        in_reply_to: Optional[str] = None,
+        references: Optional[str] = None,
+    ) -> Optional[Dict[str, str]]:
+        """Resolve an inbound message to {lead_email, inbox, via} from its threading headers."""
+        hit = self.lead_for_thread(thread_id)
+        if hit:
+            return dict(hit, via="thread")
+        hit = self.lead_for_message_ids(parse_message_ids(in_reply_to))
+        if hit:
+            return dict(hit, via="in_reply_to")
+        hit = self.lead_for_message_ids(parse_message_ids(references))
+        if hit:
+            return dict(hit, via="references")
+        return None
+
+    def prune(self) -> int:
+        """Drop entries older than the TTL; returns how many rows were removed."""
+        cutoff = time.time() - self.ttl_sec
+        with self._lock:
+            removed = self._conn.execute("DELETE FROM messages WHERE sent_at<?", (cutoff,)).rowcount or 0
+            removed += self._conn.execute("DELETE FROM threads WHERE updated_at<?", (cutoff,)).rowcount or 0
+        return removed
+
+
+_index: Optional[MessageIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_message_index() -> MessageIndex:
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = MessageIndex()
+        return _index
+
+
+def record_sent(lead_email: str, inbox: str = "", *, message_id: Optional[str] = None, thread_id: Optional[str] = None) -> bool:
+    """Best-effort record from a sender; never raises (a failed index write must not fail a send)."""
+    try:
+        return get_message_index().record(lead_email, inbox, message_id=message_id, thread_id=thread_id)
+    except Exception as e:
+        print(f"[message_index] Failed to record sent message for {lead_email}: {e}")
+        return False
+
+
+__all__ = ["MessageIndex", "get_message_index", "record_sent", "normalize_message_id", "parse_message_ids"]
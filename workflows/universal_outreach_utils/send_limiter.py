@@ -0,0 +1,207 @@
+"""
+Cross-process send limiter for the Outreach system.
+
+The opener dispatcher, the follow-up engine and ``send_email.py`` can all send
+from the same inbox, each with its own counters. This module is the single
+source of truth they share:
+
+- A per-inbox token bucket for the per-minute cap (capacity = the cap, refilled
+  continuously at cap/60 tokens per second).
+- A per-inbox, per-day sent counter for the daily cap (local calendar day, like
+  ``email_send_tracking.json``).
+- Both live in one SQLite file (WAL). Each acquire is a ``BEGIN IMMEDIATE``
+  transaction, so concurrent processes never hand out the same permit.
+
+``acquire`` never raises for "over the limit": it returns ``0.0`` when a permit
+was taken, or the number of seconds until the next one would be available
+(nothing is consumed). ``wait_for`` sleeps through short waits. ``release``
+refunds a permit when the send itself failed. ``peek`` reports the wait
+without consuming anything (the dispatcher uses it for pacing; the send path
+does the actual acquire).
+
+Defaults: ``SEND_DAILY_CAP`` (40) and ``SEND_PER_MINUTE_CAP`` (2). Callers may
+pass their own caps; they are all checked against the same shared counts.
+
+Path suggestion: workflows/universal_outreach_utils/send_limiter.py
+"""
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+LIMITER_PATH = os.getenv("SEND_LIMITER_PATH", "/Users/kevinnovanta/backend_for_ai_agency/data/caches/send_limiter.sqlite3")
+DAILY_CAP = int(os.getenv("SEND_DAILY_CAP", "40"))
+PER_MINUTE_CAP = float(os.getenv("SEND_PER_MINUTE_CAP", "2"))
+# wait_for gives up (returns the remaining wait) past this many seconds
+MAX_WAIT_SEC = float(os.getenv("SEND_MAX_WAIT_SEC", "300"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS buckets (
+    inbox   TEXT PRIMARY KEY,
+    tokens  REAL NOT NULL,
+    updated REAL NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS daily (
+    inbox TEXT NOT NULL,
+    day   TEXT NOT NULL,
+    sent  INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (inbox, day)
+) WITHOUT ROWID;
+"""
+
+
+def _today() -> str:
+    return datetime.now().strftime("%Y-%m-%d")
+
+
+def _seconds_to_midnight() -> float:
+    now = datetime.now()
+    midnight = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return max(1.0, (midnight - now).total_seconds())
+
+
+class SendLimiter:
+    """Per-inbox daily cap + per-minute token bucket shared by every sender process."""
+
+    def __init__(self, path: Path | str = LIMITER_PATH) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    @staticmethod
+    def _key(inbox: str) -> str:
+        return (inbox or "").strip().lower()
+
+    def _state_locked(self, key: str, per_minute: float, now: float) -> Tuple[float, int]:
+        """(tokens available now, sent today) for `key`, inside the caller's transaction."""
+        row = self._conn.execute("SELECT tokens, updated FROM buckets WHERE inbox=?", (key,)).fetchone()
+        if row is None:
+            tokens = per_minute
+        else:
+            tokens = min(per_minute, row[0] + (now - row[1]) * per_minute / 60.0)
+        sent = self._conn.execute("SELECT sent FROM daily WHERE inbox=? AND day=?", (key, _today())).fetchone()
+        return tokens, (sent[0] if sent else 0)
+
+    @staticmethod
+    def _wait(tokens: float, sent: int, daily_cap: int, per_minute: float) -> float:
+        if sent >= daily_cap:
+            return _seconds_to_midnight()
+        if tokens >= 1.0:
+            return 0.0
+        return (1.0 - tokens) * 60.0 / per_minute
+
+    def _run(self, key: str, daily_cap: int, per_minute: float, consume: bool) -> float:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                tokens, sent = self._state_locked(key, per_minute, now)
+                wait = self._wait(tokens, sent, daily_cap, per_minute)
+                if consume and wait == 0.0:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO buckets(inbox, tokens, updated) VALUES(?, ?, ?)",
+                        (key, tokens - 1.0, now),
+                    )
+                    self._conn.execute(
+                        "INSERT INTO daily(inbox, day, sent) VALUES(?, ?, 1) "
+                        "ON CONFLICT(inbox, day) DO UPDATE SET sent = sent + 1",
+                        (key, _today()),
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return wait
+
+    def acquire(self, inbox: str, *, daily_cap: Optional[int] = None, per_minute: Optional[float] = None) -> float:
+        """Take a send permit for `inbox`. Returns 0.0 if granted, else seconds until the next one."""
+        return self._run(
+            self._key(inbox),
+            DAILY_CAP if daily_cap is None else int(daily_cap),
+            max(0.001, PER_MINUTE_CAP if per_minute is None else float(per_minute)),
+            consume=True,
+        )
+
+    def peek(self, inbox: str, *, daily_cap: Optional[int] = None, per_minute: Optional[float] = None) -> float:
+        """Seconds until `inbox` could send (0.0 = now), without consuming a permit."""
+        return self._run(
+            self._key(inbox),
+            DAILY_CAP if daily_cap is None else int(daily_cap),
+            max(0.001, PER_MINUTE_CAP if per_minute is None else float(per_minute)),
+            consume=False,
+        )
+
+    def wait_for(
+        self,
+        inbox: str,
+        *,
+        daily_cap: Optional[int] = None,
+        per_minute: Optional[float] = None,
+        max_wait: float = MAX_WAIT_SEC,
+    ) -> float:
+        """Acquire, sleeping through waits of up to `max_wait` seconds in total.
+
+        Returns 0.0 once a permit was taken, or the outstanding wait if it would exceed
+        `max_wait` (e.g. the daily cap is used up); nothing is consumed in that case.
+        """
+        deadline = time.monotonic() + max_wait
+        while True:
+            wait = self.acquire(inbox, daily_cap=daily_cap, per_minute=per_minute)
+            if wait == 0.0:
+                return 0.0
+            if time.monotonic() + wait > deadline:
+                return wait
+            print(f"[send_limiter] {inbox}: next permit in {wait:.1f}s; waiting")
+            time.sleep(wait)
+
+    def release(self, inbox: str) -> None:
+        """Refund a permit taken for a send that did not go out."""
+        key = self._key(inbox)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "UPDATE daily SET sent = MAX(0, sent - 1) WHERE inbox=? AND day=?", (key, _today())
+                )
+                self._conn.execute("UPDATE buckets SET tokens = tokens + 1.0 WHERE inbox=?", (key,))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def sent_today(self, inbox: str) -> int:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT sent FROM daily WHERE inbox=? AND day=?", (self._key(inbox), _today())
+            ).fetchone()
+        return row[0] if row else 0
+
+    def usage(self) -> Dict[str, int]:
+        """{inbox: sent today} across every process."""
+        with self._lock:
+            rows = self._conn.execute("SELECT inbox, sent FROM daily WHERE day=?", (_today(),)).fetchall()
+        return {r[0]: r[1] for r in rows}
+
+
+_limiter: Optional[SendLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_send_limiter() -> SendLimiter:
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = SendLimiter()
+        return _limiter
+
+
+__all__ = ["SendLimiter", "get_send_limiter", "DAILY_CAP", "PER_MINUTE_CAP"]